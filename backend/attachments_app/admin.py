@@ -0,0 +1,39 @@
+from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+from .models import DogAttachment, StoredFile
+
+
+@admin.register(DogAttachment)
+class DogAttachmentAdmin(admin.ModelAdmin):
+    """
+    Attachments are uploaded through the API (which streams them to storage); here they can be viewed and deleted.
+    """
+    list_display = ('dog', 'kind', 'title', 'file_name', 'uploaded_at', 'open_file')
+    list_filter = ['kind']
+    search_fields = ('dog__name', 'title', 'file_name')
+    list_select_related = ['dog', 'file']
+    readonly_fields = ('dog', 'file', 'file_name', 'uploaded_at', 'uploaded_by', 'open_file')
+    fields = ('dog', 'kind', 'title', 'file_name', 'file', 'uploaded_at', 'uploaded_by', 'open_file')
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="File")
+    def open_file(self, obj):
+        return format_html('<a href="{}">Open</a>', reverse('attachment_file', args=[obj.pk]))
+
+
+@admin.register(StoredFile)
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'content_type', 'size', 'thumbnail_status', 'created_at')
+    list_filter = ['content_type', 'thumbnail_status']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False  # Deleted with their last attachment
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class AttachmentsAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'attachments_app'
+
+    def ready(self):
+        from django.db.models.signals import post_delete
+        from . import storage
+        from .models import DogAttachment
+
+        post_delete.connect(storage.attachment_deleted, sender=DogAttachment, dispatch_uid='attachments_release')
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('training_tracker_app', '0002_skill_trainingplan_dog_training_plan_progressnote'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField(help_text='Size in bytes.')),
+                ('content_type', models.CharField(help_text="Detected from the content, not the upload's headers.", max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('thumbnail_status', models.CharField(choices=[('NONE', 'Not an image'), ('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='NONE', max_length=10)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DogAttachment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PHOTO', 'Photo'), ('VACCINATION', 'Vaccination record'), ('WAIVER', 'Waiver'), ('OTHER', 'Other document')], default='PHOTO', max_length=20)),
+                ('title', models.CharField(blank=True, help_text="Short description, e.g. 'Rabies 2025'. Optional.", max_length=200)),
+                ('file_name', models.CharField(help_text='Name of the uploaded file.', max_length=255)),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('dog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attachments', to='training_tracker_app.dog')),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='attachments', to='attachments_app.storedfile')),
+            ],
+            options={
+                'ordering': ['-uploaded_at', '-pk'],
+                'indexes': [models.Index(fields=['dog', '-uploaded_at'], name='dogattachment_dog_idx')],
+            },
+        ),
+    ]
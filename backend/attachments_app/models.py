@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.db import models
+
+
+class StoredFile(models.Model):
+    """
+    One distinct file content, stored once on disk under its SHA-256 (see storage.py)
+    however many attachments share it.
+    """
+    NONE = 'NONE'
+    PENDING = 'PENDING'
+    READY = 'READY'
+    FAILED = 'FAILED'
+    THUMBNAIL_CHOICES = [
+        (NONE, 'Not an image'),
+        (PENDING, 'Pending'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    ]
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField(help_text="Size in bytes.")
+    content_type = models.CharField(max_length=100, help_text="Detected from the content, not the upload's headers.")
+    created_at = models.DateTimeField(auto_now_add=True)
+    thumbnail_status = models.CharField(max_length=10, choices=THUMBNAIL_CHOICES, default=NONE)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.content_type}, {self.size} bytes)"
+
+    @property
+    def is_image(self):
+        return self.content_type.startswith('image/')
+
+
+class DogAttachment(models.Model):
+    """
+    A photo or document (vaccination record, signed waiver) on a dog's profile.
+    """
+    PHOTO = 'PHOTO'
+    VACCINATION = 'VACCINATION'
+    WAIVER = 'WAIVER'
+    OTHER = 'OTHER'
+    KIND_CHOICES = [
+        (PHOTO, 'Photo'),
+        (VACCINATION, 'Vaccination record'),
+        (WAIVER, 'Waiver'),
+        (OTHER, 'Other document'),
+    ]
+
+    dog = models.ForeignKey(
+        'training_tracker_app.Dog',
+        on_delete=models.CASCADE,
+        related_name='attachments'
+    )
+    file = models.ForeignKey(
+        StoredFile,
+        on_delete=models.PROTECT,
+        related_name='attachments'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default=PHOTO)
+    title = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text="Short description, e.g. 'Rabies 2025'. Optional."
+    )
+    file_name = models.CharField(max_length=255, help_text="Name of the uploaded file.")
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    class Meta:
+        ordering = ['-uploaded_at', '-pk']
+        indexes = [
+            models.Index(fields=['dog', '-uploaded_at'], name='dogattachment_dog_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dog.name}: {self.title or self.file_name}"
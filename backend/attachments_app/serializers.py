@@ -0,0 +1,44 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from .models import DogAttachment, StoredFile
+
+
+class DogAttachmentSerializer(serializers.ModelSerializer):
+    """
+    An attachment's details with the URLs of its file and thumbnail. Listings
+    link to the thumbnail instead of embedding or re-sending the original.
+    """
+    content_type = serializers.CharField(source='file.content_type', read_only=True)
+    size = serializers.IntegerField(source='file.size', read_only=True)
+    sha256 = serializers.CharField(source='file_id', read_only=True)
+    file_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DogAttachment
+        fields = [
+            'id',
+            'dog',
+            'kind',
+            'title',
+            'file_name',
+            'content_type',
+            'size',
+            'sha256',
+            'uploaded_at',
+            'file_url',
+            'thumbnail_url'
+        ]
+        read_only_fields = ['dog', 'file_name', 'uploaded_at']
+
+    def get_file_url(self, obj):
+        return reverse('attachment_file', args=[obj.pk])
+
+    def get_thumbnail_url(self, obj):
+        """
+        None until the thumbnail is made, and for documents.
+        """
+        if obj.file.thumbnail_status != StoredFile.READY:
+            return None
+        return reverse('attachment_thumbnail', args=[obj.pk])
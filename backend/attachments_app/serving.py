@@ -0,0 +1,112 @@
+"""
+Serving stored files with HTTP range and conditional request support.
+
+Stored content never changes, so its SHA-256 is a strong ETag: clients
+revalidate with If-None-Match (304), resume or seek with Range/If-Range
+(206), and may cache a response for as long as they like.
+"""
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# A single byte range; multi-range requests are answered with the whole file, which RFC 9110 allows
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def byte_range(header, size):
+    """
+    The (first, last) byte positions requested by a Range header, or None to send the whole file.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        suffix = int(last)  # bytes=-500: the last 500 bytes
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - suffix, 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None  # Invalid ranges are ignored
+    if first >= size:
+        raise RangeNotSatisfiable()
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+class _FileRange:
+    """
+    Read-only view of `length` bytes of an open file, starting at `first`.
+    """
+
+    def __init__(self, file, first, length):
+        file.seek(first)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if value is None:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag  # Strong comparison, so weak validators never match
+    return parse_http_date_safe(value) == int(last_modified)
+
+
+def serve_file(request, path, *, content_type, etag, last_modified, file_name=None, as_attachment=False):
+    """
+    Response for GET/HEAD of an immutable file: 304/412 when a condition says
+    so, 206 for a satisfiable Range, 416 for an unsatisfiable one, 200 otherwise.
+    `last_modified` is a Unix timestamp.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if response is None:
+        file = open(path, 'rb')
+        size = file.seek(0, 2)
+        file.seek(0)
+        try:
+            requested = byte_range(request.META.get('HTTP_RANGE'), size)
+        except RangeNotSatisfiable:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f"bytes */{size}"
+        else:
+            if requested is not None and _if_range_matches(request, etag, last_modified):
+                first, last = requested
+                response = FileResponse(
+                    _FileRange(file, first, last - first + 1), status=206, content_type=content_type,
+                    as_attachment=as_attachment, filename=file_name
+                )
+                response['Content-Length'] = last - first + 1
+                response['Content-Range'] = f"bytes {first}-{last}/{size}"
+            else:
+                # The real file, so servers can hand it to sendfile()
+                response = FileResponse(
+                    file, content_type=content_type, as_attachment=as_attachment, filename=file_name
+                )
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, max_age=CACHE_MAX_AGE, immutable=True)
+    return response
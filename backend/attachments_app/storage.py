@@ -0,0 +1,144 @@
+"""
+Content-addressed storage of dog photos and documents.
+
+Every distinct content is stored once, at objects/<aa>/<bb>/<sha256> under
+ATTACHMENTS['DIRECTORY'], and described by one StoredFile row; attachments
+point at it. Uploading a file that is already stored (the same vaccination
+record for two dogs, a photo sent twice) only adds an attachment row.
+
+Files are never modified once stored, so they can be served with a strong
+ETag and cached forever. A StoredFile and its files are deleted once its
+last attachment is.
+"""
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from job_queue_app.registry import enqueue
+from .models import DogAttachment, StoredFile
+
+logger = logging.getLogger(__name__)
+
+_config = getattr(settings, 'ATTACHMENTS', {})
+DIRECTORY = Path(_config.get('DIRECTORY', settings.BASE_DIR / 'attachments'))
+MAX_UPLOAD_SIZE = _config.get('MAX_UPLOAD_SIZE', 20 * 1024 * 1024)
+THUMBNAIL_SIZE = _config.get('THUMBNAIL_SIZE', 320)
+THUMBNAIL_QUEUE = _config.get('THUMBNAIL_QUEUE', 'thumbnails')
+# Staged files older than this (in seconds) belong to rolled back transactions
+STAGED_MAX_AGE = _config.get('STAGED_MAX_AGE', 60 * 60)
+# Stored files are readable by other users (e.g. a web server serving them), like Django's own uploads
+FILE_MODE = _config.get('FILE_MODE', settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+
+# Accepted content, recognised by its first bytes; the browser's Content-Type is not trusted
+_SIGNATURES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+SNIFF_BYTES = 16
+
+
+def sniff_content_type(head):
+    """
+    Content type of a file starting with `head`, or None if it is not an accepted type.
+    """
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def object_path(sha256):
+    return DIRECTORY / 'objects' / sha256[:2] / sha256[2:4] / sha256
+
+
+def thumbnail_path(sha256):
+    return DIRECTORY / 'thumbnails' / sha256[:2] / f"{sha256}.jpg"
+
+
+def temp_directory():
+    """
+    Where uploads are written while they stream in. On the same filesystem as
+    the objects, so a finished upload is moved into place with a hard link.
+    """
+    path = DIRECTORY / 'tmp'
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _sweep_staged():
+    """
+    Remove files staged by store() in transactions that rolled back.
+    """
+    cutoff = time.time() - STAGED_MAX_AGE
+    for staged in temp_directory().glob('*.staged'):
+        try:
+            if staged.stat().st_mtime < cutoff:
+                staged.unlink()
+        except FileNotFoundError:
+            pass  # Committed or swept meanwhile
+
+
+def _move_into_place(staged, sha256):
+    path = object_path(sha256)
+    if path.exists():
+        staged.unlink(missing_ok=True)  # Stored by a concurrent upload of the same content
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staged.replace(path)
+
+
+def store(upload):
+    """
+    Store a finished upload (see uploads.py) unless its content is already
+    stored, and return its StoredFile. Call inside a transaction: the file is
+    staged in the temporary directory and only moved into place on commit.
+    """
+    # The row lock orders this against release() of the same content
+    stored, created = StoredFile.objects.select_for_update().get_or_create(
+        sha256=upload.sha256,
+        defaults={
+            'size': upload.size,
+            'content_type': upload.content_type,
+            'thumbnail_status': StoredFile.PENDING if upload.content_type.startswith('image/') else StoredFile.NONE
+        }
+    )
+    _sweep_staged()
+    # A link of its own, as the upload's temporary file is removed when the request ends
+    staged = temp_directory() / f"{upload.sha256}.{uuid.uuid4().hex}.staged"
+    staged.hardlink_to(upload.temporary_file_path())
+    os.chmod(staged, FILE_MODE)  # Temporary files are created private (0600)
+    transaction.on_commit(lambda: _move_into_place(staged, upload.sha256))
+    if created and stored.thumbnail_status == StoredFile.PENDING:
+        from .tasks import make_thumbnail
+        transaction.on_commit(lambda: enqueue(make_thumbnail, stored.sha256, queue=THUMBNAIL_QUEUE))
+    return stored
+
+
+def release(sha256):
+    """
+    Delete a stored content and its thumbnail if no attachment uses it anymore.
+    """
+    with transaction.atomic():
+        stored = StoredFile.objects.select_for_update().filter(pk=sha256).first()
+        if stored is None or DogAttachment.objects.filter(file_id=sha256).exists():
+            return False
+        stored.delete()
+        # Before commit, while the row is locked: an upload of the same content waiting
+        # for the lock then finds both the row and the file gone, and stores it again on commit
+        object_path(sha256).unlink(missing_ok=True)
+        thumbnail_path(sha256).unlink(missing_ok=True)
+    return True
+
+
+def attachment_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: release(instance.file_id))
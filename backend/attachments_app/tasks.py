@@ -0,0 +1,11 @@
+from job_queue_app.registry import task
+
+from . import thumbnails
+
+
+@task
+def make_thumbnail(sha256):
+    """
+    Make the thumbnail of a newly stored image (see storage.store).
+    """
+    return thumbnails.make(sha256)
@@ -0,0 +1,209 @@
+import hashlib
+import io
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from job_queue_app.models import Job
+from manage_owners_app.models import Client
+from training_tracker_app.models import Dog
+from . import storage, thumbnails
+from .models import DogAttachment, StoredFile
+
+PDF = b'%PDF-1.4\n' + bytes(range(256)) * 40 + b'\n%%EOF\n'
+
+
+def image_file(name='rex.png', size=(800, 600), fmt='PNG'):
+    data = io.BytesIO()
+    Image.new('RGB', size, 'red').save(data, fmt)
+    data.seek(0)
+    data.name = name
+    return data
+
+
+def named(content, name):
+    data = io.BytesIO(content)
+    data.name = name
+    return data
+
+
+class AttachmentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = Client.objects.create(
+            first_name='Jane', last_name='Doe', email='jane.doe@example.com', phone_number='555-123-4567'
+        )
+        cls.rex = Dog.objects.create(client=owner, name='Rex')
+        cls.max = Dog.objects.create(client=owner, name='Max')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        patcher = mock.patch.object(storage, 'DIRECTORY', self.directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.trainer = get_user_model().objects.create_user('trainer', password='pw')
+        self.client.force_login(self.trainer)
+
+    def upload(self, dog, file, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('dog_attachments', args=[dog.pk]), {'file': file, **fields})
+
+    def stored_objects(self):
+        return sorted(p.name for p in (self.directory / 'objects').rglob('*') if p.is_file())
+
+    def test_01_identical_uploads_are_stored_once(self):
+        """The same content uploaded twice is one stored file, named by its SHA-256."""
+        first = self.upload(self.rex, named(PDF, 'rabies.pdf'), kind=DogAttachment.VACCINATION, title='Rabies 2025')
+        second = self.upload(self.max, named(PDF, 'copy.pdf'), kind=DogAttachment.WAIVER)
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+
+        sha256 = hashlib.sha256(PDF).hexdigest()
+        self.assertEqual(first.json()['sha256'], sha256)
+        self.assertEqual(first.json()['content_type'], 'application/pdf')
+        self.assertEqual((first.json()['size'], first.json()['title']), (len(PDF), 'Rabies 2025'))
+        self.assertIsNone(first.json()['thumbnail_url'])
+        self.assertEqual(StoredFile.objects.get().attachments.count(), 2)
+        self.assertEqual(self.stored_objects(), [sha256])
+        self.assertEqual(list(storage.temp_directory().iterdir()), [])  # Temporary upload files are gone
+        self.assertEqual(DogAttachment.objects.get(pk=first.json()['id']).uploaded_by, self.trainer)
+        self.assertEqual(storage.object_path(sha256).stat().st_mode & 0o777, 0o644)
+
+    def test_02_rejected_uploads(self):
+        """Unaccepted types, oversized files and documents sent as photos are refused and not kept."""
+        url = reverse('dog_attachments', args=[self.rex.pk])
+        response = self.client.post(url, {'file': named(b'#!/bin/sh\necho pwned\n' * 10, 'photo.jpg')})
+        self.assertEqual(response.status_code, 415)
+        with mock.patch.object(storage, 'MAX_UPLOAD_SIZE', 1000):
+            self.assertEqual(self.client.post(url, {'file': image_file()}).status_code, 413)
+        self.assertEqual(self.client.post(url, {'file': named(PDF, 'a.pdf'), 'kind': 'PHOTO'}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'file': image_file(), 'kind': 'X'}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'title': 'No file'}).status_code, 400)
+        self.assertEqual(self.client.post(reverse('dog_attachments', args=[0]), {'file': image_file()}).status_code, 404)
+        self.assertFalse(StoredFile.objects.exists())
+        self.assertEqual(self.stored_objects(), [])
+        self.assertEqual(list(storage.temp_directory().iterdir()), [])
+
+    def test_03_thumbnails_are_made_by_the_job_queue(self):
+        """Images get a thumbnail job on the thumbnails queue; the list then links the thumbnail."""
+        response = self.upload(self.rex, image_file(size=(1600, 1200), fmt='JPEG'))
+        sha256 = response.json()['sha256']
+        job = Job.objects.get()
+        self.assertEqual((job.task, job.queue, job.args), ('attachments_app.tasks.make_thumbnail', 'thumbnails', [sha256]))
+        self.assertEqual(StoredFile.objects.get().thumbnail_status, StoredFile.PENDING)
+        self.assertEqual(self.client.get(reverse('attachment_thumbnail', args=[response.json()['id']])).status_code, 404)
+
+        self.assertEqual(thumbnails.make(sha256), StoredFile.READY)
+        with Image.open(storage.thumbnail_path(sha256)) as thumbnail:
+            self.assertEqual(thumbnail.size, (320, 240))
+
+        with self.assertNumQueries(4):  # Session, user, the dog, and its attachments with their stored files
+            listing = self.client.get(reverse('dog_attachments', args=[self.rex.pk])).json()
+        self.assertEqual(listing[0]['thumbnail_url'], reverse('attachment_thumbnail', args=[response.json()['id']]))
+        thumbnail = self.client.get(listing[0]['thumbnail_url'], HTTP_ACCEPT='image/webp,image/*')
+        self.assertEqual((thumbnail.status_code, thumbnail['Content-Type']), (200, 'image/jpeg'))
+
+    def test_04_broken_images_have_no_thumbnail(self):
+        """An image that cannot be decoded is kept, without a thumbnail."""
+        broken = image_file().getvalue()[:200]
+        sha256 = self.upload(self.rex, named(broken, 'broken.png')).json()['sha256']
+        with self.assertLogs('attachments_app.thumbnails', 'ERROR'):
+            self.assertEqual(thumbnails.make(sha256), StoredFile.FAILED)
+        self.assertFalse(storage.thumbnail_path(sha256).exists())
+
+    def test_05_ranges_and_conditional_requests(self):
+        """Files are served whole, in byte ranges, or not at all when the client's copy is current."""
+        attachment = self.upload(self.rex, named(PDF, 'waiver.pdf'), kind=DogAttachment.WAIVER).json()
+        url = reverse('attachment_file', args=[attachment['id']])
+
+        full = self.client.get(url)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(b''.join(full.streaming_content), PDF)
+        self.assertEqual((full['Content-Type'], full['Accept-Ranges']), ('application/pdf', 'bytes'))
+        self.assertEqual(full['ETag'], f'"{attachment["sha256"]}"')
+        self.assertIn('inline; filename="waiver.pdf"', full['Content-Disposition'])
+        self.assertIn('immutable', full['Cache-Control'])
+        self.assertIn('attachment', self.client.get(url, {'download': 1})['Content-Disposition'])
+
+        part = self.client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual((part.status_code, part['Content-Range'], part['Content-Length']),
+                         (206, f'bytes 10-19/{len(PDF)}', '10'))
+        self.assertEqual(b''.join(part.streaming_content), PDF[10:20])
+        tail = self.client.get(url, HTTP_RANGE='bytes=-7', HTTP_IF_RANGE=full['ETag'])
+        self.assertEqual((tail.status_code, b''.join(tail.streaming_content)), (206, PDF[-7:]))
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"').status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=0-1,5-6').status_code, 200)
+        unsatisfiable = self.client.get(url, HTTP_RANGE=f'bytes={len(PDF)}-')
+        self.assertEqual((unsatisfiable.status_code, unsatisfiable['Content-Range']), (416, f'bytes */{len(PDF)}'))
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=full['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=full['Last-Modified']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(0)).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_MATCH='"other"').status_code, 412)
+
+    def test_06_files_are_deleted_with_their_last_attachment(self):
+        """Stored content (and its thumbnail) goes once no attachment uses it anymore."""
+        first = self.upload(self.rex, image_file()).json()
+        second = self.upload(self.max, image_file()).json()
+        thumbnails.make(first['sha256'])
+        self.assertTrue(storage.thumbnail_path(first['sha256']).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(reverse('attachment_detail', args=[first['id']])).status_code, 204)
+        self.assertEqual(self.stored_objects(), [first['sha256']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.max.delete()  # Cascades to its attachments
+        self.assertFalse(StoredFile.objects.exists())
+        self.assertEqual(self.stored_objects(), [])
+        self.assertFalse(storage.thumbnail_path(first['sha256']).exists())
+        self.assertEqual(self.client.get(reverse('attachment_file', args=[second['id']])).status_code, 404)
+
+    def test_09_only_the_first_file_part_is_read(self):
+        """A second file part is never stored, whether or not the first was accepted."""
+        url = reverse('dog_attachments', args=[self.rex.pk])
+        script = named(b'#!/bin/sh\necho pwned\n' * 10, 'photo.jpg')
+        response = self.client.post(url, {'file': [script, image_file()]})
+        self.assertEqual(response.status_code, 415)
+        with mock.patch.object(storage, 'MAX_UPLOAD_SIZE', 1000):
+            self.assertEqual(self.client.post(url, {'file': [image_file(), named(b'%PDF-1.4\n', 'a.pdf')]}).status_code, 413)
+        self.assertFalse(StoredFile.objects.exists())
+
+        response = self.upload(self.rex, [named(PDF, 'first.pdf'), image_file()], kind=DogAttachment.OTHER)
+        self.assertEqual((response.status_code, response.json()['file_name']), (201, 'first.pdf'))
+        self.assertEqual(self.stored_objects(), [hashlib.sha256(PDF).hexdigest()])
+        self.assertEqual(list(storage.temp_directory().glob('*.upload')), [])
+
+    def test_07_nothing_is_stored_by_a_rolled_back_upload(self):
+        """A failed upload transaction leaves no stored file; its staged link is swept later."""
+        with mock.patch.object(DogAttachment, 'save', side_effect=RuntimeError("Database went away")):
+            with self.assertRaises(RuntimeError):
+                self.upload(self.rex, named(PDF, 'rabies.pdf'), kind=DogAttachment.VACCINATION)
+        self.assertEqual(self.stored_objects(), [])
+        self.assertEqual(len(list(storage.temp_directory().glob('*.staged'))), 1)
+
+        with mock.patch.object(storage, 'STAGED_MAX_AGE', -1):
+            self.upload(self.rex, image_file())
+        self.assertEqual(list(storage.temp_directory().iterdir()), [])
+        self.assertEqual(len(self.stored_objects()), 1)
+
+    def test_08_login_is_required(self):
+        """Anonymous users can neither list, upload, read nor delete attachments."""
+        attachment = self.upload(self.rex, named(PDF, 'waiver.pdf'), kind=DogAttachment.WAIVER).json()
+        self.client.logout()
+        list_url = reverse('dog_attachments', args=[self.rex.pk])
+        self.assertEqual(self.client.get(list_url).status_code, 403)
+        self.assertEqual(self.client.post(list_url, {'file': image_file()}).status_code, 403)
+        for name in ('attachment_detail', 'attachment_file', 'attachment_thumbnail'):
+            self.assertEqual(self.client.get(reverse(name, args=[attachment['id']])).status_code, 403)
+        self.assertEqual(self.client.delete(reverse('attachment_detail', args=[attachment['id']])).status_code, 403)
+        self.assertTrue(DogAttachment.objects.exists())
+        self.assertFalse(StoredFile.objects.filter(sha256=hashlib.sha256(image_file().getvalue()).hexdigest()).exists())
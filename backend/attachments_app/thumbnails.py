@@ -0,0 +1,62 @@
+"""
+Thumbnails of stored images, made by the job queue rather than during the
+upload request. Resizing is CPU bound, so run a process pool worker for them:
+
+    python manage.py run_job_worker --queue thumbnails --mode process
+"""
+import logging
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+from . import storage
+from .models import StoredFile
+
+logger = logging.getLogger(__name__)
+
+
+def render(source, target, size):
+    """
+    Write a JPEG of at most size x size pixels of the image at `source` to `target`.
+    """
+    with Image.open(source) as image:
+        # JPEGs are decoded at a reduced scale (1/2 to 1/8) right away
+        image.draft('RGB', (size, size))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((size, size), reducing_gap=2.0)
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=storage.temp_directory(), suffix='.jpg', delete=False) as out:
+            try:
+                image.save(out, 'JPEG', quality=80, optimize=True)
+            except BaseException:
+                os.unlink(out.name)
+                raise
+        os.chmod(out.name, storage.FILE_MODE)
+        os.replace(out.name, target)
+
+
+def make(sha256):
+    """
+    Make the thumbnail of a stored image and record whether it worked.
+    """
+    if not StoredFile.objects.filter(pk=sha256, thumbnail_status=StoredFile.PENDING).exists():
+        return None  # Deleted meanwhile, or already done
+    try:
+        render(storage.object_path(sha256), storage.thumbnail_path(sha256), storage.THUMBNAIL_SIZE)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        # Truncated or corrupt images (and decompression bombs) are kept, just without a thumbnail
+        logger.exception("Could not make the thumbnail of %s", sha256)
+        result = StoredFile.FAILED
+    else:
+        result = StoredFile.READY
+    StoredFile.objects.filter(pk=sha256).update(thumbnail_status=result)
+    return result
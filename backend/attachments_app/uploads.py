@@ -0,0 +1,100 @@
+import hashlib
+import tempfile
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+from . import storage
+
+_UNSUPPORTED = (415, "Only JPEG, PNG, GIF and WebP images and PDF documents can be uploaded.")
+
+
+class ContentAddressedUpload(UploadedFile):
+    """
+    An upload written to the storage's temporary directory, with its SHA-256.
+    The temporary file is removed when the request closes its files.
+    """
+
+    def __init__(self, file, name, content_type, size, charset, sha256):
+        super().__init__(file, name, content_type, size, charset)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class ContentAddressedUploadHandler(FileUploadHandler):
+    """
+    Streams the upload in the `file` field to disk chunk by chunk while hashing
+    it, so a request never holds the whole file in memory.
+
+    Uploads that are too large or of an unaccepted type are dropped while they
+    stream in; `rejected` then holds an (HTTP status, message) pair for the view.
+    Only the first `file` part is read; any later one is skipped, even when the
+    first was rejected.
+    """
+    field_name = 'file'
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.rejected = None
+        # Not called `file`: the parser closes every handler's `file` when it skips another field
+        self.temp = None
+        self.upload = None
+        self.seen = False  # Whether a `file` part came already, accepted or rejected
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        if field_name != self.field_name or self.seen:
+            raise SkipFile()
+        self.seen = True
+        if self.content_length is not None and self.content_length > storage.MAX_UPLOAD_SIZE:
+            self._reject(self._too_large())
+        self.temp = tempfile.NamedTemporaryFile(dir=storage.temp_directory(), suffix='.upload')
+        self.sha256 = hashlib.sha256()
+        self.head = b''
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > storage.MAX_UPLOAD_SIZE:
+            self._reject(self._too_large())
+        if len(self.head) < storage.SNIFF_BYTES:
+            self.head += raw_data[:storage.SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= storage.SNIFF_BYTES and storage.sniff_content_type(self.head) is None:
+                self._reject(_UNSUPPORTED)
+        self.sha256.update(raw_data)
+        self.temp.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.temp is None or self.rejected:
+            return None
+        content_type = storage.sniff_content_type(self.head)
+        if content_type is None:
+            self.rejected = _UNSUPPORTED
+            self._close()
+            return None
+        self.temp.flush()
+        self.temp.seek(0)
+        self.upload = ContentAddressedUpload(
+            self.temp, self.file_name or 'upload', content_type, file_size, self.charset, self.sha256.hexdigest()
+        )
+        return self.upload
+
+    def upload_interrupted(self):
+        # Also called after another field was skipped; a finished upload is kept
+        if self.upload is None:
+            self._close()
+
+    def _too_large(self):
+        return 413, f"Files can be at most {storage.MAX_UPLOAD_SIZE} bytes."
+
+    def _reject(self, rejected):
+        self.rejected = rejected
+        self._close()
+        raise SkipFile()
+
+    def _close(self):
+        if self.temp is not None:
+            self.temp.close()  # Deletes the temporary file
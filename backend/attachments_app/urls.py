@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import Dog_attachments, Attachment_detail, Attachment_file, Attachment_thumbnail
+
+urlpatterns = [
+    path('dogs/<int:dog_id>/', Dog_attachments.as_view(), name='dog_attachments'),
+    path('<int:pk>/', Attachment_detail.as_view(), name='attachment_detail'),
+    path('<int:pk>/file', Attachment_file.as_view(), name='attachment_file'),
+    path('<int:pk>/thumbnail', Attachment_thumbnail.as_view(), name='attachment_thumbnail')
+]
@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from rest_framework import status
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from training_tracker_app.models import Dog
+from . import storage
+from .models import DogAttachment, StoredFile
+from .serializers import DogAttachmentSerializer
+from .serving import serve_file
+from .uploads import ContentAddressedUploadHandler
+
+
+class Dog_attachments(APIView):
+    """
+    GET: a dog's photos and documents, newest first.
+    POST (multipart/form-data): upload one, with fields `file`, `kind`
+    (PHOTO, VACCINATION, WAIVER or OTHER; default PHOTO) and an optional `title`.
+    """
+    # Private documents, so never open to anonymous users whatever the settings profile
+    permission_classes = [IsAuthenticated]
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Before anything reads the body: stream the upload to storage instead of into memory
+        self.upload_handler = ContentAddressedUploadHandler(request)
+        request.upload_handlers = [self.upload_handler]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get(self, request, dog_id):
+        dog = get_object_or_404(Dog, pk=dog_id)
+        attachments = dog.attachments.select_related('file')
+        serializer = DogAttachmentSerializer(attachments, many = True)
+        return Response(serializer.data)
+
+    def post(self, request, dog_id):
+        dog = get_object_or_404(Dog, pk=dog_id)
+        upload = request.FILES.get('file')
+        if self.upload_handler.rejected:
+            status_code, detail = self.upload_handler.rejected
+            return Response({'detail': detail}, status=status_code)
+        if upload is None:
+            return Response({'detail': "Expected a file in the 'file' field."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = DogAttachmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data.get('kind', DogAttachment.PHOTO) == DogAttachment.PHOTO \
+                and not upload.content_type.startswith('image/'):
+            return Response({'detail': "Photos must be images."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            serializer.save(
+                dog=dog,
+                file=storage.store(upload),
+                file_name=upload.name[:255],
+                uploaded_by=request.user if request.user.is_authenticated else None
+            )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class Attachment_detail(APIView):
+    """
+    GET: one attachment's details. DELETE: remove it (the stored file goes once nothing uses it).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        attachment = get_object_or_404(DogAttachment.objects.select_related('file'), pk=pk)
+        return Response(DogAttachmentSerializer(attachment).data)
+
+    def delete(self, request, pk):
+        get_object_or_404(DogAttachment, pk=pk).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class IgnoreAcceptHeader(BaseContentNegotiation):
+    """
+    Files are sent whatever the Accept header asks for (an <img> asks for image/*);
+    the first renderer is only used for error responses.
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class Attachment_file(APIView):
+    """
+    The attachment's original file, shown inline (?download=1 to save it instead).
+    Supports Range, If-Range, If-None-Match and If-Modified-Since.
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = IgnoreAcceptHeader
+
+    def get(self, request, pk):
+        attachment = get_object_or_404(DogAttachment.objects.select_related('file'), pk=pk)
+        stored = attachment.file
+        try:
+            return serve_file(
+                request, storage.object_path(stored.sha256),
+                content_type=stored.content_type,
+                etag=f'"{stored.sha256}"',
+                last_modified=stored.created_at.timestamp(),
+                file_name=attachment.file_name,
+                as_attachment='download' in request.query_params
+            )
+        except FileNotFoundError:
+            raise Http404("The file is missing from storage.")
+
+
+class Attachment_thumbnail(APIView):
+    """
+    A JPEG thumbnail of a photo or scanned image (404 until it has been made).
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = IgnoreAcceptHeader
+
+    def get(self, request, pk):
+        attachment = get_object_or_404(DogAttachment.objects.select_related('file'), pk=pk)
+        stored = attachment.file
+        if stored.thumbnail_status != StoredFile.READY:
+            raise Http404("No thumbnail.")
+        try:
+            return serve_file(
+                request, storage.thumbnail_path(stored.sha256),
+                content_type='image/jpeg',
+                etag=f'"{stored.sha256}.jpg"',
+                last_modified=stored.created_at.timestamp()
+            )
+        except FileNotFoundError:
+            raise Http404("No thumbnail.")
@@ -3,6 +3,10 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project with an ASGI server (e.g. `uvicorn backend.asgi:application`)
+to use the live change stream at api/v1/events/: its server-sent event
+connections are held open by the event loop without tying up a thread each.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
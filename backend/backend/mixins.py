@@ -0,0 +1,44 @@
+from django.db import models
+
+
+class TracksLoadedValues(models.Model):
+    """
+    Remembers the field values an instance was loaded with, so save signal
+    receivers can tell which fields changed without an extra SELECT.
+
+    `_loaded_values` is None for instances built in memory. It is replaced by
+    the saved values once save() returns, i.e. after every post_save receiver
+    has compared against the old ones.
+    """
+    class Meta:
+        abstract = True
+
+    _loaded_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Deferred fields that were never loaded are left out, as in from_db()
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def changed_since_loaded(self, *names):
+        """
+        Whether any of the named fields (all when none are given) differ from
+        the loaded values; always True for instances that were not loaded.
+        """
+        if self._loaded_values is None:
+            return True
+        names = names or [field.attname for field in self._meta.concrete_fields]
+        return any(
+            name in self.__dict__ and self._loaded_values.get(name) != self.__dict__[name]
+            for name in names
+        )
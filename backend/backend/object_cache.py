@@ -0,0 +1,76 @@
+"""
+Per-request caches of related objects, shared by the sub-requests of a batch.
+
+A view asks for all the related objects one of its querysets needs at once
+(attach()); the keys not fetched earlier in the request are loaded with one
+`pk__in` query and kept, so later sub-requests of the same batch get those
+objects without a query. Sub-requests run one after another, so keys first
+needed by different sub-requests are fetched by separate queries.
+"""
+
+
+class ModelCache:
+    """
+    Objects of one model fetched during a request, by primary key.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.cache = {}
+
+    def get_many(self, keys):
+        """
+        {key: object} for `keys` (missing objects are left out), in at most one query.
+        """
+        keys = {key for key in keys if key is not None}
+        missing = keys - self.cache.keys()
+        if missing:
+            for obj in self.model._default_manager.filter(pk__in=missing):
+                self.cache[obj.pk] = obj
+            for key in missing - self.cache.keys():
+                self.cache[key] = None  # Remember that it does not exist
+        return {key: self.cache[key] for key in keys if self.cache[key] is not None}
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+
+class ObjectCaches:
+    """
+    One ModelCache per model, for the lifetime of a (batch) request.
+    """
+
+    def __init__(self):
+        self._caches = {}
+
+    def __getitem__(self, model):
+        if model not in self._caches:
+            self._caches[model] = ModelCache(model)
+        return self._caches[model]
+
+    def attach(self, objects, field_name):
+        """
+        Fill in the foreign key `field_name` of every object with at most one
+        query, like select_related but shared with the other sub-requests.
+        Returns the related objects.
+        """
+        field = objects[0]._meta.get_field(field_name) if objects else None
+        if field is None:
+            return []
+        related = self[field.related_model].get_many(getattr(obj, field.attname) for obj in objects)
+        for obj in objects:
+            value = related.get(getattr(obj, field.attname))
+            if value is not None:
+                field.set_cached_value(obj, value)
+        return list(related.values())
+
+
+def get_object_caches(request):
+    """
+    The caches shared by the current batch, or fresh ones for a standalone request.
+    """
+    caches = getattr(request, 'object_caches', None)
+    if caches is None:
+        caches = ObjectCaches()
+        request.object_caches = caches
+    return caches
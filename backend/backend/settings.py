@@ -47,8 +47,14 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework.authtoken',
     'manage_owners_app',
-    'training_tracker_app'
+    'training_tracker_app',
+    'job_queue_app',
+    'live_updates_app',
+    'dashboard_app',
+    'profiling_app',
+    'attachments_app'
 ]
 
 MIDDLEWARE = [
@@ -59,6 +65,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'manage_owners_app.audit.AuditUserMiddleware',
+    # Last, so it profiles just the view and its response, not the other middleware
+    'profiling_app.profiler.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -129,6 +138,70 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Background job queue (job_queue_app)
+# Defaults for `python manage.py run_job_worker`; each can be overridden on the command line.
+
+JOB_QUEUE = {
+    'CONCURRENCY': 4,       # Jobs run at once by one worker
+    'MODE': 'thread',       # 'thread' or 'process'
+    'POLL_INTERVAL': 1.0,   # Seconds between polls when idle
+    'STALE_AFTER': 600,     # Seconds before a RUNNING job from a dead worker is requeued
+}
+
+# Client/Address audit trail (manage_owners_app/audit.py)
+# Entries are buffered in-process and written in one INSERT once MAX_SIZE entries are
+# pending or the oldest is MAX_AGE seconds old (also when idle), and at the end of each request and job.
+
+AUDIT_BUFFER = {
+    'MAX_SIZE': 500,
+    'MAX_AGE': 5.0,
+}
+
+# Duplicate client detection (manage_owners_app/dedupe.py)
+
+DEDUPE = {
+    'THRESHOLD': 0.75,       # Similarity score (0-1) reported as a likely duplicate
+    'MAX_BLOCK_SIZE': 200,   # Skip blocking keys shared by more clients than this
+}
+
+# iCalendar feeds of trainer and dog schedules (training_tracker_app/feeds.py)
+# Feeds show appointments from DAYS_BEHIND days ago to DAYS_AHEAD days ahead
+
+CALENDAR_FEEDS = {
+    'DAYS_BEHIND': 30,
+    'DAYS_AHEAD': 180,
+    'CACHE_TIMEOUT': 24 * 60 * 60,  # Seconds a rendered feed version stays cached
+}
+
+# Batched dashboard requests (dashboard_app/views.py)
+
+BATCH_API = {
+    'MAX_REQUESTS': 20,  # Sub-requests accepted in one batch
+}
+
+# On-demand request profiling (profiling_app/profiler.py)
+# Requests under PATH_PREFIXES are profiled when they carry a signed X-Profile
+# header (`python manage.py profiling_token`) or are sampled (SAMPLE_RATE, 0-1)
+
+PROFILING = {
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', 0)),
+    'DIRECTORY': BASE_DIR / 'profiles',
+    'MAX_PROFILES': 200,     # Older profiles (and their files) are deleted
+    'TOKEN_MAX_AGE': 3600,   # Seconds a header token stays valid
+    'PATH_PREFIXES': ['/api/'],
+}
+
+# Dog photos and documents (attachments_app)
+# Uploads are streamed to DIRECTORY and stored once per distinct content. Thumbnails
+# are made by the job queue: `python manage.py run_job_worker --queue thumbnails --mode process`
+
+ATTACHMENTS = {
+    'DIRECTORY': BASE_DIR / 'attachments',
+    'MAX_UPLOAD_SIZE': 20 * 1024 * 1024,  # Bytes
+    'THUMBNAIL_SIZE': 320,                # Pixels, longest side
+    'THUMBNAIL_QUEUE': 'thumbnails',
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
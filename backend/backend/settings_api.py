@@ -0,0 +1,79 @@
+"""
+Production settings profile for serving only the JSON API (api/v1/).
+
+Select it with:
+    DJANGO_SETTINGS_MODULE=backend.settings_api gunicorn backend.wsgi
+    DJANGO_SETTINGS_MODULE=backend.settings_api uvicorn backend.asgi:application
+
+Compared to backend.settings this profile:
+- turns DEBUG off, so executed queries are no longer kept in memory for every request
+- drops the admin, sessions and messages apps, and the session, CSRF, messages
+  and clickjacking middleware; clients authenticate with DRF tokens instead
+- keeps database connections open between requests (or pools them, see DB_POOL)
+- renders JSON only (no browsable API templates)
+
+Per-request overhead and cold-start time of both profiles can be compared with
+`python measure_settings_profiles.py` (next to manage.py).
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, DATABASES, TEMPLATES
+
+DEBUG = False
+
+ALLOWED_HOSTS = [host for host in os.getenv('ALLOWED_HOSTS', '').split(',') if host]
+
+
+# Application definition
+# The admin is served by the full profile only; leaving it out also skips
+# importing every admin.py at startup.
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS
+    if app not in ('django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages')
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'manage_owners_app.audit.AuditUserMiddleware',
+    # Last, so it profiles just the view and its response, not the other middleware
+    'profiling_app.profiler.ProfilingMiddleware',
+]
+
+TEMPLATES = [dict(TEMPLATES[0], OPTIONS={
+    'context_processors': [
+        'django.template.context_processors.request',
+    ],
+})]
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.TokenAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+}
+
+
+# Database
+# Persistent connections by default; set DB_POOL=1 to use psycopg's connection
+# pool instead (requires `pip install "psycopg[pool]"`).
+
+DATABASES = {alias: dict(config) for alias, config in DATABASES.items()}
+if os.getenv('DB_POOL') == '1':
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # Django requires this when pooling
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('CONN_MAX_AGE', 600))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
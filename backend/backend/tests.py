@@ -0,0 +1,47 @@
+import importlib
+
+from django.test import SimpleTestCase
+
+
+class ApiSettingsProfileTests(SimpleTestCase):
+    """
+    Checks on backend.settings_api, the slim API-only production profile.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.api = importlib.import_module('backend.settings_api')
+
+    def test_01_debug_is_off(self):
+        """Queries are not collected in memory for every request."""
+        self.assertFalse(self.api.DEBUG)
+
+    def test_02_browser_middleware_is_dropped(self):
+        """No session, CSRF, messages or clickjacking middleware on API requests."""
+        for middleware in (
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.middleware.csrf.CsrfViewMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+            'django.middleware.clickjacking.XFrameOptionsMiddleware',
+        ):
+            self.assertNotIn(middleware, self.api.MIDDLEWARE)
+        self.assertIn('manage_owners_app.audit.AuditUserMiddleware', self.api.MIDDLEWARE)
+
+    def test_03_admin_and_sessions_not_installed(self):
+        """The admin is not loaded; token auth is."""
+        self.assertNotIn('django.contrib.admin', self.api.INSTALLED_APPS)
+        self.assertNotIn('django.contrib.sessions', self.api.INSTALLED_APPS)
+        self.assertIn('rest_framework.authtoken', self.api.INSTALLED_APPS)
+        self.assertEqual(
+            self.api.REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'],
+            ['rest_framework.authentication.TokenAuthentication']
+        )
+
+    def test_04_database_connections_are_reused(self):
+        """Connections persist between requests instead of reconnecting each time."""
+        self.assertGreater(self.api.DATABASES['default']['CONN_MAX_AGE'], 0)
+        # The base profile's dict is copied, not modified
+        base = importlib.import_module('backend.settings')
+        self.assertIsNot(self.api.DATABASES['default'], base.DATABASES['default'])
+        self.assertEqual(base.DATABASES['default'].get('CONN_MAX_AGE', 0), 0)
@@ -14,10 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/v1/owners/', include("manage_owners_app.urls"))
+    path('api/v1/owners/', include("manage_owners_app.urls")),
+    path('api/v1/jobs/', include("job_queue_app.urls")),
+    path('api/v1/events/', include("live_updates_app.urls")),
+    path('api/v1/training/', include("training_tracker_app.urls")),
+    path('api/v1/attachments/', include("attachments_app.urls")),
+    path('api/v1/', include("dashboard_app.urls"))
 ]
+
+# The API-only profile (backend.settings_api) leaves the admin out entirely
+if 'django.contrib.admin' in settings.INSTALLED_APPS:
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
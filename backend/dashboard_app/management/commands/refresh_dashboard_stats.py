@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard_app import stats
+
+
+class Command(BaseCommand):
+    help = "Refresh the materialized views behind the dashboard stats endpoint (run it from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--blocking', action='store_true',
+            help="Refresh without CONCURRENTLY (faster, but blocks readers until it finishes)."
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stats.refresh(concurrently=not options['blocking'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {len(stats.VIEWS)} dashboard stats view(s) in {time.perf_counter() - started:.2f}s."
+        ))
@@ -0,0 +1,62 @@
+# Materialized views behind the dashboard stats endpoint (see dashboard_app/stats.py).
+# Each has a unique index so it can be refreshed CONCURRENTLY, without blocking readers.
+
+from django.db import migrations
+
+CREATE = """
+CREATE MATERIALIZED VIEW dashboard_client_status AS
+    SELECT 1 AS id,
+           COUNT(*) FILTER (WHERE is_active) AS active,
+           COUNT(*) FILTER (WHERE NOT is_active) AS inactive,
+           now() AS refreshed_at
+    FROM manage_owners_app_client;
+CREATE UNIQUE INDEX dashboard_client_status_id ON dashboard_client_status (id);
+
+CREATE MATERIALIZED VIEW dashboard_clients_by_city AS
+    SELECT upper(btrim(a.state_province)) AS state,
+           initcap(btrim(a.city)) AS city,
+           COUNT(DISTINCT a.client_id) AS clients,
+           COUNT(DISTINCT a.client_id) FILTER (WHERE c.is_active) AS active_clients
+    FROM manage_owners_app_address a
+    JOIN manage_owners_app_client c ON c.id = a.client_id
+    GROUP BY 1, 2;
+CREATE UNIQUE INDEX dashboard_clients_by_city_key ON dashboard_clients_by_city (state, city);
+
+CREATE MATERIALIZED VIEW dashboard_new_clients_weekly AS
+    SELECT date_trunc('week', date_added AT TIME ZONE 'UTC')::date AS week,
+           COUNT(*) AS clients
+    FROM manage_owners_app_client
+    GROUP BY 1;
+CREATE UNIQUE INDEX dashboard_new_clients_weekly_week ON dashboard_new_clients_weekly (week);
+
+CREATE MATERIALIZED VIEW dashboard_appointments_by_trainer AS
+    SELECT COALESCE(t.id, 0) AS trainer_id,
+           COALESCE(t.first_name || ' ' || t.last_name, 'Unassigned') AS trainer,
+           COUNT(*) AS appointments,
+           COUNT(*) FILTER (WHERE a.completed) AS completed,
+           COUNT(*) FILTER (WHERE a.cancelled) AS cancelled,
+           COUNT(*) FILTER (WHERE NOT a.completed AND NOT a.cancelled AND a.start_time >= now()) AS upcoming
+    FROM training_tracker_app_appointment a
+    LEFT JOIN training_tracker_app_trainer t ON t.id = a.trainer_id
+    GROUP BY 1, 2;
+CREATE UNIQUE INDEX dashboard_appointments_by_trainer_id ON dashboard_appointments_by_trainer (trainer_id);
+"""
+
+DROP = """
+DROP MATERIALIZED VIEW IF EXISTS dashboard_appointments_by_trainer;
+DROP MATERIALIZED VIEW IF EXISTS dashboard_new_clients_weekly;
+DROP MATERIALIZED VIEW IF EXISTS dashboard_clients_by_city;
+DROP MATERIALIZED VIEW IF EXISTS dashboard_client_status;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_owners_app', '0007_address_coordinates'),
+        ('training_tracker_app', '0002_skill_trainingplan_dog_training_plan_progressnote'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE, DROP),
+    ]
@@ -0,0 +1,55 @@
+# "Upcoming" appointments depend on the time of the request, not of the last refresh:
+# instead of counting them with now() at refresh time, keep the open appointments'
+# start times (per trainer) and count those still ahead when the stats are read.
+
+from django.db import migrations
+
+CREATE = """
+DROP MATERIALIZED VIEW dashboard_appointments_by_trainer;
+CREATE MATERIALIZED VIEW dashboard_appointments_by_trainer AS
+    SELECT COALESCE(t.id, 0) AS trainer_id,
+           COALESCE(t.first_name || ' ' || t.last_name, 'Unassigned') AS trainer,
+           COUNT(*) AS appointments,
+           COUNT(*) FILTER (WHERE a.completed) AS completed,
+           COUNT(*) FILTER (WHERE a.cancelled) AS cancelled
+    FROM training_tracker_app_appointment a
+    LEFT JOIN training_tracker_app_trainer t ON t.id = a.trainer_id
+    GROUP BY 1, 2;
+CREATE UNIQUE INDEX dashboard_appointments_by_trainer_id ON dashboard_appointments_by_trainer (trainer_id);
+
+CREATE MATERIALIZED VIEW dashboard_open_appointments AS
+    SELECT COALESCE(trainer_id, 0) AS trainer_id,
+           start_time,
+           COUNT(*) AS appointments
+    FROM training_tracker_app_appointment
+    WHERE NOT completed AND NOT cancelled
+    GROUP BY 1, 2;
+CREATE UNIQUE INDEX dashboard_open_appointments_key ON dashboard_open_appointments (start_time, trainer_id);
+"""
+
+DROP = """
+DROP MATERIALIZED VIEW IF EXISTS dashboard_open_appointments;
+DROP MATERIALIZED VIEW dashboard_appointments_by_trainer;
+CREATE MATERIALIZED VIEW dashboard_appointments_by_trainer AS
+    SELECT COALESCE(t.id, 0) AS trainer_id,
+           COALESCE(t.first_name || ' ' || t.last_name, 'Unassigned') AS trainer,
+           COUNT(*) AS appointments,
+           COUNT(*) FILTER (WHERE a.completed) AS completed,
+           COUNT(*) FILTER (WHERE a.cancelled) AS cancelled,
+           COUNT(*) FILTER (WHERE NOT a.completed AND NOT a.cancelled AND a.start_time >= now()) AS upcoming
+    FROM training_tracker_app_appointment a
+    LEFT JOIN training_tracker_app_trainer t ON t.id = a.trainer_id
+    GROUP BY 1, 2;
+CREATE UNIQUE INDEX dashboard_appointments_by_trainer_id ON dashboard_appointments_by_trainer (trainer_id);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard_app', '0001_dashboard_stats'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE, DROP),
+    ]
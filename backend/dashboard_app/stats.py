@@ -0,0 +1,98 @@
+"""
+Dashboard summary statistics, served from PostgreSQL materialized views.
+
+The dashboard shows the same counts on every load, so the GROUP BYs over the
+client, address and appointment tables run only when the views are refreshed
+(`python manage.py refresh_dashboard_stats` from cron, or the
+`dashboard_app.tasks.refresh_stats` job), never at request time. Refreshes use
+REFRESH MATERIALIZED VIEW CONCURRENTLY, so readers are never blocked.
+
+Counts that depend on the current time (upcoming appointments) are not fixed
+at refresh time: the views keep the start times and are filtered on read.
+
+The views are created in migrations/0001_dashboard_stats.py and 0002.
+"""
+import datetime
+
+from django.db import connection
+from django.utils import timezone
+
+VIEWS = [
+    'dashboard_client_status',
+    'dashboard_clients_by_city',
+    'dashboard_new_clients_weekly',
+    'dashboard_appointments_by_trainer',
+    'dashboard_open_appointments',
+]
+
+
+def refresh(concurrently=True):
+    """
+    Recompute every stats view. Each view is refreshed in its own statement, so a
+    long refresh of one does not hold the others back.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT matviewname FROM pg_matviews WHERE matviewname = ANY(%s) AND NOT ispopulated", [VIEWS])
+        unpopulated = {row[0] for row in cursor.fetchall()}
+        for view in VIEWS:
+            # CONCURRENTLY needs existing contents to compare against
+            mode = 'CONCURRENTLY ' if concurrently and view not in unpopulated else ''
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {mode}{view}")
+
+
+def _rows(cursor, query, params=()):
+    cursor.execute(query, params)
+    names = [column.name for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def summary(weeks=12, cities=20):
+    """
+    Everything the dashboard shows, read from the materialized views.
+    """
+    with connection.cursor() as cursor:
+        status = _rows(cursor, "SELECT active, inactive, refreshed_at FROM dashboard_client_status")
+        status = status[0] if status else {'active': 0, 'inactive': 0, 'refreshed_at': None}
+
+        by_city = _rows(cursor, """
+            SELECT state, city, clients, active_clients FROM dashboard_clients_by_city
+            ORDER BY clients DESC, state, city LIMIT %s
+        """, [cities])
+
+        now = timezone.now()
+        today = now.date()
+        first_week = today - datetime.timedelta(days=today.weekday(), weeks=weeks - 1)
+        cursor.execute("SELECT week, clients FROM dashboard_new_clients_weekly WHERE week >= %s", [first_week])
+        new_clients = dict(cursor.fetchall())
+
+        # Open appointments that have started since the last refresh are no longer upcoming
+        by_trainer = _rows(cursor, """
+            SELECT t.trainer_id, t.trainer, t.appointments, t.completed, t.cancelled,
+                   COALESCE(u.upcoming, 0) AS upcoming
+            FROM dashboard_appointments_by_trainer t
+            LEFT JOIN (
+                SELECT trainer_id, SUM(appointments)::bigint AS upcoming
+                FROM dashboard_open_appointments
+                WHERE start_time >= %s
+                GROUP BY trainer_id
+            ) u USING (trainer_id)
+            ORDER BY t.appointments DESC, t.trainer
+        """, [now])
+
+    return {
+        'refreshed_at': status['refreshed_at'],
+        'clients': {
+            'active': status['active'],
+            'inactive': status['inactive'],
+            'total': status['active'] + status['inactive'],
+        },
+        'clients_by_city': by_city,
+        # Weeks without new clients are not stored, so fill them in with zeros
+        'new_clients_per_week': [
+            {'week': week, 'clients': new_clients.get(week, 0)}
+            for week in (first_week + datetime.timedelta(weeks=n) for n in range(weeks))
+        ],
+        'appointments_by_trainer': [
+            dict(row, trainer_id=row['trainer_id'] or None) for row in by_trainer
+        ],
+    }
@@ -0,0 +1,11 @@
+from job_queue_app.registry import task
+
+from . import stats
+
+
+@task
+def refresh_stats():
+    """
+    Refresh the dashboard stats views, e.g. right after a bulk import.
+    """
+    stats.refresh()
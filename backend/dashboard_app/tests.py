@@ -0,0 +1,194 @@
+import datetime
+import io
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from backend.object_cache import ObjectCaches
+from manage_owners_app.models import Client, Address
+from training_tracker_app.models import Trainer, Dog, Appointment
+from . import stats
+
+
+class BatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('dashboard', password='pw', is_staff=True)
+        cls.owner = Client.objects.create(
+            first_name='Jane', last_name='Doe', email='jane.doe@example.com', phone_number='555-123-4567'
+        )
+        cls.trainer = Trainer.objects.create(first_name='Tess', last_name='Trainer')
+        cls.dogs = [Dog.objects.create(client=cls.owner, name=name) for name in ('Rex', 'Max', 'Bella')]
+        now = timezone.now()
+        for day in range(1, 10):
+            Appointment.objects.create(
+                dog=cls.dogs[day % 3], trainer=cls.trainer, start_time=now + datetime.timedelta(days=day, hours=1)
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def batch(self, requests):
+        return self.client.post(reverse('batch'), {'requests': requests}, content_type='application/json')
+
+    def test_01_runs_sub_requests_in_order(self):
+        """Every sub-request's status and body come back under its id, in order."""
+        response = self.batch([
+            {'id': 'owners', 'path': '/api/v1/owners/'},
+            {'id': 'week', 'path': '/api/v1/training/appointments/?days=7'},
+            {'id': 'jobs', 'path': '/api/v1/jobs/?limit=5'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['responses']
+        self.assertEqual([r['id'] for r in results], ['owners', 'week', 'jobs'])
+        self.assertEqual([r['status'] for r in results], [200, 200, 200])
+        self.assertEqual(results[0]['body'][0]['email'], 'jane.doe@example.com')
+        self.assertEqual(len(results[1]['body']), 6)
+        self.assertEqual(results[1]['body'][0]['dog']['client']['last_name'], 'Doe')
+        self.assertEqual(results[2]['body'], [])
+
+    def test_02_authenticates_once(self):
+        """The user is authenticated once for the whole batch, not once per sub-request."""
+        requests = [{'path': f'/api/v1/jobs/?limit={n}'} for n in range(1, 6)]
+        with self.assertNumQueries(2 + 5):  # Session and user lookups + one query per job list
+            response = self.batch(requests)
+        self.assertEqual([r['status'] for r in response.json()['responses']], [200] * 5)
+
+    def test_03_identical_requests_run_once(self):
+        """Repeated sub-requests (even with reordered parameters) share one execution."""
+        requests = [
+            {'id': 'a', 'path': '/api/v1/jobs/?limit=5&status=QUEUED'},
+            {'id': 'b', 'path': '/api/v1/jobs/?status=QUEUED&limit=5'},
+        ]
+        with self.assertNumQueries(2 + 1):
+            response = self.batch(requests)
+        self.assertEqual([r['id'] for r in response.json()['responses']], ['a', 'b'])
+
+    def test_04_related_objects_are_shared(self):
+        """Overlapping appointment windows load each dog, owner and trainer only once for the batch."""
+        requests = [
+            {'path': f'/api/v1/training/appointments/?days=31&trainer={self.trainer.pk}'},
+            {'path': '/api/v1/training/appointments/?days=7'},
+            {'path': '/api/v1/training/appointments/?days=3'},
+        ]
+        # Session and user + 3 appointment queries + trainer, dog and client loads for the first window only
+        with self.assertNumQueries(2 + 3 + 3):
+            response = self.batch(requests)
+        self.assertEqual([len(r['body']) for r in response.json()['responses']], [9, 6, 2])
+
+    def test_05_sub_request_errors(self):
+        """Bad sub-requests fail on their own without failing the batch."""
+        response = self.batch([
+            {'id': 'missing', 'path': '/api/v1/nope/'},
+            {'id': 'post', 'method': 'POST', 'path': '/api/v1/owners/'},
+            {'id': 'nested', 'path': '/api/v1/batch/'},
+            {'id': 'stream', 'path': '/api/v1/events/'},
+            {'id': 'job', 'path': '/api/v1/jobs/999/'},
+            {'id': 'bad', 'path': '/api/v1/training/appointments/?days=x'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {r['id']: r['status'] for r in response.json()['responses']},
+            {'missing': 404, 'post': 405, 'nested': 400, 'stream': 400, 'job': 404, 'bad': 400}
+        )
+
+    def test_06_batch_limits(self):
+        """Empty or oversized batches are rejected."""
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(self.batch([{'path': '/api/v1/jobs/'}] * 21).status_code, 400)
+
+    def test_07_object_cache(self):
+        """A model cache runs one query for unseen keys and remembers missing ones."""
+        cache = ObjectCaches()[Dog]
+        with self.assertNumQueries(1):
+            found = cache.get_many([self.dogs[0].pk, self.dogs[1].pk, 0])
+            self.assertEqual(set(found), {self.dogs[0].pk, self.dogs[1].pk})
+            self.assertIsNone(cache.get(0))
+            self.assertEqual(cache.get(self.dogs[0].pk).name, 'Rex')
+
+
+class DashboardStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.tess = Trainer.objects.create(first_name='Tess', last_name='Trainer')
+        for n, (city, state, active, weeks_ago) in enumerate([
+            ('Atlanta', 'GA', True, 0),
+            (' atlanta', 'ga', True, 0),
+            ('Atlanta', 'GA', False, 2),
+            ('Decatur', 'GA', True, 30),
+        ]):
+            client = Client.objects.create(
+                first_name='Jane', last_name=f'Doe{chr(97 + n)}', email=f'jane{n}@example.com',
+                phone_number='555-123-4567', is_active=active
+            )
+            Client.objects.filter(pk=client.pk).update(date_added=now - datetime.timedelta(weeks=weeks_ago))
+            Address.objects.create(client=client, street_address_1='1 Main St', city=city, state_province=state,
+                                   postal_code='30303')
+            dog = Dog.objects.create(client=client, name=f'Dog{n}')
+            Appointment.objects.create(dog=dog, trainer=cls.tess if n < 3 else None,
+                                       start_time=now + datetime.timedelta(days=1), completed=n == 0)
+        stats.refresh()
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('dashboard', password='pw'))
+
+    def test_01_summary(self):
+        """The refreshed views hold the dashboard counts."""
+        summary = stats.summary(weeks=4)
+        self.assertEqual(summary['clients'], {'active': 3, 'inactive': 1, 'total': 4})
+        self.assertIsNotNone(summary['refreshed_at'])
+        self.assertEqual(summary['clients_by_city'], [
+            {'state': 'GA', 'city': 'Atlanta', 'clients': 3, 'active_clients': 2},
+            {'state': 'GA', 'city': 'Decatur', 'clients': 1, 'active_clients': 1},
+        ])
+        self.assertEqual([w['clients'] for w in summary['new_clients_per_week']], [0, 1, 0, 2])
+        self.assertEqual(summary['appointments_by_trainer'], [
+            {'trainer_id': self.tess.pk, 'trainer': 'Tess Trainer', 'appointments': 3,
+             'completed': 1, 'cancelled': 0, 'upcoming': 2},
+            {'trainer_id': None, 'trainer': 'Unassigned', 'appointments': 1,
+             'completed': 0, 'cancelled': 0, 'upcoming': 1},
+        ])
+
+    def test_02_no_group_by_at_request_time(self):
+        """The endpoint only reads the views; new rows show up after the next refresh."""
+        Client.objects.create(first_name='New', last_name='Client', email='new@example.com', phone_number='555-000-0000')
+        with self.assertNumQueries(4 + 2):  # Four view reads + session and user lookups
+            response = self.client.get(reverse('dashboard_stats'), {'weeks': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['clients']['total'], 4)
+        self.assertEqual(len(response.json()['new_clients_per_week']), 2)
+
+        call_command('refresh_dashboard_stats', stdout=io.StringIO())
+        self.assertEqual(self.client.get(reverse('dashboard_stats')).json()['clients']['total'], 5)
+        self.assertEqual(self.client.get(reverse('dashboard_stats'), {'weeks': 'x'}).status_code, 400)
+
+    def test_03_concurrent_refresh(self):
+        """Refreshes are concurrent, and unpopulated views are filled in with a plain refresh."""
+        with connection.cursor() as cursor:
+            cursor.execute("REFRESH MATERIALIZED VIEW dashboard_client_status WITH NO DATA")
+        stats.refresh()
+        self.assertEqual(stats.summary()['clients']['total'], 4)
+        with connection.execute_wrapper(self.record):
+            self.statements = []
+            stats.refresh()
+        self.assertEqual(sum('REFRESH MATERIALIZED VIEW CONCURRENTLY' in sql for sql in self.statements), 5)
+
+    def test_04_upcoming_is_counted_when_read(self):
+        """Appointments that start after the last refresh stop being upcoming without another refresh."""
+        later = timezone.now() + datetime.timedelta(days=2)
+        with mock.patch.object(timezone, 'now', return_value=later):
+            by_trainer = stats.summary()['appointments_by_trainer']
+        self.assertEqual([row['upcoming'] for row in by_trainer], [0, 0])
+        self.assertEqual([row['appointments'] for row in by_trainer], [3, 1])
+
+    def record(self, execute, sql, params, many, context):
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
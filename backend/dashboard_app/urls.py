@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import Batch, Dashboard_stats
+
+urlpatterns = [
+    path('batch/', Batch.as_view(), name='batch'),
+    path('dashboard/stats/', Dashboard_stats.as_view(), name='dashboard_stats')
+]
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from backend.object_cache import ObjectCaches
+from . import stats
+
+logger = logging.getLogger(__name__)
+
+_config = getattr(settings, 'BATCH_API', {})
+# Sub-requests accepted in one batch
+MAX_REQUESTS = _config.get('MAX_REQUESTS', 20)
+
+# Request headers that describe the batch's own body and must not leak into sub-requests
+_BODY_META = ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_CONTENT_LENGTH', 'HTTP_CONTENT_TYPE', 'wsgi.input')
+
+
+def _sub_request(request, path, query_string, object_caches):
+    """
+    A GET request for one sub-request, already authenticated as the batch's user.
+    """
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = {key: value for key, value in request.META.items() if key not in _BODY_META}
+    sub.META.update(REQUEST_METHOD='GET', PATH_INFO=path, QUERY_STRING=query_string)
+    sub.GET = QueryDict(query_string)
+    sub.COOKIES = request.COOKIES
+    sub.user = request.user
+    # DRF skips its authenticators (token and session lookups) for forced credentials
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    sub.object_caches = object_caches
+    return sub
+
+
+def _error(sub_id, status_code, detail):
+    return {'id': sub_id, 'status': status_code, 'body': {'detail': detail}}
+
+
+def _run(request, path, query_string, object_caches):
+    """
+    Resolve and call the view of one sub-request; returns (status, body).
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return status.HTTP_404_NOT_FOUND, {'detail': "Not found."}
+    if getattr(match.func, 'view_class', None) is Batch:
+        return status.HTTP_400_BAD_REQUEST, {'detail': "Batches cannot be nested."}
+    if asyncio.iscoroutinefunction(match.func):
+        # e.g. the live update stream, which never finishes
+        return status.HTTP_400_BAD_REQUEST, {'detail': "Streaming endpoints cannot be batched."}
+
+    sub = _sub_request(request, path, query_string, object_caches)
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Http404:
+        return status.HTTP_404_NOT_FOUND, {'detail': "Not found."}
+    except PermissionDenied:
+        return status.HTTP_403_FORBIDDEN, {'detail': "You do not have permission to perform this action."}
+    except Exception:
+        logger.exception("Batch sub-request %s failed", path)
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, {'detail': "Server error."}
+
+    if getattr(response, 'streaming', False):
+        response.close()
+        return status.HTTP_400_BAD_REQUEST, {'detail': "Streaming endpoints cannot be batched."}
+    if hasattr(response, 'data'):
+        # DRF response: the outer response renders the data once, no JSON round trip
+        return response.status_code, response.data
+    content = response.content.decode(response.charset or 'utf-8')
+    if response.get('Content-Type', '').startswith('application/json'):
+        return response.status_code, json.loads(content or 'null')
+    return response.status_code, content
+
+
+class Batch(APIView):
+    """
+    Run several GET requests in one call, e.g. everything a dashboard shows.
+
+    POST {"requests": [{"id": "owners", "path": "/api/v1/owners/"},
+                       {"id": "week", "path": "/api/v1/training/appointments/?days=7"}]}
+    returns {"responses": [{"id": "owners", "status": 200, "body": [...]}, ...]} in the same order.
+
+    The batch is authenticated once and sub-requests skip the middleware stack.
+    Identical sub-requests are run once, and related objects fetched by one
+    sub-request are reused by the others (see backend/object_cache.py).
+    """
+    def post(self, request):
+        requests = request.data.get('requests') if isinstance(request.data, dict) else None
+        if not isinstance(requests, list) or not requests:
+            return Response({'detail': "Expected a non-empty list of requests."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(requests) > MAX_REQUESTS:
+            return Response(
+                {'detail': f"At most {MAX_REQUESTS} requests can be batched."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        object_caches = ObjectCaches()
+        results = {}
+        responses = []
+        for index, item in enumerate(requests):
+            if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+                responses.append(_error(index, status.HTTP_400_BAD_REQUEST, "Each request needs a path."))
+                continue
+            sub_id = item.get('id', index)
+            if str(item.get('method', 'GET')).upper() != 'GET':
+                responses.append(_error(sub_id, status.HTTP_405_METHOD_NOT_ALLOWED, "Only GET requests can be batched."))
+                continue
+            url = urlsplit(item['path'])
+            # The same resource requested twice (e.g. by two widgets) is only fetched once
+            key = (url.path, tuple(sorted((name, tuple(values)) for name, values in QueryDict(url.query).lists())))
+            if key not in results:
+                results[key] = _run(request, url.path, url.query, object_caches)
+            status_code, body = results[key]
+            responses.append({'id': sub_id, 'status': status_code, 'body': body})
+        return Response({'responses': responses})
+
+
+class Dashboard_stats(APIView):
+    """
+    Summary counts for the dashboard, read from materialized views (see stats.py).
+    Optional query parameters: ?weeks=<n> (default 12, max 104), ?cities=<n> (default 20, max 500)
+    """
+    def get(self, request):
+        try:
+            weeks = min(max(int(request.query_params.get('weeks', 12)), 1), 104)
+            cities = min(max(int(request.query_params.get('cities', 20)), 1), 500)
+        except ValueError:
+            return Response({'detail': "weeks and cities must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats.summary(weeks=weeks, cities=cities))
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'queue', 'status', 'priority', 'attempts', 'run_at', 'finished_at')
+    list_filter = ['status', 'queue']
+    search_fields = ('task', 'locked_by')
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'locked_by', 'locked_at', 'last_error']
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobQueueAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'job_queue_app'
+
+    def ready(self):
+        # Import every installed app's tasks.py so @task registrations are known to workers
+        autodiscover_modules('tasks')
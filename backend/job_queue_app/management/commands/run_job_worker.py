@@ -0,0 +1,52 @@
+import signal
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from job_queue_app.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run a background job worker that claims jobs from the database with SKIP LOCKED."
+
+    def add_arguments(self, parser):
+        defaults = getattr(settings, 'JOB_QUEUE', {})
+        parser.add_argument(
+            '--concurrency', type=int, default=defaults.get('CONCURRENCY', 4),
+            help="Number of jobs run at the same time by this worker."
+        )
+        parser.add_argument(
+            '--mode', choices=['thread', 'process'], default=defaults.get('MODE', 'thread'),
+            help="Run jobs in a thread pool (I/O bound work) or a process pool (CPU bound work)."
+        )
+        parser.add_argument(
+            '--queue', default=None,
+            help="Only claim jobs from this queue. Defaults to all queues."
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=defaults.get('POLL_INTERVAL', 1.0),
+            help="Seconds to wait between polls when the queue is empty."
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help="Exit once no jobs are ready instead of polling forever."
+        )
+
+    def handle(self, *args, **options):
+        stale_after = getattr(settings, 'JOB_QUEUE', {}).get('STALE_AFTER', 600)
+        worker = Worker(
+            concurrency=options['concurrency'],
+            mode=options['mode'],
+            queue=options['queue'],
+            poll_interval=options['poll_interval'],
+            stale_after=timedelta(seconds=stale_after)
+        )
+        # Finish in-flight jobs on Ctrl+C / SIGTERM instead of abandoning them
+        signal.signal(signal.SIGINT, lambda *_: worker.stop())
+        signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+
+        self.stdout.write(f"Worker {worker.name} started ({options['mode']} x {options['concurrency']}).")
+        processed = worker.run(until_empty=options['burst'])
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after processing {processed} job(s)."))
+
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
+
+
+class JobQuerySet(models.QuerySet):
+
+    def ready(self, queue=None):
+        """
+        Jobs that are queued and due to run, highest priority first.
+        """
+        jobs = self.filter(status=Job.QUEUED, run_at__lte=timezone.now())
+        if queue is not None:
+            jobs = jobs.filter(queue=queue)
+        return jobs.order_by('-priority', 'run_at', 'id')
+
+    def claim(self, worker_name, limit=1, queue=None):
+        """
+        Atomically claim up to `limit` ready jobs for `worker_name`.
+
+        Uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never
+        block on, or double-claim, the same rows.
+        """
+        with transaction.atomic():
+            jobs = list(self.ready(queue).select_for_update(skip_locked=True)[:limit])
+            if not jobs:
+                return []
+            now = timezone.now()
+            for job in jobs:
+                job.status = Job.RUNNING
+                job.attempts += 1
+                job.locked_by = worker_name
+                job.locked_at = now
+                job.started_at = now
+            self.model.objects.bulk_update(
+                jobs, ['status', 'attempts', 'locked_by', 'locked_at', 'started_at']
+            )
+        return jobs
+
+    def heartbeat(self, worker_name, job_ids):
+        """
+        Refresh the lock of jobs `worker_name` is still running, so they are not taken for stale.
+        """
+        if not job_ids:
+            return 0
+        return self.filter(pk__in=job_ids, status=Job.RUNNING, locked_by=worker_name).update(
+            locked_at=timezone.now()
+        )
+
+    def requeue_stale(self, older_than):
+        """
+        Put RUNNING jobs whose worker died (no heartbeat for longer than `older_than`) back in
+        the queue, or mark them as failed once they have used up their attempts. The lost run
+        already counts as an attempt, since claim() counts it.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            stale = self.filter(status=Job.RUNNING, locked_at__lt=now - older_than)
+            error = "The worker running this job stopped sending heartbeats."
+            failed = stale.filter(attempts__gte=models.F('max_attempts')).update(
+                status=Job.FAILED, locked_by='', locked_at=None, finished_at=now, last_error=error
+            )
+            requeued = stale.update(
+                status=Job.QUEUED, locked_by='', locked_at=None, last_error=error
+            )
+        return requeued + failed
+
+
+class Job(models.Model):
+    """
+    A unit of background work stored in PostgreSQL and executed by the
+    `run_job_worker` management command.
+    """
+    QUEUED = 'QUEUED'
+    RUNNING = 'RUNNING'
+    SUCCEEDED = 'SUCCEEDED'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed')
+    ]
+
+    task = models.CharField(
+        max_length=200,
+        help_text="Registered name of the task to run."
+    )
+    queue = models.CharField(
+        max_length=50,
+        default='default',
+        help_text="Queue the job belongs to. Workers can be restricted to one queue."
+    )
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(
+        default=0,
+        help_text="Higher priority jobs are claimed first."
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+        help_text="Number of times the job is tried before it is marked as failed."
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="The job will not be claimed before this time."
+    )
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Partial index covering exactly what workers poll for
+            models.Index(
+                fields=['queue', '-priority', 'run_at'],
+                name='job_ready_idx',
+                condition=models.Q(status='QUEUED')
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
+    def retry_delay(self):
+        """
+        Exponential backoff between attempts: 2, 4, 8, ... seconds (capped at one hour).
+        """
+        return timedelta(seconds=min(2 ** self.attempts, 3600))
@@ -0,0 +1,71 @@
+from django.dispatch import Signal
+
+from .models import Job
+
+_tasks = {}
+
+# Sent after every task run, in the thread or process that ran it (the job
+# worker's counterpart of request_finished, e.g. for flushing buffers)
+task_finished = Signal()
+
+
+def task(func=None, *, name=None):
+    """
+    Register a function as a background task.
+
+    Usage (in any app's tasks.py):
+        @task
+        def rebuild_rollups(day): ...
+
+        enqueue('manage_owners_app.tasks.rebuild_rollups', day='2025-04-01')
+    """
+    def register(f):
+        task_name = name or f"{f.__module__}.{f.__qualname__}"
+        _tasks[task_name] = f
+        f.task_name = task_name
+        return f
+
+    if func is not None:
+        return register(func)
+    return register
+
+
+def get_task(name):
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise LookupError(f"No task registered under the name '{name}'.")
+
+
+def enqueue(task_name, *args, priority=0, queue='default', run_at=None, max_attempts=3, **kwargs):
+    """
+    Store a job for a registered task and return it. Workers pick it up asynchronously.
+    """
+    if callable(task_name):
+        task_name = task_name.task_name
+    get_task(task_name)  # Fail fast on typos instead of inside the worker
+    job = Job(
+        task=task_name,
+        queue=queue,
+        args=list(args),
+        kwargs=kwargs,
+        priority=priority,
+        max_attempts=max_attempts
+    )
+    if run_at is not None:
+        job.run_at = run_at
+    job.save()
+    return job
+
+
+def run_task(task_name, args, kwargs):
+    """
+    Execute a registered task. Module level so it can be pickled for process pools.
+    """
+    from django.db import close_old_connections
+
+    try:
+        return get_task(task_name)(*args, **kwargs)
+    finally:
+        task_finished.send(sender=None, task_name=task_name)
+        close_old_connections()
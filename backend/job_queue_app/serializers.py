@@ -0,0 +1,28 @@
+from rest_framework import serializers
+from .models import Job
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer exposing the status of a background job.
+    """
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'task',
+            'queue',
+            'status',
+            'status_display',
+            'priority',
+            'attempts',
+            'max_attempts',
+            'run_at',
+            'created_at',
+            'started_at',
+            'finished_at',
+            'result',
+            'last_error'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,255 @@
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Job
+from .registry import enqueue, task
+from .worker import Worker
+
+_executed = []
+_executed_lock = threading.Lock()
+
+
+@task(name='tests.record')
+def record(value):
+    with _executed_lock:
+        _executed.append(value)
+    return value
+
+
+@task(name='tests.explode')
+def explode():
+    raise RuntimeError("boom")
+
+
+@task(name='tests.square')
+def square(value):
+    return value * value
+
+
+@task(name='tests.slow_record')
+def slow_record(value, seconds):
+    time.sleep(seconds)
+    return record(value)
+
+
+@task(name='tests.crash')
+def crash():
+    os._exit(1)  # Like a child process killed by the OOM killer
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        _executed.clear()
+
+    def test_01_enqueue_unknown_task(self):
+        """Enqueuing a task that is not registered fails immediately."""
+        with self.assertRaises(LookupError):
+            enqueue('tests.does_not_exist')
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_02_claim_respects_priority_and_run_at(self):
+        """Claiming returns due jobs highest priority first and marks them running."""
+        low = enqueue('tests.record', 1, priority=0)
+        high = enqueue('tests.record', 2, priority=10)
+        enqueue('tests.record', 3, priority=100, run_at=timezone.now() + timedelta(hours=1))
+
+        claimed = Job.objects.claim('w1', limit=5)
+        self.assertEqual([job.pk for job in claimed], [high.pk, low.pk])
+        high.refresh_from_db()
+        self.assertEqual(high.status, Job.RUNNING)
+        self.assertEqual(high.attempts, 1)
+        self.assertEqual(high.locked_by, 'w1')
+        # Nothing else is ready
+        self.assertEqual(Job.objects.claim('w2', limit=5), [])
+
+    def test_03_worker_runs_jobs(self):
+        """A worker runs queued jobs and stores their results."""
+        job = enqueue(square, 7)
+        processed = Worker(concurrency=2).run(until_empty=True)
+        self.assertEqual(processed, 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, 49)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_04_failed_job_is_retried_then_failed(self):
+        """A failing job is rescheduled with backoff until max_attempts is reached."""
+        job = enqueue('tests.explode', max_attempts=2)
+        Worker().run(until_empty=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("boom", job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        Worker().run(until_empty=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_05_requeue_stale(self):
+        """Jobs left RUNNING by a dead worker are put back in the queue."""
+        job = enqueue('tests.record', 1)
+        Job.objects.claim('dead-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(Job.objects.requeue_stale(timedelta(minutes=10)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    def test_06_stale_job_out_of_attempts_fails(self):
+        """A job that keeps taking its worker down is failed after max_attempts instead of looping."""
+        job = enqueue('tests.record', 1, max_attempts=2)
+        for attempt in range(2):
+            Job.objects.claim('dying-worker')
+            Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+            Job.objects.requeue_stale(timedelta(minutes=10))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn("heartbeats", job.last_error)
+
+    def test_07_heartbeat(self):
+        """Only the worker holding a job refreshes its lock."""
+        job = enqueue('tests.record', 1)
+        Job.objects.claim('w1')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(Job.objects.heartbeat('w2', [job.pk]), 0)
+        self.assertEqual(Job.objects.heartbeat('w1', [job.pk]), 1)
+        self.assertEqual(Job.objects.requeue_stale(timedelta(minutes=10)), 0)
+
+    def test_08_job_status_api(self):
+        """Job status is exposed through the API, to staff only."""
+        job = enqueue('tests.record', 1)
+        self.assertEqual(self.client.get(reverse('a_job', args=[job.pk])).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user('trainer', password='pw'))
+        self.assertEqual(self.client.get(reverse('all_jobs')).status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user('admin', password='pw', is_staff=True))
+        response = self.client.get(reverse('a_job', args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'QUEUED')
+
+        response = self.client.get(reverse('all_jobs'), {'status': 'queued'})
+        self.assertEqual([j['id'] for j in response.json()], [job.pk])
+        response = self.client.get(reverse('all_jobs'), {'status': 'failed'})
+        self.assertEqual(response.json(), [])
+
+        response = self.client.get(reverse('a_job', args=[job.pk + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_09_job_list_limit(self):
+        """The list limit is clamped to 1..1000; a non-integer limit is a bad request."""
+        self.client.force_login(get_user_model().objects.create_user('admin', password='pw', is_staff=True))
+        jobs = [enqueue('tests.record', i) for i in range(3)]
+        response = self.client.get(reverse('all_jobs'), {'limit': -5})
+        self.assertEqual((response.status_code, len(response.json())), (200, 1))
+        self.assertEqual(response.json()[0]['id'], jobs[-1].pk)
+        self.assertEqual(len(self.client.get(reverse('all_jobs'), {'limit': 0}).json()), 1)
+        self.assertEqual(len(self.client.get(reverse('all_jobs'), {'limit': 10 ** 6}).json()), 3)
+        self.assertEqual(self.client.get(reverse('all_jobs'), {'limit': 'lots'}).status_code, 400)
+
+
+class ConcurrentWorkerTests(TransactionTestCase):
+    """
+    Runs several workers against the same table, each on its own database connection.
+    """
+
+    def setUp(self):
+        _executed.clear()
+
+    def test_01_concurrent_workers_throughput(self):
+        """Several workers drain the queue with every job run exactly once."""
+        total = 400
+        Job.objects.bulk_create([Job(task='tests.record', args=[i]) for i in range(total)])
+        workers = [Worker(concurrency=4, name=f"w{i}") for i in range(4)]
+        counts = {}
+
+        def run(worker):
+            try:
+                counts[worker.name] = worker.run(until_empty=True)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run, args=(worker,)) for worker in workers]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(sorted(_executed), list(range(total)))  # No job lost or run twice
+        self.assertEqual(sum(counts.values()), total)
+        self.assertEqual(Job.objects.filter(status=Job.SUCCEEDED).count(), total)
+        # Work is actually spread across workers rather than serialized behind one lock
+        self.assertGreater(sum(1 for count in counts.values() if count > 0), 1)
+        self.assertLess(elapsed, 30, f"{total} jobs took {elapsed:.1f}s ({total / elapsed:.0f} jobs/s)")
+
+    def test_02_process_pool_mode(self):
+        """Jobs can be run in a process pool."""
+        jobs = [enqueue(square, i) for i in range(5)]
+        Worker(concurrency=2, mode='process').run(until_empty=True)
+        for i, job in enumerate(jobs):
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.SUCCEEDED)
+            self.assertEqual(job.result, i * i)
+
+    def test_03_long_jobs_are_not_taken_for_stale(self):
+        """A job running longer than stale_after keeps its lock and runs once."""
+        enqueue(slow_record, 'long', 1.5)
+        workers = [Worker(concurrency=1, poll_interval=0.1, stale_after=timedelta(seconds=0.5), name=f"w{i}")
+                   for i in range(2)]
+
+        def run(worker):
+            try:
+                worker.run(until_empty=True)
+            finally:
+                connections.close_all()
+
+        first = threading.Thread(target=run, args=(workers[0],))
+        first.start()
+        time.sleep(1.0)  # Past stale_after, while the first worker is still running the job
+        run(workers[1])
+        first.join()
+        self.assertEqual(_executed, ['long'])
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
+
+    def test_04_broken_process_pool(self):
+        """A child process dying fails its job and the worker carries on with a new pool."""
+        crashed = enqueue(crash, priority=10, max_attempts=1)
+        jobs = [enqueue(square, i) for i in range(3)]
+        Worker(concurrency=1, mode='process').run(until_empty=True)
+        crashed.refresh_from_db()
+        self.assertEqual(crashed.status, Job.FAILED)
+        self.assertIn('BrokenProcessPool', crashed.last_error)
+        self.assertEqual([Job.objects.get(pk=job.pk).status for job in jobs], [Job.SUCCEEDED] * 3)
+
+    def test_05_stopping_keeps_heartbeating(self):
+        """A worker that is stopped keeps its jobs' locks fresh until they finish, so they run once."""
+        enqueue(slow_record, 'draining', 1.5)
+        stopping = Worker(concurrency=1, poll_interval=0.1, stale_after=timedelta(seconds=0.5), name='stopping')
+
+        def run():
+            try:
+                stopping.run()
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        time.sleep(0.3)
+        stopping.stop()  # While the job is still running
+        time.sleep(0.7)  # Past stale_after
+        Worker(concurrency=1, poll_interval=0.1, stale_after=timedelta(seconds=0.5), name='other').run(until_empty=True)
+        thread.join()
+        connections.close_all()
+        self.assertEqual(_executed, ['draining'])
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
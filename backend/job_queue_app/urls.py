@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import All_jobs, A_job
+
+urlpatterns = [
+    path('', All_jobs.as_view(), name='all_jobs'),
+    path('<int:job_id>/', A_job.as_view(), name='a_job')
+]
@@ -0,0 +1,45 @@
+from django.shortcuts import get_object_or_404
+
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+class All_jobs(APIView):
+    """
+    List background jobs, most recent first.
+    Optional query parameters: ?status=QUEUED|RUNNING|SUCCEEDED|FAILED, ?task=<name>, ?limit=<n> (default 100, max 1000)
+    """
+    # Job arguments, results and tracebacks are for operators only
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        jobs = Job.objects.all()
+        job_status = request.query_params.get('status')
+        if job_status:
+            jobs = jobs.filter(status=job_status.upper())
+        task = request.query_params.get('task')
+        if task:
+            jobs = jobs.filter(task=task)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+        except ValueError:
+            return Response({'detail': "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = JobSerializer(jobs[:limit], many = True)
+        return Response(serializer.data)
+
+
+class A_job(APIView):
+    """
+    Return the status of a single background job.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(Job, pk=job_id)
+        serializer = JobSerializer(job)
+        return Response(serializer.data)
@@ -0,0 +1,140 @@
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import traceback
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.db import connections
+from django.utils import timezone
+
+from .models import Job
+from .registry import run_task
+
+
+class Worker:
+    """
+    Claims jobs from the database and runs them in a thread or process pool.
+
+    Several workers (in one or many processes/hosts) can run against the same
+    table; SKIP LOCKED claiming guarantees each job is handed out once.
+    """
+
+    def __init__(self, concurrency=4, mode='thread', queue=None, poll_interval=1.0,
+                 stale_after=timedelta(minutes=10), name=None):
+        if mode not in ('thread', 'process'):
+            raise ValueError("mode must be 'thread' or 'process'.")
+        self.concurrency = concurrency
+        self.mode = mode
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _make_pool(self):
+        if self.mode == 'process':
+            # Fork every child up front, while the parent holds no database connection
+            # they could inherit (a shared socket is corrupted as soon as either side uses it)
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=self.concurrency, mp_context=multiprocessing.get_context('fork'))
+            pool.submit(int).result()
+            return pool
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job')
+
+    def run(self, until_empty=False):
+        """
+        Process jobs until stop() is called, or until no jobs are ready when `until_empty` is set.
+        Returns the number of jobs processed.
+        """
+        processed = 0
+        in_flight = {}
+        last_maintenance = None
+        self._pool = self._make_pool()
+        try:
+            while not self._stop.is_set():
+                if last_maintenance is None or time.monotonic() - last_maintenance >= self.poll_interval:
+                    # Keep our own jobs' locks fresh, and take over jobs of workers that died
+                    Job.objects.heartbeat(self.name, [job.pk for job in in_flight.values()])
+                    Job.objects.requeue_stale(self.stale_after)
+                    last_maintenance = time.monotonic()
+
+                free = self.concurrency - len(in_flight)
+                if free > 0:
+                    for job in Job.objects.claim(self.name, limit=free, queue=self.queue):
+                        in_flight[self._submit(job)] = job
+
+                if not in_flight:
+                    if until_empty:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(in_flight.pop(future), future)
+                    processed += 1
+
+            # Let claimed jobs finish on shutdown rather than leaving them RUNNING, still
+            # heartbeating so other workers do not take the long ones for stale and run them again
+            while in_flight:
+                Job.objects.heartbeat(self.name, [job.pk for job in in_flight.values()])
+                done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(in_flight.pop(future), future)
+                    processed += 1
+        finally:
+            self._pool.shutdown()
+        return processed
+
+    def _submit(self, job):
+        try:
+            return self._pool.submit(run_task, job.task, job.args, job.kwargs)
+        except BrokenProcessPool:
+            # A child process died (e.g. killed for using too much memory). The jobs it took
+            # down fail through their futures; start a new pool for the rest.
+            self._pool.shutdown(wait=False)
+            self._pool = self._make_pool()
+            return self._pool.submit(run_task, job.task, job.args, job.kwargs)
+
+    def _finish(self, job, future):
+        """
+        Record the outcome of a job, rescheduling it with backoff if it can be retried.
+        """
+        now = timezone.now()
+        job.locked_by = ''
+        job.locked_at = None
+        error = future.exception()
+        if error is None:
+            job.status = Job.SUCCEEDED
+            job.result = _json_safe(future.result())
+            job.finished_at = now
+        else:
+            job.last_error = ''.join(traceback.format_exception(error))
+            if job.attempts < job.max_attempts:
+                job.status = Job.QUEUED
+                job.run_at = now + job.retry_delay()
+            else:
+                job.status = Job.FAILED
+                job.finished_at = now
+        job.save(update_fields=[
+            'status', 'result', 'last_error', 'run_at', 'finished_at', 'locked_by', 'locked_at'
+        ])
+
+
+def _json_safe(value):
+    """
+    Results are stored in a JSONField; fall back to repr() for anything it cannot encode.
+    """
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
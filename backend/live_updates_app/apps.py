@@ -0,0 +1,21 @@
+from django.apps import AppConfig
+
+
+class LiveUpdatesAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'live_updates_app'
+
+    def ready(self):
+        from manage_owners_app.models import Address, Client
+        from training_tracker_app.models import Appointment, Dog
+        from .signals import watch
+
+        def appointment_client_id(appointment):
+            if Appointment.dog.is_cached(appointment):
+                return appointment.dog.client_id
+            # Looked up by the NOTIFY itself; None when the dog went too (a client and all they own being deleted)
+            return Dog.objects.filter(pk=appointment.dog_id).values('client_id')
+
+        watch(Client, client_id=lambda client: client.pk)
+        watch(Address, client_id=lambda address: address.client_id)
+        watch(Appointment, client_id=appointment_client_id)
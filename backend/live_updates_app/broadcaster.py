@@ -0,0 +1,137 @@
+"""
+Per-process fan-out of PostgreSQL notifications to server-sent event streams.
+
+One LISTEN connection per process receives every change event; each open
+stream only owns a small asyncio.Queue, so thousands of idle subscribers cost
+no threads and no database connections.
+"""
+import asyncio
+import itertools
+import json
+import logging
+
+import psycopg
+from psycopg import sql
+from django.db import connections
+
+from .signals import CHANNEL
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    Events waiting to be sent to one client. Slow clients lose their oldest
+    events rather than making the queue grow without bound.
+    """
+
+    def __init__(self, max_pending=100, models=None, client_id=None):
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.models = models
+        self.client_id = client_id
+
+    def wants(self, event):
+        if event['model'] == 'resync':
+            return True
+        if self.models and event['model'] not in self.models:
+            return False
+        if self.client_id is not None and event.get('client_id') != self.client_id:
+            return False
+        return True
+
+    def put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class Broadcaster:
+
+    def __init__(self, using='default', reconnect_delay=1.0):
+        self.using = using
+        self.reconnect_delay = reconnect_delay
+        self.subscribers = set()
+        self._ids = itertools.count(1)
+        self._task = None
+        self._listening = None
+
+    def _conninfo(self):
+        # Read at connect time so the test database is used under the test runner
+        params = connections[self.using].settings_dict
+        return psycopg.conninfo.make_conninfo(**{
+            key: value for key, value in {
+                'dbname': params['NAME'],
+                'user': params.get('USER'),
+                'password': params.get('PASSWORD'),
+                'host': params.get('HOST'),
+                'port': params.get('PORT'),
+            }.items() if value
+        })
+
+    async def start(self):
+        """
+        Start listening (once per event loop) and wait until LISTEN is active.
+        """
+        if self._task is None or self._task.done():
+            self._listening = asyncio.Event()
+            self._task = asyncio.create_task(self._listen())
+        await self._listening.wait()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self, **kwargs):
+        subscription = Subscription(**kwargs)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, event):
+        event = dict(event, event_id=next(self._ids))
+        for subscription in list(self.subscribers):
+            if subscription.wants(event):
+                subscription.put(event)
+
+    async def _listen(self):
+        first = True
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._conninfo(), autocommit=True) as conn:
+                    await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(CHANNEL)))
+                    if not first:
+                        # Events may have been missed while disconnected; clients should refetch
+                        self.publish({'model': 'resync', 'action': 'resync'})
+                    first = False
+                    self._listening.set()
+                    async for notify in conn.notifies():
+                        try:
+                            self.publish(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning("Ignoring malformed change event: %r", notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Live update listener lost its connection; reconnecting.")
+                await asyncio.sleep(self.reconnect_delay)
+
+
+_broadcasters = {}
+
+
+def get_broadcaster():
+    """
+    The broadcaster for the running event loop (one LISTEN connection per loop).
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _broadcasters:
+        _broadcasters.clear()  # A previous loop has ended (e.g. between tests)
+        _broadcasters[loop] = Broadcaster()
+    return _broadcasters[loop]
@@ -0,0 +1,68 @@
+import json
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+
+CHANNEL = getattr(settings, 'LIVE_UPDATES_CHANNEL', 'stark9_changes')
+
+
+def notify(model_name, object_id, action, client_id=None, using='default'):
+    """
+    Publish a change event with pg_notify().
+
+    NOTIFY is transactional: listeners only receive the event once the
+    surrounding transaction commits, and never for a rollback.
+
+    `client_id` can also be a queryset selecting one client id, which is then
+    looked up within the NOTIFY statement rather than by a query of its own.
+    """
+    lookup = None
+    if isinstance(client_id, QuerySet):
+        lookup, client_id = client_id, None
+    payload = json.dumps({
+        'model': model_name,
+        'id': object_id,
+        'action': action,
+        'client_id': client_id,
+    })
+    with connections[using].cursor() as cursor:
+        if lookup is None:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+        else:
+            sql, params = lookup.query.get_compiler(using).as_sql()
+            cursor.execute(
+                "SELECT pg_notify(%s, jsonb_set(%s::jsonb, '{client_id}', "
+                f"coalesce(to_jsonb(({sql})), 'null'::jsonb))::text)",
+                [CHANNEL, payload, *params]
+            )
+
+
+def watch(model, client_id=None):
+    """
+    Publish save and delete events of `model` to live update subscribers.
+
+    `client_id` is an optional function returning the owning client's id (or a
+    queryset selecting it, see notify()), so dashboards can subscribe to
+    everything belonging to one client.
+
+    Events are sent once the change commits, so the write transaction is not
+    lengthened by them and rolled back changes send nothing.
+    """
+    def publish(instance, action, using):
+        # Evaluated now: the instance may change (or lose its pk) before the commit
+        args = (model._meta.model_name, instance.pk, action, client_id(instance) if client_id else None, using)
+        transaction.on_commit(lambda: notify(*args), using=using)
+
+    def on_save(sender, instance, created, raw=False, using='default', **kwargs):
+        if raw:
+            return
+        publish(instance, 'created' if created else 'updated', using)
+
+    def on_delete(sender, instance, using='default', **kwargs):
+        publish(instance, 'deleted', using)
+
+    uid = f'live_updates_{model._meta.label_lower}'
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'{uid}_save')
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'{uid}_delete')
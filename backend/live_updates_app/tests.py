@@ -0,0 +1,187 @@
+import asyncio
+import json
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from manage_owners_app.models import Address, Client
+from training_tracker_app.models import Appointment, Dog
+from .broadcaster import Broadcaster, get_broadcaster
+
+
+class BroadcasterTests(TransactionTestCase):
+    """
+    NOTIFY is only delivered on commit, so these tests need real transactions.
+    """
+
+    client_data = {
+        'first_name': 'Live',
+        'last_name': 'Update',
+        'email': 'live.update@example.com',
+        'phone_number': '678-640-8681'
+    }
+
+    async def start_broadcaster(self):
+        self.broadcaster = Broadcaster()
+        await self.broadcaster.start()
+
+    async def next_event(self, subscription):
+        return await asyncio.wait_for(subscription.queue.get(), timeout=5)
+
+    async def test_01_model_changes_are_pushed(self):
+        """Saving and deleting a client reaches subscribers through LISTEN/NOTIFY."""
+        await self.start_broadcaster()
+        try:
+            subscription = self.broadcaster.subscribe()
+            client = await Client.objects.acreate(**self.client_data)
+            event = await self.next_event(subscription)
+            self.assertEqual((event['model'], event['id'], event['action']), ('client', client.pk, 'created'))
+
+            client_pk = client.pk
+            await client.adelete()
+            event = await self.next_event(subscription)
+            self.assertEqual((event['id'], event['action']), (client_pk, 'deleted'))
+        finally:
+            await self.broadcaster.stop()
+
+    async def test_02_subscription_filters(self):
+        """Subscribers can limit events to some models or to one client."""
+        await self.start_broadcaster()
+        try:
+            client = await Client.objects.acreate(**self.client_data)
+            other = await Client.objects.acreate(**dict(self.client_data, email='other@example.com'))
+            addresses_only = self.broadcaster.subscribe(models={'address'})
+            one_client = self.broadcaster.subscribe(client_id=client.pk)
+
+            await Address.objects.acreate(client=other, street_address_1='1 A St', city='Town', postal_code='11111')
+            address = await Address.objects.acreate(client=client, street_address_1='2 B St', city='Town', postal_code='22222')
+
+            event = await self.next_event(addresses_only)
+            self.assertEqual(event['client_id'], other.pk)
+            event = await self.next_event(one_client)
+            self.assertEqual((event['model'], event['id']), ('address', address.pk))
+        finally:
+            await self.broadcaster.stop()
+
+    async def test_03_rolled_back_changes_are_not_pushed(self):
+        """A rolled back save never produces an event."""
+        await self.start_broadcaster()
+        try:
+            subscription = self.broadcaster.subscribe()
+
+            def create_and_roll_back():
+                with transaction.atomic():
+                    Client.objects.create(**self.client_data)
+                    transaction.set_rollback(True)
+            await sync_to_async(create_and_roll_back)()
+            client = await Client.objects.acreate(**dict(self.client_data, email='kept@example.com'))
+            event = await self.next_event(subscription)
+            self.assertEqual(event['id'], client.pk)  # The rolled back client was skipped
+        finally:
+            await self.broadcaster.stop()
+
+    async def test_04_thousands_of_idle_subscribers(self):
+        """One event fans out to thousands of subscribers cheaply."""
+        await self.start_broadcaster()
+        try:
+            subscriptions = [self.broadcaster.subscribe() for _ in range(5000)]
+            started = time.perf_counter()
+            await Client.objects.acreate(**self.client_data)
+            await self.next_event(subscriptions[-1])
+            elapsed = time.perf_counter() - started
+            self.assertTrue(all(s.queue.qsize() == 1 for s in subscriptions[:-1]))
+            self.assertLess(elapsed, 2)
+        finally:
+            await self.broadcaster.stop()
+
+    def test_05_slow_subscriber_keeps_latest_events(self):
+        """A subscriber that stops reading only keeps its most recent events."""
+        broadcaster = Broadcaster()
+
+        async def run():
+            subscription = broadcaster.subscribe(max_pending=3)
+            for i in range(10):
+                broadcaster.publish({'model': 'client', 'id': i, 'action': 'updated'})
+            return [subscription.queue.get_nowait()['id'] for _ in range(3)]
+
+        self.assertEqual(asyncio.run(run()), [7, 8, 9])
+
+    def test_06_events_are_sent_after_commit(self):
+        """NOTIFY runs once the write transaction has committed, not inside it."""
+        def notifies(queries):
+            return sum('pg_notify' in query['sql'] for query in queries)
+
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                client = Client.objects.create(**self.client_data)
+                dog = Dog.objects.create(client=client, name='Rex')
+                Appointment.objects.create(dog_id=dog.pk, start_time=timezone.now())  # Dog not loaded
+                self.assertEqual(notifies(queries), 0)
+                written = len(queries)
+        self.assertEqual(notifies(queries[written:]), 2)  # The client and the appointment
+        self.assertFalse([q for q in queries[written:] if 'pg_notify' not in q['sql'] and 'dog' in q['sql']])
+
+
+class ChangeEventStreamTests(TransactionTestCase):
+
+    def tearDown(self):
+        # Closing a stream flushes the audit buffer in a thread; let it finish before the tables are flushed
+        for thread in threading.enumerate():
+            if thread.name == 'audit-flush':
+                thread.join()
+
+    async def test_01_event_stream(self):
+        """The endpoint streams server-sent events as clients change."""
+        response = await self.async_client.get(reverse('change_events'), {'models': 'client'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertIn(b'retry:', await anext(stream))
+            client = await Client.objects.acreate(
+                first_name='Stream', last_name='Test', email='stream@example.com', phone_number='678-640-8681'
+            )
+            chunk = await asyncio.wait_for(anext(stream), timeout=5)
+            self.assertTrue(chunk.startswith(b'id: '))
+            data = json.loads(chunk.decode().split('data: ', 1)[1])
+            self.assertEqual((data['model'], data['id']), ('client', client.pk))
+        finally:
+            await stream.aclose()
+            await get_broadcaster().stop()
+
+    async def test_02_appointment_changes_are_streamed(self):
+        """Appointment saves reach subscribers of the dog's owner."""
+        client = await Client.objects.acreate(
+            first_name='Stream', last_name='Test', email='stream@example.com', phone_number='678-640-8681'
+        )
+        dog = await Dog.objects.acreate(client=client, name='Rex')
+        response = await self.async_client.get(reverse('change_events'), {'models': 'appointment', 'client': client.pk})
+        stream = aiter(response.streaming_content)
+        try:
+            await anext(stream)
+            appointment = await Appointment.objects.acreate(dog=dog, start_time=timezone.now())
+            appointment = await Appointment.objects.aget(pk=appointment.pk)  # Dog not cached
+            appointment.location = 'Park'
+            await appointment.asave()
+            events = []
+            for _ in range(2):
+                chunk = await asyncio.wait_for(anext(stream), timeout=5)
+                events.append(json.loads(chunk.decode().split('data: ', 1)[1]))
+            self.assertEqual(
+                [(e['model'], e['id'], e['action'], e['client_id']) for e in events],
+                [('appointment', appointment.pk, action, client.pk) for action in ('created', 'updated')]
+            )
+        finally:
+            await stream.aclose()
+            await get_broadcaster().stop()
+
+    async def test_03_invalid_token_is_rejected(self):
+        """A bad token gets a 401 instead of a stream."""
+        response = await self.async_client.get(reverse('change_events'), {'token': 'nope'})
+        self.assertEqual(response.status_code, 401)
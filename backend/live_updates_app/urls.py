@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import change_events
+
+urlpatterns = [
+    path('', change_events, name='change_events')
+]
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+
+from .broadcaster import get_broadcaster
+
+HEARTBEAT_SECONDS = 15
+
+
+async def _authenticate(request):
+    """
+    Resolve the user from a DRF token (header or ?token=, since browsers' EventSource
+    cannot set headers) or from the session, then apply the API's default permissions.
+    """
+    header = request.headers.get('Authorization', '')
+    key = request.GET.get('token') or (header[6:].strip() if header.startswith('Token ') else None)
+    if key:
+        try:
+            user, _ = await sync_to_async(TokenAuthentication().authenticate_credentials)(key)
+        except AuthenticationFailed as error:
+            return JsonResponse({'detail': str(error.detail)}, status=401)
+    elif hasattr(request, 'auser'):
+        user = await request.auser()
+    else:
+        user = AnonymousUser()
+    request.user = user
+    for permission_class in api_settings.DEFAULT_PERMISSION_CLASSES:
+        if not await sync_to_async(permission_class().has_permission)(request, None):
+            return JsonResponse({'detail': "Authentication credentials were not provided."}, status=401)
+    return None
+
+
+def _format(event):
+    return f"id: {event['event_id']}\nevent: {event['model']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def change_events(request):
+    """
+    Server-sent event stream of client, address and appointment changes, replacing dashboard polling.
+    Requires an ASGI server. Optional query parameters:
+        ?models=client,address,appointment   only these models
+        ?client=<id>             only changes belonging to this client
+    A `resync` event means events may have been missed and data should be refetched.
+    """
+    error = await _authenticate(request)
+    if error is not None:
+        return error
+
+    models = {m for m in request.GET.get('models', '').split(',') if m} or None
+    try:
+        client_id = int(request.GET['client']) if 'client' in request.GET else None
+    except ValueError:
+        return JsonResponse({'detail': "client must be an integer."}, status=400)
+
+    broadcaster = get_broadcaster()
+    try:
+        await asyncio.wait_for(broadcaster.start(), timeout=5)
+    except asyncio.TimeoutError:
+        pass  # Keep the stream open; events flow once the listener connects
+    subscription = broadcaster.subscribe(models=models, client_id=client_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n: connected\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"  # Stops proxies from closing idle connections
+                    continue
+                yield _format(event)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable nginx response buffering
+    return response
@@ -1,5 +1,6 @@
-from django.contrib import admin
-from .models import Client, Address
+from django.contrib import admin, messages
+from . import dedupe
+from .models import Client, Address, AuditLogEntry
 
 
 class AddressInline(admin.StackedInline):
@@ -32,8 +33,33 @@ class ClientAdmin(admin.ModelAdmin):
     )
     readonly_fields = ['date_added']
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            return
+        # Inline duplicate check: warn, but never block, when a new client looks like an existing one
+        candidates = dedupe.find_candidates(
+            obj.first_name, obj.last_name, obj.email, obj.phone_number, exclude_id=obj.pk
+        )
+        if candidates:
+            others = Client.objects.in_bulk([c.other_id for c in candidates])
+            self.message_user(
+                request,
+                "Possible duplicate of: " + "; ".join(
+                    f"{others[c.other_id]} (#{c.other_id}, {', '.join(c.reasons)})" for c in candidates
+                ),
+                level=messages.WARNING
+            )
+
 @admin.register(Address)
 class AddressAdmin(admin.ModelAdmin):
     list_display = ('client', 'address_type','city','state_province','postal_code')
     search_fields = ('street_address_1','client__last_name', 'client__email')
-    autocomplete_fields = ['client']
\ No newline at end of file
+    autocomplete_fields = ['client']
+
+@admin.register(AuditLogEntry)
+class AuditLogEntryAdmin(admin.ModelAdmin):
+    list_display = ('timestamp', 'action', 'model_name', 'object_pk', 'client_pk', 'user')
+    list_filter = ['action', 'model_name']
+    search_fields = ('client_pk', 'object_pk')
+    readonly_fields = ('client_pk', 'model_name', 'object_pk', 'action', 'changes', 'user', 'timestamp')
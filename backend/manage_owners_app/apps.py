@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ManageOwnersAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'manage_owners_app'
+
+    def ready(self):
+        from django.db.models.signals import post_save, pre_save
+        from . import audit, dedupe, geo
+        from .models import Address, Client
+
+        audit.connect()
+        post_save.connect(dedupe.update_match_keys, sender=Client, dispatch_uid='dedupe_match_keys')
+        pre_save.connect(geo.geocode_on_save, sender=Address, dispatch_uid='geocode_address')
@@ -0,0 +1,248 @@
+"""
+Write-behind audit trail for Client and Address.
+
+Saves and deletes are diffed against the values the instance was loaded with
+(see backend.mixins.TracksLoadedValues), so no extra SELECT is issued. The resulting entries
+are kept in an in-process buffer and written with one bulk INSERT when the
+buffer is full, when it is AUDIT_BUFFER['MAX_AGE'] seconds old (by a timer
+thread, so also in an idle process), when a request or background job
+finishes, or when the process exits. A hard kill (SIGKILL, power loss) loses
+at most the entries of the last MAX_AGE seconds.
+"""
+import asyncio
+import atexit
+import contextvars
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from .models import Address, AuditLogEntry, Client
+
+logger = logging.getLogger(__name__)
+
+# The request being handled in this thread/task, used to find out who made a change
+_current_request = contextvars.ContextVar('audit_request', default=None)
+
+
+class AuditBuffer:
+    """
+    Thread-safe buffer of unsaved AuditLogEntry objects.
+    """
+
+    def __init__(self, max_size=500, max_age=5.0):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._entries = []
+        self._oldest = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry):
+        with self._lock:
+            if not self._entries:
+                self._oldest = time.monotonic()
+                self._start_timer()
+            self._entries.append(entry)
+            due = len(self._entries) >= self.max_size or time.monotonic() - self._oldest >= self.max_age
+        if due:
+            self.flush()
+
+    def _start_timer(self):
+        # Writes entries that reach max_age while no other save, request or job comes to flush them
+        self._timer = threading.Timer(self.max_age, self._flush_from_timer)
+        self._timer.name = 'audit-timer'
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()  # The timer thread's own connection
+
+    def flush(self):
+        """
+        Write all buffered entries in one batched INSERT. Returns the number written.
+        """
+        with self._lock:
+            entries, self._entries = self._entries, []
+            self._oldest = None
+            if self._timer is not None and self._timer is not threading.current_thread():
+                self._timer.cancel()
+            self._timer = None
+        if not entries:
+            return 0
+        try:
+            AuditLogEntry.objects.bulk_create(entries, batch_size=self.max_size)
+        except Exception:
+            logger.exception("Could not write %d audit log entries; they will be retried.", len(entries))
+            with self._lock:
+                # Keep retrying on the next flush, but never grow without bound
+                if not self._entries:
+                    self._oldest = time.monotonic()
+                    self._start_timer()
+                self._entries[:0] = entries[:10 * self.max_size - len(self._entries)]
+            return 0
+        return len(entries)
+
+_config = getattr(settings, 'AUDIT_BUFFER', {})
+buffer = AuditBuffer(max_size=_config.get('MAX_SIZE', 500), max_age=_config.get('MAX_AGE', 5.0))
+
+
+def _current_user_id():
+    request = _current_request.get()
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def _owning_client_pk(instance):
+    return instance.pk if isinstance(instance, Client) else instance.client_id
+
+
+def _field_values(instance):
+    # Deferred fields that were never loaded are skipped rather than fetched one query each
+    return {
+        field.attname: instance.__dict__[field.attname]
+        for field in instance._meta.concrete_fields
+        if field.attname in instance.__dict__
+    }
+
+
+def diff(instance, created):
+    """
+    Return {field: [old, new]} for the fields of `instance` that changed since it was loaded.
+    """
+    current = _field_values(instance)
+    if created:
+        return {name: [None, value] for name, value in current.items() if name != 'id'}
+    loaded = instance._loaded_values
+    if loaded is None:
+        # Instance was built in memory rather than loaded (e.g. Client(pk=..).save()), old values unknown
+        return {name: [None, value] for name, value in current.items() if name != 'id'}
+    return {
+        name: [loaded[name], value]
+        for name, value in current.items()
+        if name in loaded and loaded[name] != value
+    }
+
+
+def _record(instance, action, changes):
+    entry = AuditLogEntry(
+        client_pk=_owning_client_pk(instance),
+        model_name=instance._meta.model_name,
+        object_pk=instance.pk,
+        action=action,
+        changes=changes,
+        user_id=_current_user_id(),
+        timestamp=timezone.now()
+    )
+    # Only keep the entry if the surrounding transaction commits
+    transaction.on_commit(lambda: buffer.add(entry))
+
+
+def record_save(sender, instance, created, raw=False, **kwargs):
+    if raw:  # Fixture loading
+        return
+    changes = diff(instance, created)
+    if changes:
+        _record(instance, AuditLogEntry.CREATE if created else AuditLogEntry.UPDATE, changes)
+
+
+def record_delete(sender, instance, **kwargs):
+    # Keep the last known values so the history still shows what was removed
+    _record(instance, AuditLogEntry.DELETE, {
+        name: [value, None] for name, value in _field_values(instance).items() if name != 'id'
+    })
+
+
+def _flush_in_thread():
+    try:
+        buffer.flush()
+    finally:
+        connections.close_all()  # This thread's own connections
+
+
+def flush_on_request_finished(sender, **kwargs):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # Sent from inside the event loop (e.g. when a streaming response is closed
+        # under ASGI), where the database cannot be used synchronously
+        if len(buffer):
+            threading.Thread(target=_flush_in_thread, name='audit-flush', daemon=True).start()
+        return
+    if buffer.flush():
+        # Django's own close_old_connections receiver has already run for this
+        # request, so release the connection the flush may have opened
+        close_old_connections()
+
+
+def flush_on_task_finished(sender, **kwargs):
+    # Workers have no request cycle; without this, entries written by a job would
+    # wait for the next job (or the worker's exit) and be lost if it is killed
+    buffer.flush()
+
+
+def _flush_at_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception("Could not flush audit log at shutdown.")
+
+
+def connect():
+    """
+    Wire the audit trail up; called from ManageOwnersAppConfig.ready().
+    """
+    from django.core.signals import request_finished
+    from django.db.models.signals import post_delete, post_save
+    from job_queue_app.registry import task_finished
+
+    for model in (Client, Address):
+        post_save.connect(record_save, sender=model, dispatch_uid=f'audit_save_{model.__name__}')
+        post_delete.connect(record_delete, sender=model, dispatch_uid=f'audit_delete_{model.__name__}')
+    request_finished.connect(flush_on_request_finished, dispatch_uid='audit_flush')
+    task_finished.connect(flush_on_task_finished, dispatch_uid='audit_flush_task')
+    atexit.register(_flush_at_exit)
+
+
+class AuditUserMiddleware:
+    """
+    Makes the current request available to the audit trail so entries record who made the change.
+    Supports both sync and async stacks so it never forces a thread switch under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
@@ -0,0 +1,312 @@
+"""
+Duplicate client detection and merging.
+
+Comparing every client with every other is O(n^2), so clients are first
+grouped by blocking keys (normalized phone number, email local part, and a
+phonetic code of the last name plus first initial) stored in ClientMatchKey.
+Only clients that share a key are scored against each other.
+"""
+import re
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from .models import Address, Client, ClientMatchKey
+
+_config = getattr(settings, 'DEDUPE', {})
+# Score (0-1) above which two clients are reported as likely duplicates
+THRESHOLD = _config.get('THRESHOLD', 0.75)
+# Keys shared by more clients than this (e.g. a very common surname) are too
+# unselective to be worth comparing within
+MAX_BLOCK_SIZE = _config.get('MAX_BLOCK_SIZE', 200)
+
+# Client fields the blocking keys are computed from
+_KEY_FIELDS = ('first_name', 'last_name', 'email', 'phone_number')
+
+Candidate = namedtuple('Candidate', ['client_id', 'other_id', 'score', 'reasons'])
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6'
+}
+
+
+def normalize_phone(phone_number):
+    """
+    Digits only, without the North American country code: '+1 (555) 123-4567' -> '5551234567'.
+    """
+    digits = re.sub(r'\D', '', phone_number or '')
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits
+
+
+def normalize_email_local(email):
+    """
+    Lower-cased local part without dots or +tags: 'Jane.Doe+dogs@x.com' -> 'janedoe'.
+    """
+    local = (email or '').split('@', 1)[0].lower()
+    return local.split('+', 1)[0].replace('.', '')
+
+
+def soundex(name):
+    """
+    American Soundex code, so 'Smith' and 'Smyth' share a key.
+    """
+    letters = [c for c in (name or '').lower() if 'a' <= c <= 'z']
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in 'hw':  # h and w do not separate letters with the same code
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def match_keys(first_name, last_name, email, phone_number):
+    """
+    Return {kind: value} blocking keys for a client's details.
+    """
+    keys = {}
+    phone = normalize_phone(phone_number)
+    if len(phone) >= 7:
+        keys[ClientMatchKey.PHONE] = phone
+    local = normalize_email_local(email)
+    if local:
+        keys[ClientMatchKey.EMAIL] = local
+    phonetic = soundex(last_name)
+    if phonetic:
+        keys[ClientMatchKey.NAME] = phonetic + (first_name or ' ').strip()[:1].lower()
+    return keys
+
+
+def _similarity(a, b):
+    a, b = (a or '').strip().lower(), (b or '').strip().lower()
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    if a.startswith(b) or b.startswith(a):  # 'Rob' / 'Robert'
+        return 0.9
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _details(client):
+    if isinstance(client, dict):
+        return client
+    return {name: getattr(client, name) for name in ('first_name', 'last_name', 'email', 'phone_number')}
+
+
+def score(a, b):
+    """
+    Similarity of two clients (dicts or Client objects) from 0 to 1, with the reasons behind it.
+    """
+    a, b = _details(a), _details(b)
+    reasons = []
+
+    phone = 1.0 if normalize_phone(a['phone_number']) == normalize_phone(b['phone_number']) else 0.0
+    if phone:
+        reasons.append('same phone number')
+
+    if a['email'].lower() == b['email'].lower():
+        email = 1.0
+    else:
+        email = _similarity(normalize_email_local(a['email']), normalize_email_local(b['email']))
+    if email >= 0.9:
+        reasons.append('similar email')
+
+    last = _similarity(a['last_name'], b['last_name'])
+    if last < 1.0 and soundex(a['last_name']) == soundex(b['last_name']):
+        last = max(last, 0.85)
+    first = _similarity(a['first_name'], b['first_name'])
+    if last >= 0.85 and first >= 0.85:
+        reasons.append('similar name')
+
+    total = 0.3 * phone + 0.3 * email + 0.2 * last + 0.2 * first
+    return round(total, 3), reasons
+
+
+def refresh_match_keys(client):
+    """
+    Replace the stored blocking keys of `client` (called after every save).
+    """
+    keys = match_keys(client.first_name, client.last_name, client.email, client.phone_number)
+    ClientMatchKey.objects.filter(client=client).delete()
+    ClientMatchKey.objects.bulk_create([
+        ClientMatchKey(client=client, kind=kind, value=value) for kind, value in keys.items()
+    ])
+
+
+def update_match_keys(sender, instance, raw=False, **kwargs):
+    # Most saves (notes, status, ...) leave the keys as they are; skip the two writes then
+    if not raw and instance.changed_since_loaded(*_KEY_FIELDS):
+        refresh_match_keys(instance)
+
+
+def rebuild_match_keys(batch_size=2000):
+    """
+    Recompute the keys of every client, e.g. after the key functions change.
+    """
+    ClientMatchKey.objects.all().delete()
+    batch = []
+    rows = Client.objects.values_list('id', 'first_name', 'last_name', 'email', 'phone_number')
+    for client_id, *details in rows.iterator(chunk_size=batch_size):
+        for kind, value in match_keys(*details).items():
+            batch.append(ClientMatchKey(client_id=client_id, kind=kind, value=value))
+        if len(batch) >= batch_size:
+            ClientMatchKey.objects.bulk_create(batch)
+            batch = []
+    ClientMatchKey.objects.bulk_create(batch)
+
+
+def find_candidates(first_name, last_name, email, phone_number, exclude_id=None, threshold=THRESHOLD):
+    """
+    Inline check: existing clients that look like the given details, best match first.
+    Uses the key index, so it costs one lookup no matter how many clients exist.
+    """
+    keys = match_keys(first_name, last_name, email, phone_number)
+    if not keys:
+        return []
+    query = None
+    for kind, value in keys.items():
+        condition = ClientMatchKey.objects.filter(kind=kind, value=value)
+        query = condition if query is None else query | condition
+    ids = set(query.values_list('client_id', flat=True)[:MAX_BLOCK_SIZE])
+    ids.discard(exclude_id)
+    details = {'first_name': first_name, 'last_name': last_name, 'email': email, 'phone_number': phone_number}
+    candidates = []
+    for other in Client.objects.filter(pk__in=ids):
+        total, reasons = score(details, other)
+        if total >= threshold:
+            candidates.append(Candidate(exclude_id, other.pk, total, reasons))
+    return sorted(candidates, key=lambda c: -c.score)
+
+
+def _candidate_pairs():
+    """
+    Yield (id, id) pairs of clients sharing at least one reasonably selective key.
+    The self-join runs in the database over the (kind, value) index.
+    """
+    table = ClientMatchKey._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH blocks AS (
+                SELECT kind, value FROM {table}
+                GROUP BY kind, value
+                HAVING COUNT(*) BETWEEN 2 AND %s
+            )
+            SELECT DISTINCT a.client_id, b.client_id
+            FROM {table} a
+            JOIN blocks USING (kind, value)
+            JOIN {table} b ON b.kind = a.kind AND b.value = a.value AND b.client_id > a.client_id
+            ORDER BY a.client_id, b.client_id
+        """, [MAX_BLOCK_SIZE])
+        while rows := cursor.fetchmany(5000):
+            yield from rows
+
+
+def find_duplicates(threshold=THRESHOLD, chunk_size=5000):
+    """
+    Batch check over the whole table: yield Candidates for every likely duplicate pair.
+    """
+    fields = ('id', 'first_name', 'last_name', 'email', 'phone_number')
+    cache = {}
+    pairs = []
+
+    def flush():
+        missing = {i for pair in pairs for i in pair} - cache.keys()
+        for row in Client.objects.filter(pk__in=missing).values(*fields):
+            cache[row['id']] = row
+        for a, b in pairs:
+            if a in cache and b in cache:
+                total, reasons = score(cache[a], cache[b])
+                if total >= threshold:
+                    yield Candidate(a, b, total, reasons)
+        pairs.clear()
+        # Pairs arrive sorted by the first id, so older rows are rarely needed again
+        if len(cache) > 4 * chunk_size:
+            cache.clear()
+
+    for pair in _candidate_pairs():
+        pairs.append(pair)
+        if len(pairs) >= chunk_size:
+            yield from flush()
+    yield from flush()
+
+
+def _move(obj, field_name, keep):
+    """
+    Point `obj` at `keep`; False if a uniqueness rule does not allow it.
+    """
+    setattr(obj, field_name, keep)
+    try:
+        with transaction.atomic():
+            obj.save()
+        return True
+    except IntegrityError:
+        return False
+
+
+def _move_address(address, keep):
+    """
+    Move an address, filed under another type if `keep` already has one of its type
+    (the duplicate's HOME address becomes OTHER next to the kept HOME address).
+    """
+    if _move(address, 'client', keep):
+        return True
+    taken = set(keep.addresses.values_list('address_type', flat=True))
+    for address_type in ['OTHER'] + [choice for choice, _ in Address.ADDRESS_TYPE_CHOICES]:
+        if address_type not in taken:
+            address.address_type = address_type
+            return _move(address, 'client', keep)
+    return False
+
+
+def merge_clients(keep, duplicate):
+    """
+    Merge `duplicate` into `keep` in one transaction and delete `duplicate`.
+
+    Every row pointing at the duplicate (addresses, dogs, and any model added
+    later with a foreign key to Client) is moved to `keep`. An address whose
+    type `keep` already has is moved under a free type. Rows that still cannot
+    move are deleted with the duplicate; they are described in the kept
+    client's notes and returned.
+    """
+    if keep.pk == duplicate.pk:
+        raise ValueError("Cannot merge a client into itself.")
+    dropped = []
+    with transaction.atomic():
+        # Lock both rows (in id order, so opposite merges cannot deadlock) and work on
+        # the locked versions, so edits committed since the caller loaded them are kept
+        locked = Client.objects.select_for_update().order_by('pk').in_bulk([keep.pk, duplicate.pk])
+        if len(locked) != 2:
+            raise Client.DoesNotExist("A client being merged no longer exists.")
+        keep, duplicate = locked[keep.pk], locked[duplicate.pk]
+
+        for relation in Client._meta.related_objects:
+            if not relation.one_to_many or relation.related_model is ClientMatchKey:
+                continue
+            field_name = relation.field.name
+            for obj in relation.related_model.objects.filter(**{field_name: duplicate}):
+                moved = _move_address(obj, keep) if isinstance(obj, Address) else _move(obj, field_name, keep)
+                if not moved:
+                    dropped.append(obj)
+
+        # Keep information the surviving record lacks
+        if duplicate.notes and duplicate.notes not in keep.notes:
+            keep.notes = f"{keep.notes}\n{duplicate.notes}".strip()
+        for obj in dropped:
+            keep.notes = f"{keep.notes}\nNot kept when merging client #{duplicate.pk}: {obj}".strip()
+        keep.is_active = keep.is_active or duplicate.is_active
+        keep.date_added = min(keep.date_added, duplicate.date_added)
+        keep.save()
+        duplicate.delete()
+    return dropped
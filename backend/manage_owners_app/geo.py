@@ -0,0 +1,132 @@
+"""
+Offline geocoding of addresses and nearby-client queries.
+
+Addresses are placed at the centroid of their postal code, looked up in the
+bundled data/us_postal_centroids.csv.gz (no network calls). Radius and
+nearest-N searches first narrow rows with a bounding box over the
+(latitude, longitude) index, then rank the survivors by great-circle distance.
+"""
+import csv
+import gzip
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+from .models import Address
+
+CENTROIDS_FILE = Path(__file__).resolve().parent / 'data' / 'us_postal_centroids.csv.gz'
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LATITUDE = 111.045
+
+
+@lru_cache(maxsize=1)
+def _centroids():
+    with gzip.open(CENTROIDS_FILE, 'rt', encoding='utf-8', newline='') as f:
+        return {row['postal_code']: (float(row['latitude']), float(row['longitude'])) for row in csv.DictReader(f)}
+
+
+def normalize_postal_code(postal_code):
+    """
+    The 5-digit ZIP code of '30303', '30303-1234' or ' 30303 ', else ''.
+    """
+    match = re.match(r'^\s*(\d{5})(?:[\s-]?\d{4})?\s*$', postal_code or '')
+    return match.group(1) if match else ''
+
+
+def locate(postal_code):
+    """
+    (latitude, longitude) of a postal code's centroid, or None if it is unknown.
+    """
+    return _centroids().get(normalize_postal_code(postal_code))
+
+
+def geocode(address):
+    """
+    Set the address's coordinates from its postal code (None when unknown).
+    """
+    address.latitude, address.longitude = locate(address.postal_code) or (None, None)
+
+
+def geocode_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Only look up again if the postal code changed since the address was loaded
+    if instance.latitude is None or instance.changed_since_loaded('postal_code'):
+        geocode(instance)
+
+
+def backfill(all_addresses=False, batch_size=2000):
+    """
+    Geocode existing addresses in batches (only those without coordinates unless `all_addresses`).
+    Returns the number of addresses updated.
+    """
+    addresses = Address.objects.order_by('pk').only('pk', 'postal_code', 'latitude', 'longitude')
+    if not all_addresses:
+        addresses = addresses.filter(latitude__isnull=True)
+    updated = 0
+    batch = []
+    for address in addresses.iterator(chunk_size=batch_size):
+        before = (address.latitude, address.longitude)
+        geocode(address)
+        if (address.latitude, address.longitude) != before:
+            batch.append(address)
+        if len(batch) >= batch_size:
+            updated += Address.objects.bulk_update(batch, ['latitude', 'longitude'])
+            batch = []
+    updated += Address.objects.bulk_update(batch, ['latitude', 'longitude'])
+    return updated
+
+
+def _distance_km(latitude, longitude):
+    """
+    Haversine distance in km from a point to each row's coordinates, as a database expression.
+    """
+    lat = math.radians(latitude)
+    lng = math.radians(longitude)
+    half_dlat = (Radians(F('latitude')) - Value(lat)) / 2
+    half_dlng = (Radians(F('longitude')) - Value(lng)) / 2
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(lat)) * Cos(Radians(F('latitude'))) * Power(Sin(half_dlng), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(Least(a, Value(1.0))), output_field=FloatField())
+
+
+def within(latitude, longitude, radius_km, queryset=None):
+    """
+    Addresses within `radius_km` of a point, nearest first, annotated with `distance_km`.
+    """
+    if not radius_km >= 0:  # Also rejects NaN
+        raise ValueError(f"radius_km must be a non-negative number, not {radius_km!r}.")
+    if queryset is None:
+        queryset = Address.objects.all()
+    dlat = radius_km / KM_PER_DEGREE_LATITUDE
+    dlng = radius_km / (KM_PER_DEGREE_LATITUDE * max(math.cos(math.radians(latitude)), 0.01))
+    return (
+        queryset
+        .filter(
+            latitude__range=(latitude - dlat, latitude + dlat),
+            longitude__range=(longitude - dlng, longitude + dlng)
+        )
+        .annotate(distance_km=_distance_km(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km', 'pk')
+    )
+
+
+def nearest(latitude, longitude, limit=20, queryset=None, start_radius_km=5, max_radius_km=500):
+    """
+    The `limit` addresses nearest to a point (within `max_radius_km`).
+
+    Searches a small box first and widens it only while too few addresses are
+    found, so dense areas never scan beyond their neighbourhood.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be at least 1, not {limit!r}.")
+    radius = start_radius_km
+    while True:
+        results = list(within(latitude, longitude, radius, queryset)[:limit])
+        if len(results) >= limit or radius >= max_radius_km:
+            return results
+        radius = min(radius * 3, max_radius_km)
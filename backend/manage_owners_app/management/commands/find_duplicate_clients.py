@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from manage_owners_app import dedupe
+from manage_owners_app.models import Client
+
+
+class Command(BaseCommand):
+    help = "List likely duplicate clients across the whole table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=float, default=dedupe.THRESHOLD,
+            help="Minimum similarity score (0-1) to report."
+        )
+        parser.add_argument(
+            '--rebuild-keys', action='store_true',
+            help="Recompute every client's blocking keys before searching."
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild_keys']:
+            dedupe.rebuild_match_keys()
+            self.stdout.write("Blocking keys rebuilt.")
+
+        found = 0
+        for candidate in dedupe.find_duplicates(threshold=options['threshold']):
+            found += 1
+            self.stdout.write(
+                f"{candidate.score:.2f}  #{candidate.client_id} <-> #{candidate.other_id}  ({', '.join(candidate.reasons)})"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{found} likely duplicate pair(s) among {Client.objects.count()} clients."
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from manage_owners_app import geo
+from manage_owners_app.models import Address
+
+
+class Command(BaseCommand):
+    help = "Fill in address coordinates from the bundled postal code centroid table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Geocode every address again, not just those without coordinates."
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        updated = geo.backfill(all_addresses=options['all'], batch_size=options['batch_size'])
+        missing = Address.objects.filter(latitude__isnull=True).count()
+        self.stdout.write(self.style.SUCCESS(f"Geocoded {updated} address(es)."))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"{missing} address(es) have a postal code that is not in the table."))
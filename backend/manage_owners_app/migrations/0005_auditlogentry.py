@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:17
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_owners_app', '0004_alter_address_city_alter_address_postal_code_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_pk', models.BigIntegerField(help_text='Client the change belongs to (the owning client for addresses).')),
+                ('model_name', models.CharField(max_length=50)),
+                ('object_pk', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('CREATE', 'Create'), ('UPDATE', 'Update'), ('DELETE', 'Delete')], max_length=10)),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Changed fields as {field: [old, new]}.')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Audit Log Entry',
+                'verbose_name_plural': 'Audit Log Entries',
+                'ordering': ['-timestamp', '-id'],
+                'indexes': [models.Index(fields=['client_pk', '-timestamp'], name='audit_client_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:28
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of the blocking key helpers in manage_owners_app/dedupe.py as of
+# this migration, so later changes to that module cannot change what it does
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6'
+}
+
+
+def _soundex(name):
+    letters = [c for c in (name or '').lower() if 'a' <= c <= 'z']
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+
+def match_keys(first_name, last_name, email, phone_number):
+    keys = {}
+    phone = re.sub(r'\D', '', phone_number or '')
+    if len(phone) == 11 and phone.startswith('1'):
+        phone = phone[1:]
+    if len(phone) >= 7:
+        keys['PHONE'] = phone
+    local = (email or '').split('@', 1)[0].lower().split('+', 1)[0].replace('.', '')
+    if local:
+        keys['EMAIL'] = local
+    phonetic = _soundex(last_name)
+    if phonetic:
+        keys['NAME'] = phonetic + (first_name or ' ').strip()[:1].lower()
+    return keys
+
+
+def backfill_match_keys(apps, schema_editor):
+    Client = apps.get_model('manage_owners_app', 'Client')
+    ClientMatchKey = apps.get_model('manage_owners_app', 'ClientMatchKey')
+    batch = []
+    rows = Client.objects.values_list('id', 'first_name', 'last_name', 'email', 'phone_number')
+    for client_id, *details in rows.iterator(chunk_size=2000):
+        for kind, value in match_keys(*details).items():
+            batch.append(ClientMatchKey(client_id=client_id, kind=kind, value=value))
+        if len(batch) >= 2000:
+            ClientMatchKey.objects.bulk_create(batch)
+            batch = []
+    ClientMatchKey.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_owners_app', '0005_auditlogentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientMatchKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PHONE', 'Normalized phone number'), ('EMAIL', 'Email local part'), ('NAME', 'Phonetic last name + first initial')], max_length=10)),
+                ('value', models.CharField(max_length=254)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_keys', to='manage_owners_app.client')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'value'], name='match_key_lookup_idx')],
+                'unique_together': {('client', 'kind')},
+            },
+        ),
+        migrations.RunPython(backfill_match_keys, migrations.RunPython.noop),
+    ]
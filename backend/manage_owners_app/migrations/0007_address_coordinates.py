@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manage_owners_app', '0006_clientmatchkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, help_text='Approximate latitude (postal code centroid).', null=True),
+        ),
+        migrations.AddField(
+            model_name='address',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, help_text='Approximate longitude (postal code centroid).', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['latitude', 'longitude'], name='address_lat_lng_idx'),
+        ),
+    ]
@@ -1,9 +1,22 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 from django.core import validators as v
+
+from backend.mixins import TracksLoadedValues
 from .validators import validate_name, validate_phone_number
 
-class Address(models.Model):
+
+class AuditedModel(TracksLoadedValues):
+    """
+    Models whose saves audit.py diffs against the values they were loaded with.
+    """
+    class Meta:
+        abstract = True
+
+
+class Address(AuditedModel):
     """
     TODO: Add country field
         pip install django-countries
@@ -56,11 +69,27 @@ class Address(models.Model):
         max_length=20,
         blank=False,
         help_text="Postal or ZIP code. Required.")
+
+    # Approximate location from the postal code centroid (see geo.py); filled in on save
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Approximate latitude (postal code centroid).")
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Approximate longitude (postal code centroid).")
     
     class Meta:
         verbose_name_plural = "Addresses"
         #  Ensure one client doesn't have two 'HOME' addresses, etc.
         unique_together = [['client', 'address_type']]
+        indexes = [
+            # Bounding-box prefilter for radius / nearest queries
+            models.Index(fields=['latitude', 'longitude'], name='address_lat_lng_idx'),
+        ]
 
     def __str__(self):
         address_parts = filter(None, [
@@ -73,7 +102,7 @@ class Address(models.Model):
         return F"{self.client} - {self.get_address_type_display()}: {', '.join(address_parts)}"
 
 # Client Model
-class Client(models.Model):
+class Client(AuditedModel):
     """
     Represents a client (dog owner)
     """
@@ -131,5 +160,81 @@ class Client(models.Model):
 
     def __str__(self):
         return f"{self.last_name}, {self.first_name}"
-    
 
+
+class AuditLogEntry(models.Model):
+    """
+    One field-level change to a Client or Address. Written in batches by audit.py.
+    """
+    CREATE = 'CREATE'
+    UPDATE = 'UPDATE'
+    DELETE = 'DELETE'
+    ACTION_CHOICES = [
+        (CREATE, 'Create'),
+        (UPDATE, 'Update'),
+        (DELETE, 'Delete')
+    ]
+
+    # Plain ids rather than foreign keys so history survives the client being deleted
+    client_pk = models.BigIntegerField(
+        help_text="Client the change belongs to (the owning client for addresses)."
+    )
+    model_name = models.CharField(max_length=50)
+    object_pk = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changes = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        default=dict,
+        help_text="Changed fields as {field: [old, new]}."
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-timestamp', '-id']
+        verbose_name = "Audit Log Entry"
+        verbose_name_plural = "Audit Log Entries"
+        indexes = [
+            models.Index(fields=['client_pk', '-timestamp'], name='audit_client_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.model_name} #{self.object_pk} at {self.timestamp:%Y-%m-%d %H:%M}"
+
+
+class ClientMatchKey(models.Model):
+    """
+    Blocking key used by dedupe.py to find possible duplicate clients without
+    comparing every pair. Maintained automatically when a client is saved.
+    """
+    PHONE = 'PHONE'
+    EMAIL = 'EMAIL'
+    NAME = 'NAME'
+    KIND_CHOICES = [
+        (PHONE, 'Normalized phone number'),
+        (EMAIL, 'Email local part'),
+        (NAME, 'Phonetic last name + first initial')
+    ]
+
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.CASCADE,
+        related_name='match_keys'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    value = models.CharField(max_length=254)
+
+    class Meta:
+        unique_together = [['client', 'kind']]
+        indexes = [
+            models.Index(fields=['kind', 'value'], name='match_key_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.client} - {self.kind}: {self.value}"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Client, Address
+from .models import Client, Address, AuditLogEntry
 
 class AddressSerializer(serializers.ModelSerializer):
     """
@@ -18,7 +18,9 @@ class AddressSerializer(serializers.ModelSerializer):
             'street_address_2',
             'city',
             'state_province',
-            'postal_code'
+            'postal_code',
+            'latitude',
+            'longitude'
         ]
         # Make client field read-only - addresses are always managed via the client endpoint
         read_only_fields = ['client']
@@ -47,4 +49,49 @@ class ClientSerializer(serializers.ModelSerializer):
         # # a client ID when creating/updating addresses via this serializer
         # extra_kwargs = {
         #     'client': {'write_only': True}
-        # }
\ No newline at end of file
+        # }
+
+class ClientSummarySerializer(serializers.ModelSerializer):
+    """
+    Contact details only, for listings where nested addresses are not needed.
+    """
+    class Meta:
+        model = Client
+        fields = [
+            'id',
+            'first_name',
+            'last_name',
+            'email',
+            'phone_number',
+            'is_active'
+        ]
+
+
+class NearbyAddressSerializer(AddressSerializer):
+    """
+    An address found by a radius / nearest search, with its owner and distance.
+    """
+    client = ClientSummarySerializer(read_only = True)
+    distance_km = serializers.FloatField(read_only = True)
+
+    class Meta(AddressSerializer.Meta):
+        fields = AddressSerializer.Meta.fields + ['distance_km']
+
+
+class AuditLogEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for the change history of a client and its addresses.
+    """
+    user = serializers.StringRelatedField(read_only = True)
+
+    class Meta:
+        model = AuditLogEntry
+        fields = [
+            'id',
+            'model_name',
+            'object_pk',
+            'action',
+            'changes',
+            'user',
+            'timestamp'
+        ]
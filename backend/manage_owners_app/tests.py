@@ -1,8 +1,22 @@
+import asyncio
+import io
+import random
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
-from .models import Client, Address
+from job_queue_app.registry import task_finished
+from . import audit, dedupe, geo
+from .models import Client, Address, AuditLogEntry, ClientMatchKey
 # from .validators import validate_name,validate_phone_number
 
 # Create your tests here.
@@ -271,4 +285,387 @@ class AddressModelTests(TestCase):
         other_client_addr['address_type'] = "HOME"
         Address.objects.create(**other_client_addr)
         self.assertEqual(other_client.addresses.count(), 1) # Other client has 1 address
-        self.assertEqual(self.client_data.addresses.count(), 2) # Original client still has 2
\ No newline at end of file
+        self.assertEqual(self.client_data.addresses.count(), 2) # Original client still has 2
+
+
+class AuditTrailTests(TestCase):
+
+    def setUp(self):
+        self.client_data = {
+            'first_name': 'Audit',
+            'last_name' : 'Trail',
+            'email' : 'audit.trail@example.com',
+            'phone_number' : '678-640-8681'
+        }
+        audit.buffer.flush()
+
+    def save_and_flush(self, func):
+        """Run func, commit-callbacks included, then write the buffered entries."""
+        with self.captureOnCommitCallbacks(execute=True):
+            result = func()
+        audit.buffer.flush()
+        return result
+
+    def test_01_create_update_delete_are_recorded(self):
+        """Creates, field-level updates and deletes end up in the history."""
+        client = self.save_and_flush(lambda: Client.objects.create(**self.client_data))
+        entry = AuditLogEntry.objects.get(client_pk=client.pk)
+        self.assertEqual(entry.action, AuditLogEntry.CREATE)
+        self.assertEqual(entry.changes['email'], [None, 'audit.trail@example.com'])
+
+        client = Client.objects.get(pk=client.pk)
+        client.phone_number = '555-123-4567'
+        self.save_and_flush(client.save)
+        entry = AuditLogEntry.objects.filter(client_pk=client.pk).first()
+        self.assertEqual(entry.action, AuditLogEntry.UPDATE)
+        self.assertEqual(entry.changes, {'phone_number': ['678-640-8681', '555-123-4567']})
+
+        # Saving again without changes records nothing
+        self.save_and_flush(client.save)
+        self.assertEqual(AuditLogEntry.objects.filter(client_pk=client.pk).count(), 2)
+
+        client_pk = client.pk
+        self.save_and_flush(client.delete)
+        entry = AuditLogEntry.objects.filter(client_pk=client_pk).first()
+        self.assertEqual(entry.action, AuditLogEntry.DELETE)
+        self.assertEqual(entry.changes['last_name'], ['Trail', None])
+
+    def test_02_address_changes_belong_to_client(self):
+        """Address changes are filed under the owning client."""
+        client = self.save_and_flush(lambda: Client.objects.create(**self.client_data))
+        address = self.save_and_flush(lambda: Address.objects.create(
+            client=client, street_address_1='1 Home St', city='Hometown', postal_code='11122'
+        ))
+        address = Address.objects.get(pk=address.pk)
+        address.city = 'Newtown'
+        self.save_and_flush(address.save)
+        entry = AuditLogEntry.objects.filter(client_pk=client.pk, model_name='address').first()
+        self.assertEqual(entry.object_pk, address.pk)
+        self.assertEqual(entry.changes, {'city': ['Hometown', 'Newtown']})
+
+    def test_03_entries_are_buffered_until_flush(self):
+        """Entries are written in a batch, not on every save."""
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                Client.objects.create(**dict(self.client_data, email=f'buffered{i}@example.com'))
+        self.assertEqual(AuditLogEntry.objects.count(), 0)
+        self.assertEqual(len(audit.buffer), 5)
+        with self.assertNumQueries(1):
+            self.assertEqual(audit.buffer.flush(), 5)
+        self.assertEqual(AuditLogEntry.objects.count(), 5)
+
+    def test_04_rolled_back_changes_are_not_recorded(self):
+        """Changes from a transaction that never commits are dropped."""
+        Client.objects.create(**self.client_data)  # on_commit callbacks are not run
+        self.assertEqual(len(audit.buffer), 0)
+
+    def test_05_history_endpoint(self):
+        """The history endpoint returns the client's changes, including the user who made them."""
+        user = get_user_model().objects.create_user('trainer', password='pw')
+        client = self.save_and_flush(lambda: Client.objects.create(**self.client_data))
+        client = Client.objects.get(pk=client.pk)
+        client.notes = 'Prefers mornings.'
+        request = type('Request', (), {'user': user})()
+        token = audit._current_request.set(request)
+        try:
+            self.save_and_flush(client.save)
+        finally:
+            audit._current_request.reset(token)
+
+        url = reverse('client_history', args=[client.pk])
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        history = response.json()
+        self.assertEqual([e['action'] for e in history], ['UPDATE', 'CREATE'])
+        self.assertEqual(history[0]['user'], 'trainer')
+        self.assertEqual(history[0]['changes'], {'notes': ['', 'Prefers mornings.']})
+
+        # The limit is clamped to 1..1000; a non-integer one is a bad request
+        self.assertEqual(len(self.client.get(url, {'limit': -1}).json()), 1)
+        self.assertEqual(self.client.get(url, {'limit': 'all'}).status_code, 400)
+
+    def test_06_overhead_is_small_fraction_of_save(self):
+        """Capturing a change and writing it behind costs well under half of the save itself."""
+        client = Client.objects.create(**self.client_data)
+        client = Client.objects.get(pk=client.pk)
+        rounds = 200
+
+        started = time.perf_counter()
+        for i in range(rounds):
+            client.notes = f'note {i}'
+            Client.save_base(client, raw=True)  # raw=True skips the audit receiver
+        save_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        # Including the on_commit callbacks adding each entry to the buffer, and writing them out
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(rounds):
+                client.notes = f'changed {i}'
+                audit.record_save(Client, client, created=False)
+        self.assertEqual(audit.buffer.flush(), rounds)
+        audit_time = time.perf_counter() - started
+
+        # About a fifth when measured; the bound leaves room for a loaded test machine
+        self.assertLess(audit_time, save_time * 0.5,
+                        f"audit {audit_time / rounds * 1e6:.0f}us vs save {save_time / rounds * 1e6:.0f}us per save")
+
+    def test_07_flushed_after_each_job(self):
+        """Background jobs flush the buffer when they finish, since workers have no request cycle."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.create(**self.client_data)
+        self.assertEqual(len(audit.buffer), 1)
+        task_finished.send(sender=None, task_name='tests.noop')  # As sent by run_task
+        self.assertEqual(len(audit.buffer), 0)
+        self.assertEqual(AuditLogEntry.objects.count(), 1)
+
+    def test_08_request_finished_inside_event_loop(self):
+        """Inside an event loop the flush is handed to a thread instead of failing."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.create(**self.client_data)
+
+        async def finish_request():
+            audit.flush_on_request_finished(sender=None)
+
+        with mock.patch.object(audit, '_flush_in_thread') as flush:
+            asyncio.run(finish_request())
+            for thread in threading.enumerate():
+                if thread.name == 'audit-flush':
+                    thread.join()
+        flush.assert_called_once_with()
+        self.assertEqual(audit.buffer.flush(), 1)
+
+    def test_09_idle_buffer_is_flushed_by_timer(self):
+        """Entries are written MAX_AGE after the first one even if nothing else happens."""
+        buffer = audit.AuditBuffer(max_age=0.05)
+        entry = AuditLogEntry(client_pk=1, model_name='client', object_pk=1, action=AuditLogEntry.CREATE, changes={})
+        with mock.patch.object(AuditLogEntry.objects, 'bulk_create') as bulk_create:
+            buffer.add(entry)
+            buffer._timer.join(timeout=5)
+        bulk_create.assert_called_once_with([entry], batch_size=buffer.max_size)
+        self.assertEqual(len(buffer), 0)
+
+
+class DedupeTests(TestCase):
+
+    def make_client(self, first, last, email, phone, **extra):
+        return Client.objects.create(first_name=first, last_name=last, email=email, phone_number=phone, **extra)
+
+    def test_01_normalization(self):
+        """Blocking keys ignore formatting differences."""
+        self.assertEqual(dedupe.normalize_phone('+1 (555) 123-4567'), '5551234567')
+        self.assertEqual(dedupe.normalize_phone('555.123.4567'), '5551234567')
+        self.assertEqual(dedupe.normalize_email_local('Jane.Doe+dogs@Example.com'), 'janedoe')
+        self.assertEqual(dedupe.soundex('Smith'), dedupe.soundex('Smyth'))
+        self.assertEqual(dedupe.soundex('Robert'), 'R163')
+        self.assertEqual(dedupe.soundex('Ashcraft'), 'A261')
+
+    def test_02_match_keys_follow_saves(self):
+        """Keys are stored on create and replaced when the client changes."""
+        client = self.make_client('Jane', 'Doe', 'jane.doe@example.com', '555-123-4567')
+        keys = dict(client.match_keys.values_list('kind', 'value'))
+        self.assertEqual(keys, {'PHONE': '5551234567', 'EMAIL': 'janedoe', 'NAME': 'D000j'})
+        client.phone_number = '555-987-6543'
+        client.save()
+        self.assertEqual(client.match_keys.get(kind=ClientMatchKey.PHONE).value, '5559876543')
+
+        # Saves that leave the name, email and phone alone do not touch the keys
+        for client in (client, Client.objects.get(pk=client.pk), Client.objects.only('pk', 'notes').get(pk=client.pk)):
+            client.notes = 'Prefers mornings.'
+            with CaptureQueriesContext(connection) as queries:
+                client.save()
+            self.assertFalse([q['sql'] for q in queries if 'clientmatchkey' in q['sql']])
+
+    def test_03_inline_check(self):
+        """A new client resembling an existing one is flagged; unrelated ones are not."""
+        jane = self.make_client('Jane', 'Doe', 'jane.doe@example.com', '555-123-4567')
+        self.make_client('Bob', 'Stone', 'bob@example.com', '555-222-3333')
+
+        candidates = dedupe.find_candidates('Jane', 'Doe', 'janedoe@gmail.com', '(555) 123 4567')
+        self.assertEqual([c.other_id for c in candidates], [jane.pk])
+        self.assertIn('same phone number', candidates[0].reasons)
+
+        self.assertEqual(dedupe.find_candidates('Janet', 'Smyth', 'jsmyth@example.com', '555-444-5555'), [])
+        # A client is never reported as a duplicate of itself
+        self.assertEqual(dedupe.find_candidates('Jane', 'Doe', jane.email, jane.phone_number, exclude_id=jane.pk), [])
+
+    def test_04_batch_scan_uses_blocking(self):
+        """The batch scan finds duplicate pairs without comparing every pair of clients."""
+        for i in range(300):
+            self.make_client(f'First{i}', f'Last{i}', f'person{i}@example.com', f'555-{i:03d}-{i:04d}')
+        a = self.make_client('Robert', 'Smith', 'rob.smith@example.com', '404-555-0101')
+        b = self.make_client('Rob', 'Smyth', 'robsmith@gmail.com', '+1 404 555 0101')
+        c = self.make_client('Alice', 'Walker', 'alice@example.com', '404-555-0202')
+        d = self.make_client('Alice', 'Walker', 'alice.walker@example.com', '404-555-0202')
+
+        with self.assertNumQueries(2):  # The candidate self-join, then one fetch of the clients involved
+            found = list(dedupe.find_duplicates())
+        self.assertEqual({(f.client_id, f.other_id) for f in found}, {(a.pk, b.pk), (c.pk, d.pk)})
+
+    def test_05_merge(self):
+        """Merging moves addresses, keeps information and deletes the duplicate in one go."""
+        keep = self.make_client('Jane', 'Doe', 'jane.doe@example.com', '555-123-4567', notes='Keeps treats.')
+        dupe = self.make_client('Jane', 'Doe', 'janedoe@gmail.com', '5551234567', notes='Has a puppy.')
+        Address.objects.create(client=keep, address_type='HOME', street_address_1='1 Home St', city='Town', postal_code='11111')
+        old_home = Address.objects.create(client=dupe, address_type='HOME', street_address_1='9 Old St', city='Town', postal_code='11111')
+        work = Address.objects.create(client=dupe, address_type='WORK', street_address_1='2 Work St', city='Town', postal_code='22222')
+
+        dropped = dedupe.merge_clients(keep, dupe)
+
+        self.assertFalse(Client.objects.filter(pk=dupe.pk).exists())
+        self.assertEqual(sorted(keep.addresses.values_list('address_type', flat=True)), ['HOME', 'OTHER', 'WORK'])
+        self.assertIn(work, keep.addresses.all())
+        self.assertEqual(keep.addresses.get(address_type='HOME').street_address_1, '1 Home St')
+        self.assertEqual(keep.addresses.get(address_type='OTHER').pk, old_home.pk)  # Filed under a free type
+        self.assertEqual(dropped, [])
+        keep.refresh_from_db()
+        self.assertEqual(keep.notes, 'Keeps treats.\nHas a puppy.')
+
+    def test_06_api(self):
+        """The duplicate check and merge endpoints."""
+        keep = self.make_client('Jane', 'Doe', 'jane.doe@example.com', '555-123-4567')
+        dupe = self.make_client('Jane', 'Doe', 'janedoe@gmail.com', '5551234567')
+
+        response = self.client.get(reverse('duplicate_check'), {
+            'first_name': 'Jane', 'last_name': 'Doe', 'email': 'j.doe@example.com', 'phone_number': '555 123 4567'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({r['client']['id'] for r in response.json()}, {keep.pk, dupe.pk})
+
+        response = self.client.post(reverse('merge_clients', args=[keep.pk]), {'duplicate': dupe.pk}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)  # Anonymous users cannot merge
+        self.client.force_login(get_user_model().objects.create_user('office', password='pw'))
+        response = self.client.post(reverse('merge_clients', args=[keep.pk]), {'duplicate': dupe.pk}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Client.objects.filter(pk=dupe.pk).exists())
+
+        response = self.client.post(reverse('merge_clients', args=[keep.pk]), {'duplicate': keep.pk}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_07_merge_uses_current_rows(self):
+        """Edits committed after the caller loaded the clients survive, and unmovable rows are noted."""
+        keep = self.make_client('Jane', 'Doe', 'jane.doe@example.com', '555-123-4567')
+        dupe = self.make_client('Jane', 'Doe', 'janedoe@gmail.com', '5551234567')
+        for address_type, _ in Address.ADDRESS_TYPE_CHOICES:
+            Address.objects.create(client=keep, address_type=address_type, street_address_1='1 Home St',
+                                   city='Town', postal_code='11111')
+        Address.objects.create(client=dupe, street_address_1='9 Old St', city='Town', postal_code='11111')
+        Client.objects.filter(pk=keep.pk).update(phone_number='555-999-0000')  # e.g. another user's edit
+
+        dropped = dedupe.merge_clients(keep, dupe)
+
+        keep.refresh_from_db()
+        self.assertEqual(keep.phone_number, '555-999-0000')
+        self.assertEqual(len(dropped), 1)
+        self.assertIn('9 Old St', keep.notes)
+
+
+class GeoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.downtown = cls.make_client('Down', 'Town', '30303')
+        cls.midtown = cls.make_client('Mid', 'Town', '30308')
+        cls.decatur = cls.make_client('Dee', 'Catur', '30030')
+        cls.marietta = cls.make_client('Mary', 'Etta', '30060')
+        cls.new_york = cls.make_client('New', 'York', '10001')
+        cls.inactive = cls.make_client('Not', 'Active', '30309', is_active=False)
+
+    @classmethod
+    def make_client(cls, first, last, postal_code, **extra):
+        client = Client.objects.create(
+            first_name=first, last_name=last, email=f'{first}.{last}@example.com', phone_number='555-123-4567', **extra
+        )
+        Address.objects.create(client=client, street_address_1='1 Main St', city='Somewhere', postal_code=postal_code)
+        return client
+
+    def test_01_geocode_on_save(self):
+        """Addresses get their postal code's coordinates, and new ones when it changes."""
+        address = self.downtown.addresses.get()
+        self.assertAlmostEqual(address.latitude, 33.7525)
+        self.assertAlmostEqual(address.longitude, -84.3888)
+        address.postal_code = '10001-1234'
+        address.save()
+        address.refresh_from_db()
+        self.assertAlmostEqual(address.latitude, 40.7484)
+        address.postal_code = 'ABC'
+        address.save()
+        self.assertIsNone(address.latitude)
+
+    def test_02_within_radius(self):
+        """Radius search returns addresses inside the radius, nearest first."""
+        lat, lng = geo.locate('30303')
+        found = list(geo.within(lat, lng, 15))
+        self.assertEqual([a.client for a in found], [self.downtown, self.midtown, self.inactive, self.decatur])
+        self.assertAlmostEqual(found[0].distance_km, 0)
+        self.assertAlmostEqual(found[1].distance_km, 2.4, delta=0.2)
+
+    def test_03_nearest(self):
+        """Nearest-N widens its search until enough addresses are found."""
+        lat, lng = geo.locate('30303')
+        found = geo.nearest(lat, lng, limit=6, max_radius_km=2000)
+        self.assertEqual(found[-1].client, self.new_york)  # ~1200 km away, needs the widest box
+        self.assertEqual(len(geo.nearest(lat, lng, limit=6)), 5)  # Default search stops at 500 km
+
+    def test_04_backfill(self):
+        """The backfill command geocodes existing rows in batches."""
+        Address.objects.update(latitude=None, longitude=None)
+        call_command('geocode_addresses', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(Address.objects.filter(latitude__isnull=True).count(), 0)
+
+    def test_05_nearby_endpoints(self):
+        """Nearby endpoints skip inactive clients and the client being planned for."""
+        response = self.client.get(reverse('client_nearby', args=[self.downtown.pk]), {'radius_km': 15})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['client']['id'] for r in response.json()], [self.midtown.pk, self.decatur.pk])
+
+        response = self.client.get(reverse('nearby_addresses'), {'postal_code': '30303', 'limit': 2})
+        self.assertEqual([r['client']['id'] for r in response.json()], [self.downtown.pk, self.midtown.pk])
+
+        response = self.client.get(reverse('nearby_addresses'), {'postal_code': '00000'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_07_nearby_parameters_are_validated(self):
+        """Out of range limits are clamped; unusable limits, radii and points are bad requests."""
+        url = reverse('nearby_addresses')
+        response = self.client.get(url, {'postal_code': '30303', 'limit': -3})
+        self.assertEqual([r['client']['id'] for r in response.json()], [self.downtown.pk])
+        response = self.client.get(url, {'postal_code': '30303', 'radius_km': 15, 'limit': 0})
+        self.assertEqual(len(response.json()), 1)
+        for params in ({'limit': 'ten'}, {'radius_km': -1}, {'radius_km': 'nan'}, {'radius_km': 'far'}):
+            response = self.client.get(url, {'postal_code': '30303', **params})
+            self.assertEqual(response.status_code, 400, params)
+        self.assertEqual(self.client.get(url, {'lat': 'nan', 'lng': 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'lat': 100, 'lng': 0}).status_code, 400)
+        self.assertEqual(
+            self.client.get(reverse('client_nearby', args=[self.downtown.pk]), {'radius_km': -5}).status_code, 400
+        )
+        with self.assertRaises(ValueError):
+            geo.nearest(33.75, -84.39, limit=0)
+
+    def test_06_radius_query_is_fast_on_large_tables(self):
+        """A radius query over tens of thousands of addresses takes milliseconds."""
+        rng = random.Random(7)
+        clients = Client.objects.bulk_create([
+            Client(first_name='Bulk', last_name='Client', email=f'bulk{i}@example.com', phone_number='555-123-4567')
+            for i in range(5000)
+        ])
+        Address.objects.bulk_create([
+            Address(client=client, address_type=address_type, street_address_1='1 Main St', city='X', postal_code='0',
+                    latitude=rng.uniform(25, 49), longitude=rng.uniform(-124, -67))
+            for client in clients for address_type in ('HOME', 'WORK', 'BILLING', 'OTHER')
+        ])
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE manage_owners_app_address")
+
+        lat, lng = geo.locate('30303')
+        list(geo.within(lat, lng, 25))  # Warm up
+        started = time.perf_counter()
+        for _ in range(10):
+            list(geo.within(lat, lng, 25))
+            geo.nearest(lat, lng, limit=20)
+        elapsed = (time.perf_counter() - started) / 10
+        self.assertLess(elapsed, 0.05, f"radius + nearest queries took {elapsed * 1000:.1f} ms")
+
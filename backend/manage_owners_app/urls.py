@@ -1,6 +1,11 @@
 from django.urls import path
-from .views import All_clients
+from .views import All_clients, Client_history, Client_nearby, Duplicate_check, Merge_clients, Nearby_addresses
 
 urlpatterns = [
-    path('', All_clients.as_view(), name='all_clients')
+    path('', All_clients.as_view(), name='all_clients'),
+    path('duplicates/', Duplicate_check.as_view(), name='duplicate_check'),
+    path('nearby/', Nearby_addresses.as_view(), name='nearby_addresses'),
+    path('<int:client_id>/history/', Client_history.as_view(), name='client_history'),
+    path('<int:client_id>/merge/', Merge_clients.as_view(), name='merge_clients'),
+    path('<int:client_id>/nearby/', Client_nearby.as_view(), name='client_nearby')
 ]
\ No newline at end of file
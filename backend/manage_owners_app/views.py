@@ -1,10 +1,16 @@
-from django.shortcuts import render
+from django.db.models import Case, When
+from django.shortcuts import render, get_object_or_404
 
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from .models import Client, Address
-from .serializers import ClientSerializer, AddressSerializer
+from . import audit, dedupe, geo
+from .models import Client, Address, AuditLogEntry
+from .serializers import (
+    ClientSerializer, ClientSummarySerializer, AddressSerializer, NearbyAddressSerializer, AuditLogEntrySerializer
+)
 
 
 class All_clients(APIView):
@@ -18,4 +24,140 @@ class All_clients(APIView):
         """
         clients = Client.objects.prefetch_related('addresses').order_by('last_name', 'first_name')
         serializer = ClientSerializer(clients, many = True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+class Client_history(APIView):
+    """
+    Field-level change history of one client and its addresses, newest first.
+    Optional query parameter: ?limit=<n> (default 100, max 1000)
+    Changes are listed once the audit buffer has written them (at the latest
+    AUDIT_BUFFER['MAX_AGE'] seconds later, or when the request making them ends).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, client_id):
+        entries = AuditLogEntry.objects.filter(client_pk=client_id).select_related('user')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+        except ValueError:
+            return Response({'detail': "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = AuditLogEntrySerializer(entries[:limit], many = True)
+        return Response(serializer.data)
+
+
+class Duplicate_check(APIView):
+    """
+    Inline duplicate check before creating a client.
+    Query parameters: first_name, last_name, email, phone_number (and optionally exclude=<client id>)
+    """
+    def get(self, request):
+        params = request.query_params
+        try:
+            exclude = int(params['exclude']) if 'exclude' in params else None
+        except ValueError:
+            return Response({'detail': "exclude must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        candidates = dedupe.find_candidates(
+            params.get('first_name', ''),
+            params.get('last_name', ''),
+            params.get('email', ''),
+            params.get('phone_number', ''),
+            exclude_id=exclude
+        )
+        clients = Client.objects.in_bulk([c.other_id for c in candidates])
+        return Response([
+            {
+                'client': ClientSummarySerializer(clients[c.other_id]).data,
+                'score': c.score,
+                'reasons': c.reasons
+            }
+            for c in candidates
+        ])
+
+
+class Merge_clients(APIView):
+    """
+    Merge another client into this one: POST {"duplicate": <client id>}.
+    The duplicate's addresses move to this client and the duplicate is deleted.
+    """
+    # Deletes a client, so never open to anonymous users whatever the settings profile
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, client_id):
+        keep = get_object_or_404(Client, pk=client_id)
+        try:
+            duplicate = get_object_or_404(Client, pk=int(request.data.get('duplicate')))
+        except (TypeError, ValueError):
+            return Response({'detail': "duplicate must be a client id."}, status=status.HTTP_400_BAD_REQUEST)
+        if duplicate.pk == keep.pk:
+            return Response({'detail': "Cannot merge a client into itself."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            dropped = dedupe.merge_clients(keep, duplicate)
+        except Client.DoesNotExist:
+            return Response({'detail': "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        keep = Client.objects.prefetch_related('addresses').get(pk=keep.pk)
+        return Response({
+            'client': ClientSerializer(keep).data,
+            'dropped': [str(obj) for obj in dropped]
+        })
+
+
+def _nearby_response(request, latitude, longitude, queryset):
+    """
+    Shared radius / nearest-N handling for the nearby endpoints.
+    ?radius_km=<km> returns everything within the radius (up to ?limit), otherwise the ?limit nearest.
+    """
+    params = request.query_params
+    if params.get('include_inactive') not in ('1', 'true'):
+        queryset = queryset.filter(client__is_active=True)
+    queryset = queryset.select_related('client')
+    try:
+        limit = min(max(int(params.get('limit', 20)), 1), 500)
+        if 'radius_km' in params:
+            addresses = geo.within(latitude, longitude, min(float(params['radius_km']), 500), queryset)[:limit]
+        else:
+            addresses = geo.nearest(latitude, longitude, limit, queryset)
+    except ValueError:
+        return Response(
+            {'detail': "limit must be an integer and radius_km a non-negative number."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    serializer = NearbyAddressSerializer(addresses, many = True)
+    return Response(serializer.data)
+
+
+class Nearby_addresses(APIView):
+    """
+    Client addresses near a point: ?postal_code=<zip> or ?lat=<lat>&lng=<lng>.
+    Optional: ?radius_km=, ?limit= (default 20), ?include_inactive=1
+    """
+    def get(self, request):
+        params = request.query_params
+        if 'postal_code' in params:
+            point = geo.locate(params['postal_code'])
+            if point is None:
+                return Response({'detail': "Unknown postal code."}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            try:
+                point = (float(params['lat']), float(params['lng']))
+                if not (-90 <= point[0] <= 90 and -180 <= point[1] <= 180):
+                    raise ValueError(point)
+            except (KeyError, ValueError):
+                return Response({'detail': "Provide postal_code, or lat and lng."}, status=status.HTTP_400_BAD_REQUEST)
+        return _nearby_response(request, *point, Address.objects.all())
+
+
+class Client_nearby(APIView):
+    """
+    Other clients' addresses near this client's (HOME first) address, for planning home visits.
+    Optional: ?radius_km=, ?limit= (default 20), ?include_inactive=1
+    """
+    def get(self, request, client_id):
+        client = get_object_or_404(Client, pk=client_id)
+        origin = (
+            client.addresses.filter(latitude__isnull=False)
+            .order_by(Case(When(address_type='HOME', then=0), default=1), 'pk')
+            .first()
+        )
+        if origin is None:
+            return Response({'detail': "This client has no geocoded address."}, status=status.HTTP_404_NOT_FOUND)
+        return _nearby_response(request, origin.latitude, origin.longitude, Address.objects.exclude(client=client))
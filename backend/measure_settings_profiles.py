@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""
+Compare the full (backend.settings) and API-only (backend.settings_api) settings profiles.
+
+For every profile and entry point (backend.wsgi, backend.asgi) a fresh interpreter measures:
+- cold start: time to import the module and build `application` (django.setup(), app
+  loading, middleware chain)
+- per-request overhead: mean time for a GET through the whole handler and middleware
+  stack to a view that does nothing, so only framework cost is counted
+
+Each measurement is repeated in several interpreters and the median is reported.
+
+Usage:
+    python measure_settings_profiles.py [--requests 1000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROFILES = ['backend.settings', 'backend.settings_api']
+ENTRY_POINTS = ['wsgi', 'asgi']
+HOST = 'localhost'  # Allowed by both profiles (see ALLOWED_HOSTS below)
+
+
+def noop_urlconf():
+    from django.http import HttpResponse
+    from django.urls import path
+
+    def noop(request):
+        return HttpResponse(b'ok')
+
+    return type('NoopUrls', (), {'urlpatterns': [path('noop/', noop)]})
+
+
+def time_wsgi(application, requests):
+    def start_response(status, headers, exc_info=None):
+        assert status.startswith('200'), status
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': '/noop/',
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': '',
+            'SERVER_NAME': HOST,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': HOST,
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+        }
+        response = application(environ, start_response)
+        b''.join(response)
+        response.close()  # Fires request_finished, as a real server would
+    return (time.perf_counter() - started) / requests
+
+
+def time_asgi(application, requests):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': '/noop/',
+        'raw_path': b'/noop/',
+        'root_path': '',
+        'query_string': b'',
+        'headers': [(b'host', HOST.encode())],
+        'server': (HOST, 80),
+    }
+
+    async def one_request():
+        disconnected = asyncio.Event()
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                assert message['status'] == 200, message['status']
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                disconnected.set()
+
+        await application(dict(scope), receive, send)
+
+    async def run():
+        started = time.perf_counter()
+        for _ in range(requests):
+            await one_request()
+        return (time.perf_counter() - started) / requests
+
+    return asyncio.run(run())
+
+
+def child(entry_point, requests):
+    """
+    Runs in a fresh interpreter with DJANGO_SETTINGS_MODULE already set.
+    """
+    import importlib
+
+    started = time.perf_counter()
+    module = importlib.import_module(f'backend.{entry_point}')
+    cold_start = time.perf_counter() - started
+
+    from django.test.utils import override_settings
+
+    with override_settings(ROOT_URLCONF=noop_urlconf()):
+        timer = time_wsgi if entry_point == 'wsgi' else time_asgi
+        timer(module.application, min(requests, 100))  # Warm up
+        per_request = timer(module.application, requests)
+
+    print(json.dumps({'cold_start': cold_start, 'per_request': per_request}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--child', choices=ENTRY_POINTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.requests)
+        return
+
+    print(f"{'profile':<24}{'entry':<8}{'cold start (ms)':>18}{'per request (us)':>20}")
+    for profile in PROFILES:
+        for entry_point in ENTRY_POINTS:
+            env = dict(os.environ, DJANGO_SETTINGS_MODULE=profile)
+            env.setdefault('ALLOWED_HOSTS', HOST)
+            results = []
+            for _ in range(args.repeat):
+                output = subprocess.run(
+                    [sys.executable, __file__, '--child', entry_point, '--requests', str(args.requests)],
+                    env=env, capture_output=True, text=True, check=True,
+                    cwd=os.path.dirname(os.path.abspath(__file__))
+                ).stdout
+                results.append(json.loads(output.strip().splitlines()[-1]))
+            cold_start = statistics.median(r['cold_start'] for r in results)
+            per_request = statistics.median(r['per_request'] for r in results)
+            print(f"{profile:<24}{entry_point:<8}{cold_start * 1e3:>18.1f}{per_request * 1e6:>20.1f}")
+
+
+if __name__ == '__main__':
+    main()
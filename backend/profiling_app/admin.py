@@ -0,0 +1,79 @@
+import io
+import pstats
+
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from . import profiler
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'status_code', 'total_ms_display', 'sql_ms_display',
+                    'sql_queries', 'trigger', 'download')
+    list_filter = ['trigger', 'method', 'view_name']
+    search_fields = ('path', 'view_name', 'user')
+    date_hierarchy = 'created_at'
+    fieldsets = (
+        ('Request', {
+            'fields': ('created_at', 'method', 'path', 'query_string', 'view_name', 'status_code', 'user', 'trigger')
+        }),
+        ('Phases (ms)', {
+            'fields': ('total_ms', 'sql_ms', 'sql_queries', 'serializer_ms', 'render_ms', 'view_ms', 'slowest_queries')
+        }),
+        ('Profile', {
+            'fields': ('download', 'top_functions')
+        })
+    )
+
+    def has_add_permission(self, request):
+        return False  # Profiles are only created by the profiling middleware
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Total (ms)", ordering='total_ms')
+    def total_ms_display(self, obj):
+        return f"{obj.total_ms:.1f}"
+
+    @admin.display(description="SQL (ms)", ordering='sql_ms')
+    def sql_ms_display(self, obj):
+        return f"{obj.sql_ms:.1f}"
+
+    @admin.display(description="Other (ms)")
+    def view_ms(self, obj):
+        return f"{obj.view_ms:.1f}"
+
+    @admin.display(description="cProfile dump")
+    def download(self, obj):
+        url = reverse('admin:profiling_app_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.file_name)
+
+    @admin.display(description="Top functions (cumulative)")
+    def top_functions(self, obj):
+        try:
+            output = io.StringIO()
+            pstats.Stats(str(profiler.DIRECTORY / obj.file_name), stream=output).sort_stats('cumulative').print_stats(30)
+        except OSError:
+            return "The profile file no longer exists."
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', output.getvalue())
+
+    def get_urls(self):
+        return [
+            path('<int:profile_id>/download/', self.admin_site.admin_view(self.download_view),
+                 name='profiling_app_requestprofile_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, profile_id):
+        if not self.has_view_permission(request):
+            raise Http404
+        record = get_object_or_404(RequestProfile, pk=profile_id)
+        try:
+            return FileResponse(open(profiler.DIRECTORY / record.file_name, 'rb'), as_attachment=True,
+                                filename=record.file_name, content_type='application/octet-stream')
+        except FileNotFoundError:
+            raise Http404("The profile file no longer exists.")
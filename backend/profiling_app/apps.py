@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class ProfilingAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'profiling_app'
+
+    def ready(self):
+        from django.db.models.signals import post_delete
+        from . import profiler
+        from .models import RequestProfile
+
+        post_delete.connect(profiler.delete_profile_file, sender=RequestProfile, dispatch_uid='profiling_delete_file')
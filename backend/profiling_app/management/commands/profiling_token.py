@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from profiling_app import profiler
+
+
+class Command(BaseCommand):
+    help = "Print a signed X-Profile header value that makes the API profile a request."
+
+    def handle(self, *args, **options):
+        self.stdout.write(profiler.make_token())
+        self.stderr.write(
+            f"Valid for {profiler.TOKEN_MAX_AGE} seconds, e.g.:\n"
+            f"  curl -H 'X-Profile: <token>' https://<host>/api/v1/owners/\n"
+            "The response's X-Profile-Id header names the stored profile (see the admin)."
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('query_string', models.TextField(blank=True)),
+                ('view_name', models.CharField(blank=True, max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField(null=True)),
+                ('trigger', models.CharField(choices=[('HEADER', 'Signed header'), ('SAMPLED', 'Sampled')], max_length=10)),
+                ('user', models.CharField(blank=True, max_length=150)),
+                ('total_ms', models.FloatField(help_text='Wall time of the whole request.')),
+                ('sql_ms', models.FloatField(help_text='Time spent waiting for the database.')),
+                ('sql_queries', models.PositiveIntegerField()),
+                ('serializer_ms', models.FloatField(help_text='Time spent in DRF serializers, not counting their queries.')),
+                ('render_ms', models.FloatField(help_text='Time spent rendering the response.')),
+                ('slowest_queries', models.JSONField(default=list, help_text='The slowest SQL statements with their duration.')),
+                ('file_name', models.CharField(help_text='cProfile dump in the profile directory.', max_length=255)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiling_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='requestprofile',
+            name='total_ms',
+            field=models.FloatField(help_text='Wall time of the view and the rendering of its response.'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    One profiled request: where the time went, with the full cProfile dump stored on disk.
+    """
+    HEADER = 'HEADER'
+    SAMPLED = 'SAMPLED'
+    TRIGGER_CHOICES = [
+        (HEADER, 'Signed header'),
+        (SAMPLED, 'Sampled'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    query_string = models.TextField(blank=True)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    user = models.CharField(max_length=150, blank=True)
+
+    # Phases, in milliseconds
+    total_ms = models.FloatField(help_text="Wall time of the view and the rendering of its response.")
+    sql_ms = models.FloatField(help_text="Time spent waiting for the database.")
+    sql_queries = models.PositiveIntegerField()
+    serializer_ms = models.FloatField(help_text="Time spent in DRF serializers, not counting their queries.")
+    render_ms = models.FloatField(help_text="Time spent rendering the response.")
+    slowest_queries = models.JSONField(default=list, help_text="The slowest SQL statements with their duration.")
+
+    file_name = models.CharField(max_length=255, help_text="cProfile dump in the profile directory.")
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.total_ms:.0f} ms)"
+
+    @property
+    def view_ms(self):
+        """
+        Everything else: view logic, middleware, authentication, etc.
+        """
+        return max(self.total_ms - self.sql_ms - self.serializer_ms - self.render_ms, 0.0)
@@ -0,0 +1,239 @@
+"""
+Opt-in profiling of individual API requests in production.
+
+A request is profiled when it carries a valid signed `X-Profile` header
+(see `python manage.py profiling_token`) or is picked by sampling
+(PROFILING['SAMPLE_RATE']). For those requests only, the view runs under
+cProfile with every SQL statement timed, and the result is split into
+phases (SQL, DRF serializers, rendering, everything else). The full cProfile
+dump is written to PROFILING['DIRECTORY'] and listed in the admin, where it
+can be downloaded (e.g. for `snakeviz` or `python -m pstats`). Only the
+newest PROFILING['MAX_PROFILES'] are kept.
+
+Every other request pays for one header lookup and one random() call.
+"""
+import cProfile
+import logging
+import pstats
+import random
+import re
+import sys
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.utils import timezone
+from django.utils.deprecation import MiddlewareMixin
+import rest_framework.renderers
+import rest_framework.serializers
+
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+_config = getattr(settings, 'PROFILING', {})
+# Fraction (0-1) of matching requests profiled without a header
+SAMPLE_RATE = _config.get('SAMPLE_RATE', 0.0)
+DIRECTORY = Path(_config.get('DIRECTORY', settings.BASE_DIR / 'profiles'))
+MAX_PROFILES = _config.get('MAX_PROFILES', 200)
+# Seconds a token from `manage.py profiling_token` stays valid
+TOKEN_MAX_AGE = _config.get('TOKEN_MAX_AGE', 60 * 60)
+PATH_PREFIXES = tuple(_config.get('PATH_PREFIXES', ['/api/']))
+
+HEADER = 'HTTP_X_PROFILE'
+_SALT = 'profiling_app.header'
+_SERIALIZERS_FILE = rest_framework.serializers.__file__
+_RENDERERS_FILE = rest_framework.renderers.__file__
+
+
+def make_token():
+    """
+    A value for the X-Profile header, valid for TOKEN_MAX_AGE seconds.
+    """
+    return signing.TimestampSigner(salt=_SALT).sign('profile')
+
+
+def valid_token(value):
+    try:
+        return signing.TimestampSigner(salt=_SALT).unsign(value, max_age=TOKEN_MAX_AGE) == 'profile'
+    except signing.BadSignature:
+        return False
+
+
+def trigger_for(request):
+    """
+    Why this request should be profiled (RequestProfile.HEADER or SAMPLED), or None.
+    """
+    if not request.path.startswith(PATH_PREFIXES):
+        return None
+    header = request.META.get(HEADER)
+    if header and valid_token(header):
+        return RequestProfile.HEADER
+    if SAMPLE_RATE and random.random() < SAMPLE_RATE:
+        return RequestProfile.SAMPLED
+    return None
+
+
+class QueryTimer:
+    """
+    Database execute wrapper timing every statement, and which of them ran inside a serializer.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.in_serializers = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries.append((elapsed, sql))
+            if self._called_from_serializer():
+                self.in_serializers += elapsed
+
+    @staticmethod
+    def _called_from_serializer():
+        frame = sys._getframe(2)
+        while frame is not None:
+            if frame.f_code.co_filename == _SERIALIZERS_FILE:
+                return True
+            frame = frame.f_back
+        return False
+
+    @property
+    def total(self):
+        return sum(elapsed for elapsed, _ in self.queries)
+
+    def slowest(self, count=10):
+        return [
+            {'ms': round(elapsed * 1000, 3), 'sql': sql[:2000]}
+            for elapsed, sql in sorted(self.queries, key=lambda q: -q[0])[:count]
+        ]
+
+
+def _outermost(stats, filename, names=None):
+    """
+    Cumulative seconds of the outermost call into `filename` (optionally only the functions `names`).
+    """
+    return max((
+        cumulative for (file, _, name), (_, _, _, cumulative, _) in stats.stats.items()
+        if file == filename and (names is None or name in names)
+    ), default=0.0)
+
+
+def _file_name(request):
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')[:80] or 'root'
+    return f"{timezone.now():%Y%m%d-%H%M%S}-{request.method}-{slug}-{uuid.uuid4().hex[:8]}.prof"
+
+
+def rotate(keep=None):
+    """
+    Delete all but the newest `keep` (default MAX_PROFILES) profiles; their files go with them.
+    """
+    keep = MAX_PROFILES if keep is None else keep
+    old = list(RequestProfile.objects.order_by('-created_at', '-pk').values_list('pk', flat=True)[keep:])
+    if old:
+        RequestProfile.objects.filter(pk__in=old).delete()
+
+
+def delete_profile_file(sender, instance, **kwargs):
+    (DIRECTORY / instance.file_name).unlink(missing_ok=True)
+
+
+class ProfileSession:
+    """
+    cProfile and the query timer of one profiled request, between start() and stop().
+    """
+
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.profiler = cProfile.Profile()
+        self.timer = QueryTimer()
+        self.total = 0.0
+        self._wrappers = ExitStack()
+
+    def start(self):
+        for alias in connections:
+            self._wrappers.enter_context(connections[alias].execute_wrapper(self.timer))
+        self._started = time.perf_counter()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        self.total = time.perf_counter() - self._started
+        self._wrappers.close()
+
+
+def save_profile(request, response, session):
+    """
+    Store the profile of a finished request and point to it from the response's X-Profile-Id header.
+    """
+    profiler, timer, total = session.profiler, session.timer, session.total
+    try:
+        DIRECTORY.mkdir(parents=True, exist_ok=True)
+        file_name = _file_name(request)
+        profiler.dump_stats(DIRECTORY / file_name)
+        stats = pstats.Stats(profiler)
+        serializers = _outermost(stats, _SERIALIZERS_FILE, {'data', 'to_representation'})
+        drf_request = (getattr(response, 'renderer_context', None) or {}).get('request', request)
+        user = getattr(drf_request, 'user', None)
+        record = RequestProfile.objects.create(
+            method=request.method,
+            path=request.path[:500],
+            query_string=request.META.get('QUERY_STRING', ''),
+            view_name=getattr(request.resolver_match, 'view_name', '') or '',
+            status_code=getattr(response, 'status_code', None),
+            trigger=session.trigger,
+            user=user.get_username() if getattr(user, 'is_authenticated', False) else '',
+            total_ms=total * 1000,
+            sql_ms=timer.total * 1000,
+            sql_queries=len(timer.queries),
+            serializer_ms=max(serializers - timer.in_serializers, 0.0) * 1000,
+            render_ms=_outermost(stats, _RENDERERS_FILE, {'render'}) * 1000,
+            slowest_queries=timer.slowest(),
+            file_name=file_name
+        )
+        rotate()
+        response['X-Profile-Id'] = str(record.pk)
+    except Exception:
+        # A failure to store the profile must never fail the request itself
+        logger.exception("Could not store the profile of %s %s", request.method, request.path)
+    return response
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """
+    Profiles requests picked by trigger_for() from this middleware's
+    process_view to its process_response: the view, the process_exception of
+    other middleware if it raises, and rendering. Django calls the view (and
+    handles its exceptions) as usual. Works under WSGI and ASGI: Django runs
+    the process_view and process_response of sync middleware in the same
+    thread as sync views.
+
+    It should be the last in MIDDLEWARE, so no other middleware's process_view
+    or process_response is counted as part of the view.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if iscoroutinefunction(view_func):
+            return None  # Async views (e.g. the live update stream) are not profiled
+        trigger = trigger_for(request)
+        if trigger is not None:
+            request.profile_session = ProfileSession(trigger)
+            request.profile_session.start()
+        return None
+
+    def process_response(self, request, response):
+        session = getattr(request, 'profile_session', None)
+        if session is None:
+            return response
+        del request.profile_session
+        session.stop()
+        return save_profile(request, response, session)
@@ -0,0 +1,128 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.deprecation import MiddlewareMixin
+
+from manage_owners_app.models import Client, Address
+from . import profiler
+from .models import RequestProfile
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for n in range(5):
+            client = Client.objects.create(
+                first_name='Jane', last_name=f'Doe{chr(97 + n)}', email=f'jane{n}@example.com',
+                phone_number='555-123-4567'
+            )
+            Address.objects.create(client=client, street_address_1='1 Main St', city='Atlanta', postal_code='30303')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        patcher = mock.patch.object(profiler, 'DIRECTORY', self.directory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, path, token=None):
+        headers = {'HTTP_X_PROFILE': token} if token else {}
+        return self.client.get(path, **headers)
+
+    def test_01_not_profiled_by_default(self):
+        """Requests without a header are not profiled."""
+        response = self.get(reverse('all_clients'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_02_signed_header_profiles_request(self):
+        """A valid header stores a profile with its phases and a cProfile dump."""
+        response = self.get(reverse('all_clients'), profiler.make_token())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+
+        record = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((record.method, record.path, record.status_code), ('GET', '/api/v1/owners/', 200))
+        self.assertEqual((record.view_name, record.trigger), ('all_clients', RequestProfile.HEADER))
+        self.assertEqual(record.sql_queries, 2)  # Clients + prefetched addresses
+        self.assertEqual(len(record.slowest_queries), 2)
+        self.assertGreater(record.serializer_ms, 0)
+        self.assertGreater(record.render_ms, 0)
+        self.assertLessEqual(record.sql_ms + record.serializer_ms + record.render_ms, record.total_ms)
+        self.assertTrue((self.directory / record.file_name).exists())
+
+    def test_03_invalid_tokens_are_ignored(self):
+        """Forged, expired and non-API requests are not profiled."""
+        self.get(reverse('all_clients'), 'profile:forged')
+        with mock.patch.object(profiler, 'TOKEN_MAX_AGE', -1):
+            self.get(reverse('all_clients'), profiler.make_token())
+        self.get('/admin/login/', profiler.make_token())
+        other_salt = signing.TimestampSigner(salt='something.else').sign('profile')
+        self.get(reverse('all_clients'), other_salt)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_04_sampling(self):
+        """With a sample rate, requests are profiled without a header."""
+        with mock.patch.object(profiler, 'SAMPLE_RATE', 1.0):
+            response = self.get(reverse('all_jobs'))
+        self.assertEqual(RequestProfile.objects.get(pk=response['X-Profile-Id']).trigger, RequestProfile.SAMPLED)
+
+    def test_05_rotation(self):
+        """Only the newest MAX_PROFILES profiles and files are kept."""
+        with mock.patch.object(profiler, 'MAX_PROFILES', 3):
+            ids = [int(self.get(reverse('all_jobs'), profiler.make_token())['X-Profile-Id']) for _ in range(5)]
+        kept = RequestProfile.objects.all()
+        self.assertEqual(sorted(kept.values_list('pk', flat=True)), ids[2:])
+        self.assertEqual(sorted(p.name for p in self.directory.iterdir()), sorted(p.file_name for p in kept))
+
+    def test_06_admin_list_and_download(self):
+        """Staff can list profiles and download the cProfile dump."""
+        record_id = self.get(reverse('all_clients'), profiler.make_token())['X-Profile-Id']
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='pw'))
+        changelist = self.client.get(reverse('admin:profiling_app_requestprofile_changelist'))
+        self.assertContains(changelist, '/api/v1/owners/')
+        detail = self.client.get(reverse('admin:profiling_app_requestprofile_change', args=[record_id]))
+        self.assertContains(detail, 'cumulative')
+        download = self.client.get(reverse('admin:profiling_app_requestprofile_download', args=[record_id]))
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment', download['Content-Disposition'])
+        self.assertGreater(len(b''.join(download.streaming_content)), 0)
+
+    def test_07_runs_after_other_middleware(self):
+        """The profiler is last, so it profiles the view and not the other middleware."""
+        from backend import settings_api
+
+        for middleware in (settings.MIDDLEWARE, settings_api.MIDDLEWARE):
+            self.assertEqual(middleware[-1], 'profiling_app.profiler.ProfilingMiddleware')
+
+    @override_settings(MIDDLEWARE=settings.MIDDLEWARE[:-1] + [
+        'profiling_app.tests.RecordExceptions', 'profiling_app.profiler.ProfilingMiddleware'
+    ])
+    def test_08_view_exceptions_are_handled_as_usual(self):
+        """A profiled view that raises still goes through process_exception and gets its usual response."""
+        RecordExceptions.seen = []
+        response = self.get(reverse('trainer_calendar', args=['unknown']), profiler.make_token())
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual([type(error) for error in RecordExceptions.seen], [Http404])
+        record = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((record.view_name, record.status_code), ('trainer_calendar', 404))
+
+
+class RecordExceptions(MiddlewareMixin):
+    """
+    Test middleware noting the exceptions its process_exception is called with.
+    """
+    seen = []
+
+    def process_exception(self, request, exception):
+        self.seen.append(exception)
@@ -1,3 +1,80 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils.html import format_html
+from .models import Trainer, Dog, Appointment, Skill, TrainingPlan, ProgressNote
 
-# Register your models here.
+
+class CalendarFeedMixin:
+    """
+    Shows the secret calendar subscription URL of a trainer or dog.
+    """
+    feed_url_name = None
+    actions = ['regenerate_calendar_tokens']
+
+    @admin.display(description="Calendar feed")
+    def calendar_feed(self, obj):
+        if not obj.pk:
+            return "-"
+        return format_html('<a href="{0}">{0}</a>', reverse(self.feed_url_name, args=[obj.calendar_token]))
+
+    def get_readonly_fields(self, request, obj=None):
+        return [*super().get_readonly_fields(request, obj), 'calendar_feed']
+
+    @admin.action(description="Revoke calendar feed URLs (issue new ones)")
+    def regenerate_calendar_tokens(self, request, queryset):
+        for obj in queryset:
+            obj.regenerate_calendar_token()
+        self.message_user(
+            request, f"{len(queryset)} calendar feed URL(s) replaced; old subscriptions stop working.", messages.SUCCESS
+        )
+
+
+@admin.register(Trainer)
+class TrainerAdmin(CalendarFeedMixin, admin.ModelAdmin):
+    feed_url_name = 'trainer_calendar'
+    list_display = ('last_name', 'first_name', 'email', 'is_active')
+    list_filter = ['is_active']
+    search_fields = ('last_name', 'first_name', 'email')
+
+
+@admin.register(Dog)
+class DogAdmin(CalendarFeedMixin, admin.ModelAdmin):
+    feed_url_name = 'dog_calendar'
+    list_display = ('name', 'breed', 'client', 'training_plan', 'is_active')
+    list_filter = ['is_active', 'training_plan']
+    search_fields = ('name', 'breed', 'client__last_name')
+    list_select_related = ['client']
+    autocomplete_fields = ['client']
+
+
+@admin.register(Appointment)
+class AppointmentAdmin(admin.ModelAdmin):
+    list_display = ('start_time', 'dog', 'trainer', 'location', 'completed', 'cancelled')
+    list_filter = ['completed', 'cancelled', 'trainer']
+    date_hierarchy = 'start_time'
+    list_select_related = ['dog__client', 'trainer']
+    autocomplete_fields = ['dog']
+    search_fields = ('dog__name', 'location')
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+@admin.register(TrainingPlan)
+class TrainingPlanAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+    filter_horizontal = ['skills']
+
+
+@admin.register(ProgressNote)
+class ProgressNoteAdmin(admin.ModelAdmin):
+    list_display = ('date_recorded', 'dog', 'skill', 'level')
+    list_filter = ['level', 'skill']
+    date_hierarchy = 'date_recorded'
+    list_select_related = ['dog__client', 'skill']
+    autocomplete_fields = ['dog', 'skill']
+    raw_id_fields = ['appointment']
@@ -0,0 +1,249 @@
+"""
+Cohort analytics over progress notes, computed with NumPy.
+
+Looping over millions of ProgressNote rows in Python (or one ORM query per
+dog) is far too slow, so the numeric columns are streamed out of PostgreSQL
+with COPY into NumPy arrays and every aggregate is computed on whole arrays:
+sorting with lexsort, group boundaries with diff/flatnonzero, sums and
+counts with bincount. Labels (breed, plan and trainer names) are only looked
+up for the few resulting groups.
+
+Results are cached for the rest of the (UTC) day.
+"""
+import datetime
+import io
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from .models import Appointment, Dog, ProgressNote, Skill, Trainer, TrainingPlan
+
+DIMENSIONS = ('breed', 'plan', 'trainer')
+MISSING = -1  # Stands for NULL in the integer columns
+UNKNOWN_LABEL = 'Unknown'
+
+
+# --- Loading ------------------------------------------------------------------
+
+def _copy_array(query, params, columns):
+    """
+    Run `query` through COPY ... TO STDOUT and parse it into a 2-D float64 array.
+    """
+    buffer = io.BytesIO()
+    with connection.cursor() as cursor:
+        sql = connection.ops.compose_sql(query, params)
+        with cursor.copy(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv)") as copy:
+            for block in copy:
+                buffer.write(block)
+    if not buffer.tell():
+        return np.empty((0, columns))
+    buffer.seek(0)
+    return np.loadtxt(buffer, delimiter=',', dtype=np.float64, ndmin=2)
+
+
+def load_notes(skill_id=None):
+    """
+    Skill notes as a dict of equal-length arrays: dog, skill, appointment,
+    trainer, level and day (days since the epoch, fractional).
+    """
+    notes = ProgressNote._meta.db_table
+    appointments = Appointment._meta.db_table
+    query = f"""
+        SELECT n.dog_id, n.skill_id, COALESCE(n.appointment_id, {MISSING}), COALESCE(a.trainer_id, {MISSING}),
+               COALESCE(n.level, 0), EXTRACT(EPOCH FROM n.date_recorded) / 86400.0
+        FROM {notes} n
+        LEFT JOIN {appointments} a ON a.id = n.appointment_id
+        WHERE n.skill_id IS NOT NULL
+    """
+    params = []
+    if skill_id is not None:
+        query += " AND n.skill_id = %s"
+        params.append(skill_id)
+    data = _copy_array(query, params, 6)
+    columns = dict(zip(('dog', 'skill', 'appointment', 'trainer', 'level'), data[:, :5].T.astype(np.int64)))
+    columns['day'] = data[:, 5]
+    return columns
+
+
+def _dog_codes(dog_ids, by):
+    """
+    Group code of each dog for a breed or plan breakdown, and the label of every code.
+    """
+    unique_dogs = np.unique(dog_ids)
+    rows = Dog.objects.filter(pk__in=unique_dogs.tolist()).values_list('pk', 'breed', 'training_plan_id')
+    lookup = {pk: (breed, plan) for pk, breed, plan in rows}
+    if by == 'breed':
+        values = np.array([(lookup.get(pk, ('', None))[0] or '').strip().title() or UNKNOWN_LABEL
+                           for pk in unique_dogs.tolist()], dtype=object)
+        labels, codes = np.unique(values, return_inverse=True)
+        labels = labels.tolist()
+    else:
+        plans = np.array([lookup.get(pk, ('', None))[1] or MISSING for pk in unique_dogs.tolist()], dtype=np.int64)
+        plan_ids, codes = np.unique(plans, return_inverse=True)
+        names = dict(TrainingPlan.objects.filter(pk__in=plan_ids.tolist()).values_list('pk', 'name'))
+        labels = [names.get(pk, UNKNOWN_LABEL) for pk in plan_ids.tolist()]
+    return codes[np.searchsorted(unique_dogs, dog_ids)], labels
+
+
+def _trainer_codes(trainer_ids):
+    trainers, codes = np.unique(trainer_ids, return_inverse=True)
+    names = {
+        pk: f"{first} {last}"
+        for pk, first, last in Trainer.objects.filter(pk__in=trainers.tolist()).values_list('pk', 'first_name', 'last_name')
+    }
+    return codes, [names.get(pk, UNKNOWN_LABEL) for pk in trainers.tolist()]
+
+
+def _group_codes(notes, rows, by):
+    """
+    Code (0..n-1) of the breed, plan or trainer of each selected row, plus the labels.
+    """
+    if by == 'trainer':
+        return _trainer_codes(notes['trainer'][rows])
+    return _dog_codes(notes['dog'][rows], by)
+
+
+def _skill_names(skill_ids):
+    return dict(Skill.objects.filter(pk__in=np.unique(skill_ids).tolist()).values_list('pk', 'name'))
+
+
+# --- Computation --------------------------------------------------------------
+
+def _sort_by_dog_skill(notes):
+    """
+    Sort all columns by (dog, skill, day) and return them with the index of each
+    row's (dog, skill) group and the first row of every group.
+    """
+    order = np.lexsort((notes['day'], notes['skill'], notes['dog']))
+    notes = {name: column[order] for name, column in notes.items()}
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = (np.diff(notes['dog']) != 0) | (np.diff(notes['skill']) != 0)
+    group = np.cumsum(new_group) - 1
+    return notes, group, np.flatnonzero(new_group)
+
+
+def mastery(notes, by):
+    """
+    Sessions (distinct appointments) and days each dog needed to reach MASTERED
+    on a skill, aggregated per (breed/plan/trainer, skill).
+
+    The trainer of a mastered skill is the trainer of the session in which it was mastered.
+    """
+    if not len(notes['dog']):
+        return []
+    notes, group, starts = _sort_by_dog_skill(notes)
+
+    # A session counts once per (dog, skill), at its earliest note
+    has_session = notes['appointment'] != MISSING
+    key = group * (notes['appointment'].max() + 2) + notes['appointment']
+    _, first_of_key = np.unique(key, return_index=True)
+    counts_session = np.zeros(len(key), dtype=np.int64)
+    counts_session[first_of_key] = 1
+    counts_session &= has_session
+    sessions_so_far = np.cumsum(counts_session)
+    sessions_so_far -= np.concatenate(([0], sessions_so_far[starts[1:] - 1]))[group]
+
+    # First MASTERED note of every (dog, skill) group
+    mastered_rows = np.flatnonzero(notes['level'] == ProgressNote.MASTERED)
+    _, first = np.unique(group[mastered_rows], return_index=True)
+    rows = mastered_rows[first]
+    if not len(rows):
+        return []
+    sessions = sessions_so_far[rows]
+    days = notes['day'][rows] - notes['day'][starts[group[rows]]]
+
+    codes, labels = _group_codes(notes, rows, by)
+    skills, skill_codes = np.unique(notes['skill'][rows], return_inverse=True)
+    combined = codes * len(skills) + skill_codes
+    size = len(labels) * len(skills)
+    count = np.bincount(combined, minlength=size)
+    mean_sessions = np.bincount(combined, weights=sessions, minlength=size) / np.maximum(count, 1)
+    mean_days = np.bincount(combined, weights=days, minlength=size) / np.maximum(count, 1)
+
+    # Median sessions: sort within each combined group and take the middle value(s)
+    order = np.lexsort((sessions, combined))
+    ends = np.cumsum(count)
+    low = ends - count + (count - 1) // 2
+    high = ends - count + count // 2
+    sorted_sessions = sessions[order]
+    nonempty = np.flatnonzero(count)
+    median = (sorted_sessions[low[nonempty]] + sorted_sessions[high[nonempty]]) / 2
+
+    names = _skill_names(skills)
+    results = []
+    for position, index in enumerate(nonempty.tolist()):
+        code, skill_code = divmod(index, len(skills))
+        skill_id = int(skills[skill_code])
+        results.append({
+            by: labels[code],
+            'skill_id': skill_id,
+            'skill': names.get(skill_id, UNKNOWN_LABEL),
+            'dogs': int(count[index]),
+            'mean_sessions': round(float(mean_sessions[index]), 2),
+            'median_sessions': float(median[position]),
+            'mean_days': round(float(mean_days[index]), 1),
+        })
+    return sorted(results, key=lambda r: (r['skill'], r[by]))
+
+
+def progress_curves(notes, by, weeks=26):
+    """
+    Mean level per week since each dog's first note on a skill, per breed/plan/trainer.
+    Notes later than `weeks` are counted in the last week.
+    """
+    if not len(notes['dog']):
+        return {}
+    notes, group, starts = _sort_by_dog_skill(notes)
+    rated = np.flatnonzero(notes['level'] > 0)
+    if not len(rated):
+        return {}
+    week = ((notes['day'][rated] - notes['day'][starts[group[rated]]]) // 7).astype(np.int64)
+    np.clip(week, 0, weeks, out=week)
+
+    codes, labels = _group_codes(notes, rated, by)
+    combined = codes * (weeks + 1) + week
+    size = len(labels) * (weeks + 1)
+    count = np.bincount(combined, minlength=size).reshape(len(labels), weeks + 1)
+    total = np.bincount(combined, weights=notes['level'][rated], minlength=size).reshape(len(labels), weeks + 1)
+    mean = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+
+    return {
+        label: [
+            {'week': int(w), 'mean_level': round(float(mean[code, w]), 2), 'notes': int(count[code, w])}
+            for w in np.flatnonzero(count[code]).tolist()
+        ]
+        for code, label in enumerate(labels)
+    }
+
+
+# --- Cached reports -----------------------------------------------------------
+
+def _until_tomorrow():
+    now = timezone.now()
+    tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min, now.tzinfo)
+    return max(int((tomorrow - now).total_seconds()), 1)
+
+
+def _cached(name, compute, *args):
+    key = f"training-analytics:{timezone.now():%Y%m%d}:{name}:{':'.join(map(str, args))}"
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, _until_tomorrow())
+    return result
+
+
+def mastery_report(by, skill_id=None):
+    """
+    Cached for the day: mastery() over all notes (or one skill's).
+    """
+    return _cached('mastery', lambda: mastery(load_notes(skill_id), by), by, skill_id)
+
+
+def progress_report(by, skill_id=None, weeks=26):
+    """
+    Cached for the day: progress_curves() over all notes (or one skill's).
+    """
+    return _cached('progress', lambda: progress_curves(load_notes(skill_id), by, weeks), by, skill_id, weeks)
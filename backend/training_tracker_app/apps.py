@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class TrainingTrackerAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'training_tracker_app'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from manage_owners_app.models import Client
+        from . import feeds
+        from .models import Appointment, Dog, Trainer
+
+        post_save.connect(feeds.appointment_changed, sender=Appointment, dispatch_uid='calendar_appointment_save')
+        post_delete.connect(feeds.appointment_changed, sender=Appointment, dispatch_uid='calendar_appointment_delete')
+        post_save.connect(feeds.dog_changed, sender=Dog, dispatch_uid='calendar_dog_save')
+        post_save.connect(feeds.trainer_changed, sender=Trainer, dispatch_uid='calendar_trainer_save')
+        post_save.connect(feeds.client_changed, sender=Client, dispatch_uid='calendar_client_save')
@@ -0,0 +1,214 @@
+"""
+iCalendar (RFC 5545) feeds of trainer and dog schedules.
+
+Calendar apps poll a subscribed feed every few minutes, so a poll should
+almost never render anything:
+- every feed owner (Trainer, Dog) carries a `schedule_version` that is bumped
+  whenever an appointment shown in its feed (or a name in it, including the
+  owner's) changes
+- the ETag is that version plus the first day of the window, so an unchanged
+  feed is answered with 304 after a single indexed lookup
+- rendered feeds are cached under the same key, so a subscriber without a
+  matching ETag still gets the stored body
+- only appointments in a bounded window (DAYS_BEHIND..DAYS_AHEAD) are rendered
+"""
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Appointment, Dog, Trainer
+
+_config = getattr(settings, 'CALENDAR_FEEDS', {})
+DAYS_BEHIND = _config.get('DAYS_BEHIND', 30)
+DAYS_AHEAD = _config.get('DAYS_AHEAD', 180)
+CACHE_TIMEOUT = _config.get('CACHE_TIMEOUT', 24 * 60 * 60)
+
+PRODID = '-//StarK9//Training Schedule//EN'
+
+
+# --- Versions -----------------------------------------------------------------
+
+def bump_versions(trainer_ids=(), dog_ids=()):
+    trainer_ids = {pk for pk in trainer_ids if pk is not None}
+    dog_ids = {pk for pk in dog_ids if pk is not None}
+    if trainer_ids:
+        Trainer.objects.filter(pk__in=trainer_ids).update(schedule_version=F('schedule_version') + 1)
+    if dog_ids:
+        Dog.objects.filter(pk__in=dog_ids).update(schedule_version=F('schedule_version') + 1)
+
+
+def appointment_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # An appointment moved to another trainer or dog changes both feeds
+    loaded = instance._loaded_values or {}
+    bump_versions(
+        trainer_ids=[instance.trainer_id, loaded.get('trainer_id')],
+        dog_ids=[instance.dog_id, loaded.get('dog_id')]
+    )
+
+
+def dog_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # The dog's name appears in its own feed and in its trainers' feeds
+    trainer_ids = Appointment.objects.filter(dog=instance).values_list('trainer_id', flat=True).distinct()
+    bump_versions(trainer_ids=list(trainer_ids), dog_ids=[instance.pk])
+
+
+def trainer_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_versions(trainer_ids=[instance.pk])
+
+
+def client_changed(sender, instance, created=False, raw=False, **kwargs):
+    # Feeds only show the owner's name; other client changes (and new clients, who have no dogs) leave them as they are
+    if raw or created or not instance.changed_since_loaded('first_name', 'last_name'):
+        return
+    # The owner's name is in every event of their dogs, in the dogs' and the trainers' feeds
+    Dog.objects.filter(client_id=instance.pk).update(schedule_version=F('schedule_version') + 1)
+    Trainer.objects.filter(appointments__dog__client_id=instance.pk).update(schedule_version=F('schedule_version') + 1)
+
+
+# --- Rendering ----------------------------------------------------------------
+
+def window(today=None):
+    """
+    (start, end) datetimes of the appointments a feed shows.
+    """
+    today = today or timezone.now().date()
+    start = datetime.datetime.combine(today - datetime.timedelta(days=DAYS_BEHIND), datetime.time.min, datetime.timezone.utc)
+    return start, start + datetime.timedelta(days=DAYS_BEHIND + DAYS_AHEAD)
+
+
+def escape(text):
+    return (
+        (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """
+    Split a content line into 75-octet pieces joined with CRLF + space.
+    """
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    parts = []
+    while data:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(data))
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:  # Never split a UTF-8 character
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    return '\r\n '.join(parts)
+
+
+def _stamp(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render(name, appointments):
+    """
+    A VCALENDAR with one VEVENT per appointment.
+    """
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape(name)}',
+    ]
+    for appointment in appointments:
+        end = appointment.start_time + datetime.timedelta(minutes=appointment.duration_minutes)
+        dog = appointment.dog
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:appointment-{appointment.pk}@stark9',
+            f'DTSTAMP:{_stamp(appointment.updated_at)}',
+            f'LAST-MODIFIED:{_stamp(appointment.updated_at)}',
+            f'DTSTART:{_stamp(appointment.start_time)}',
+            f'DTEND:{_stamp(end)}',
+            f'SUMMARY:{escape(f"{dog.name} ({dog.client.first_name} {dog.client.last_name})")}',
+            f'STATUS:{"CANCELLED" if appointment.cancelled else "CONFIRMED"}',
+        ]
+        if appointment.location:
+            lines.append(f'LOCATION:{escape(appointment.location)}')
+        if appointment.notes:
+            lines.append(f'DESCRIPTION:{escape(appointment.notes)}')
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return ''.join(fold(line) + '\r\n' for line in lines).encode('utf-8')
+
+
+# --- Feeds --------------------------------------------------------------------
+
+class Feed:
+    """
+    A calendar feed owner looked up by its secret token.
+    """
+    model = None
+    kind = None
+
+    def __init__(self, token, today=None):
+        self.token = token
+        self.start, self.end = window(today)
+        row = self.model.objects.filter(calendar_token=token).values_list('pk', 'schedule_version').first()
+        self.pk, self.version = row or (None, None)
+
+    @property
+    def exists(self):
+        return self.pk is not None
+
+    @property
+    def etag(self):
+        return f'"{self.kind}-{self.pk}-{self.version}-{self.start:%Y%m%d}"'
+
+    def cache_key(self):
+        return f'calendar-feed:{self.kind}:{self.pk}:{self.version}:{self.start:%Y%m%d}'
+
+    def name(self):
+        raise NotImplementedError
+
+    def appointments(self):
+        return (
+            Appointment.objects
+            .filter(**{self.kind: self.pk}, start_time__gte=self.start, start_time__lt=self.end)
+            .select_related('dog__client')
+            .order_by('start_time', 'pk')
+        )
+
+    def body(self):
+        """
+        The rendered feed, from the cache when this version was rendered before.
+        """
+        key = self.cache_key()
+        body = cache.get(key)
+        if body is None:
+            body = render(self.name(), self.appointments())
+            cache.set(key, body, CACHE_TIMEOUT)
+        return body
+
+
+class TrainerFeed(Feed):
+    model = Trainer
+    kind = 'trainer'
+
+    def name(self):
+        trainer = Trainer.objects.get(pk=self.pk)
+        return f"StarK9 - {trainer.first_name} {trainer.last_name}"
+
+
+class DogFeed(Feed):
+    model = Dog
+    kind = 'dog'
+
+    def name(self):
+        dog = Dog.objects.get(pk=self.pk)
+        return f"StarK9 - {dog.name}"
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:37
+
+import django.db.models.deletion
+import training_tracker_app.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('manage_owners_app', '0007_address_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Dog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_token', models.CharField(default=training_tracker_app.models.new_calendar_token, editable=False, max_length=64, unique=True)),
+                ('schedule_version', models.PositiveIntegerField(default=0, editable=False)),
+                ('name', models.CharField(help_text='Name of the dog. Required.', max_length=100)),
+                ('breed', models.CharField(blank=True, help_text='Breed of the dog. Optional.', max_length=100)),
+                ('date_of_birth', models.DateField(blank=True, help_text='Date of birth (or best estimate). Optional.', null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('client', models.ForeignKey(help_text='The client (owner) of this dog.', on_delete=django.db.models.deletion.CASCADE, related_name='dogs', to='manage_owners_app.client')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Trainer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('calendar_token', models.CharField(default=training_tracker_app.models.new_calendar_token, editable=False, max_length=64, unique=True)),
+                ('schedule_version', models.PositiveIntegerField(default=0, editable=False)),
+                ('first_name', models.CharField(help_text='First name of the trainer. Required.', max_length=200)),
+                ('last_name', models.CharField(help_text='Last name of the trainer. Required.', max_length=200)),
+                ('email', models.EmailField(blank=True, help_text="Trainer's email address. Optional.", max_length=254)),
+                ('is_active', models.BooleanField(default=True)),
+                ('user', models.OneToOneField(blank=True, help_text='Login account of the trainer. Optional.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trainer', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['last_name', 'first_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Appointment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField(help_text='When the session starts.')),
+                ('duration_minutes', models.PositiveIntegerField(default=60)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('notes', models.TextField(blank=True)),
+                ('completed', models.BooleanField(default=False)),
+                ('cancelled', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dog', models.ForeignKey(help_text='The dog being trained.', on_delete=django.db.models.deletion.CASCADE, related_name='appointments', to='training_tracker_app.dog')),
+                ('trainer', models.ForeignKey(blank=True, help_text='The trainer running the session. Optional.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='training_tracker_app.trainer')),
+            ],
+            options={
+                'ordering': ['start_time'],
+                'indexes': [models.Index(fields=['trainer', 'start_time'], name='appointment_trainer_start_idx'), models.Index(fields=['dog', 'start_time'], name='appointment_dog_start_idx')],
+            },
+        ),
+    ]
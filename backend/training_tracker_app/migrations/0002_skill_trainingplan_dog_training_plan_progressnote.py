@@ -0,0 +1,60 @@
+# Generated by Django 5.1.7 on 2026-10-19 16:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training_tracker_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of the skill. Required.', max_length=100, unique=True)),
+                ('description', models.TextField(blank=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TrainingPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Name of the plan. Required.', max_length=100, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('goals', models.TextField(blank=True)),
+                ('skills', models.ManyToManyField(blank=True, related_name='plans', to='training_tracker_app.skill')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='dog',
+            name='training_plan',
+            field=models.ForeignKey(blank=True, help_text='The plan the dog is currently following. Optional.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dogs', to='training_tracker_app.trainingplan'),
+        ),
+        migrations.CreateModel(
+            name='ProgressNote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField(blank=True, choices=[(1, 'Introduced'), (2, 'Learning'), (3, 'Improving'), (4, 'Reliable'), (5, 'Mastered')], help_text='How well the dog performs the skill. Optional.', null=True)),
+                ('note_text', models.TextField(blank=True)),
+                ('date_recorded', models.DateTimeField(default=django.utils.timezone.now)),
+                ('appointment', models.ForeignKey(blank=True, help_text='The session the note was taken in. Optional.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='progress_notes', to='training_tracker_app.appointment')),
+                ('dog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_notes', to='training_tracker_app.dog')),
+                ('skill', models.ForeignKey(blank=True, help_text='The skill the note is about. Optional.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='progress_notes', to='training_tracker_app.skill')),
+            ],
+            options={
+                'ordering': ['-date_recorded'],
+                'indexes': [models.Index(fields=['dog', 'skill', 'date_recorded'], name='progressnote_dog_skill_idx')],
+            },
+        ),
+    ]
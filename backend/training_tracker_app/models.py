@@ -1,3 +1,258 @@
+import secrets
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+from backend.mixins import TracksLoadedValues
+
+
+def new_calendar_token():
+    return secrets.token_urlsafe(24)
+
+
+class ScheduleOwner(models.Model):
+    """
+    Something with its own calendar feed (a trainer or a dog).
+    """
+    # Secret part of the calendar feed URL; regenerate_calendar_token() revokes old subscriptions
+    calendar_token = models.CharField(
+        max_length=64,
+        unique=True,
+        default=new_calendar_token,
+        editable=False
+    )
+    # Bumped whenever anything shown in the calendar feed changes (see feeds.py)
+    schedule_version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def regenerate_calendar_token(self):
+        """
+        Move the calendar feed to a new secret URL; subscriptions to the old one stop working.
+        """
+        self.calendar_token = new_calendar_token()
+        type(self).objects.filter(pk=self.pk).update(calendar_token=self.calendar_token)
+
+    def save(self, *args, **kwargs):
+        # schedule_version is only changed with UPDATE ... + 1, so a full save of a
+        # stale instance must not write its old value back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'schedule_version'
+            ]
+        super().save(*args, **kwargs)
+
+
+class Trainer(ScheduleOwner):
+    """
+    A trainer who runs appointments. Optionally linked to a login user.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='trainer',
+        help_text="Login account of the trainer. Optional."
+    )
+    first_name = models.CharField(
+        max_length=200,
+        blank=False,
+        help_text="First name of the trainer. Required."
+    )
+    last_name = models.CharField(
+        max_length=200,
+        blank=False,
+        help_text="Last name of the trainer. Required."
+    )
+    email = models.EmailField(
+        max_length=254,
+        blank=True,
+        help_text="Trainer's email address. Optional."
+    )
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['last_name', 'first_name']
+
+    def __str__(self):
+        return f"{self.last_name}, {self.first_name}"
+
+
+class Skill(models.Model):
+    """
+    A behaviour being taught (e.g. 'Sit', 'Stay', 'Leash Walking').
+    """
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        help_text="Name of the skill. Required."
+    )
+    description = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class TrainingPlan(models.Model):
+    """
+    A template plan (e.g. 'Puppy Basics', 'Advanced Obedience') made of skills.
+    """
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        help_text="Name of the plan. Required."
+    )
+    description = models.TextField(blank=True)
+    goals = models.TextField(blank=True)
+    skills = models.ManyToManyField(Skill, blank=True, related_name='plans')
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class Dog(ScheduleOwner):
+    """
+    A client's dog.
+    """
+    client = models.ForeignKey(
+        'manage_owners_app.Client',
+        on_delete=models.CASCADE,
+        related_name='dogs',
+        help_text="The client (owner) of this dog."
+    )
+    name = models.CharField(
+        max_length=100,
+        blank=False,
+        help_text="Name of the dog. Required."
+    )
+    breed = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Breed of the dog. Optional."
+    )
+    date_of_birth = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Date of birth (or best estimate). Optional."
+    )
+    notes = models.TextField(blank=True)
+    is_active = models.BooleanField(default=True)
+    training_plan = models.ForeignKey(
+        TrainingPlan,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='dogs',
+        help_text="The plan the dog is currently following. Optional."
+    )
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.client})"
+
+
+class Appointment(TracksLoadedValues):
+    """
+    A scheduled training session for one dog.
+    """
+    dog = models.ForeignKey(
+        Dog,
+        on_delete=models.CASCADE,
+        related_name='appointments',
+        help_text="The dog being trained."
+    )
+    trainer = models.ForeignKey(
+        Trainer,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='appointments',
+        help_text="The trainer running the session. Optional."
+    )
+    start_time = models.DateTimeField(help_text="When the session starts.")
+    duration_minutes = models.PositiveIntegerField(default=60)
+    location = models.CharField(max_length=255, blank=True)
+    notes = models.TextField(blank=True)
+    completed = models.BooleanField(default=False)
+    cancelled = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['start_time']
+        indexes = [
+            # Calendar feeds read one trainer's or one dog's appointments in a time window
+            models.Index(fields=['trainer', 'start_time'], name='appointment_trainer_start_idx'),
+            models.Index(fields=['dog', 'start_time'], name='appointment_dog_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dog.name} - {self.start_time:%Y-%m-%d %H:%M}"
+
+
+class ProgressNote(models.Model):
+    """
+    A note on a dog's progress, optionally about one skill and recorded during an appointment.
+    """
+    INTRODUCED = 1
+    LEARNING = 2
+    IMPROVING = 3
+    RELIABLE = 4
+    MASTERED = 5
+    LEVEL_CHOICES = [
+        (INTRODUCED, 'Introduced'),
+        (LEARNING, 'Learning'),
+        (IMPROVING, 'Improving'),
+        (RELIABLE, 'Reliable'),
+        (MASTERED, 'Mastered'),
+    ]
+
+    dog = models.ForeignKey(
+        Dog,
+        on_delete=models.CASCADE,
+        related_name='progress_notes'
+    )
+    appointment = models.ForeignKey(
+        Appointment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='progress_notes',
+        help_text="The session the note was taken in. Optional."
+    )
+    skill = models.ForeignKey(
+        Skill,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='progress_notes',
+        help_text="The skill the note is about. Optional."
+    )
+    level = models.PositiveSmallIntegerField(
+        choices=LEVEL_CHOICES,
+        null=True,
+        blank=True,
+        help_text="How well the dog performs the skill. Optional."
+    )
+    note_text = models.TextField(blank=True)
+    date_recorded = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-date_recorded']
+        indexes = [
+            models.Index(fields=['dog', 'skill', 'date_recorded'], name='progressnote_dog_skill_idx'),
+        ]
 
-# Create your models here.
\ No newline at end of file
+    def __str__(self):
+        return f"{self.dog.name} - {self.skill or 'General'} ({self.date_recorded:%Y-%m-%d})"
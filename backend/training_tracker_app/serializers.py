@@ -0,0 +1,46 @@
+from rest_framework import serializers
+
+from manage_owners_app.serializers import ClientSummarySerializer
+from .models import Appointment, Dog, Trainer
+
+
+class TrainerSummarySerializer(serializers.ModelSerializer):
+    """
+    Name only, for listings.
+    """
+    class Meta:
+        model = Trainer
+        fields = ['id', 'first_name', 'last_name']
+
+
+class DogSummarySerializer(serializers.ModelSerializer):
+    """
+    A dog with its owner's contact details, for listings.
+    """
+    client = ClientSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Dog
+        fields = ['id', 'name', 'breed', 'client']
+
+
+class AppointmentSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the Appointment model, with the dog, owner and trainer inlined.
+    """
+    dog = DogSummarySerializer(read_only=True)
+    trainer = TrainerSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Appointment
+        fields = [
+            'id',
+            'dog',
+            'trainer',
+            'start_time',
+            'duration_minutes',
+            'location',
+            'notes',
+            'completed',
+            'cancelled'
+        ]
@@ -1,3 +1,268 @@
+import datetime
+import random
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from manage_owners_app.models import Client
+from . import analytics, feeds
+from .models import Trainer, Dog, Appointment, Skill, TrainingPlan, ProgressNote
+
+
+class CalendarFeedTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = Client.objects.create(
+            first_name='Jane', last_name='Doe', email='jane.doe@example.com', phone_number='555-123-4567'
+        )
+        cls.trainer = Trainer.objects.create(first_name='Tess', last_name='Trainer')
+        cls.other_trainer = Trainer.objects.create(first_name='Otto', last_name='Other')
+        cls.dog = Dog.objects.create(client=owner, name='Rex', breed='Beagle')
+        now = timezone.now()
+        cls.upcoming = Appointment.objects.create(
+            dog=cls.dog, trainer=cls.trainer, start_time=now + datetime.timedelta(days=2),
+            location='Park; north gate, by the pond', notes='Bring treats\nand a long line'
+        )
+        cls.too_old = Appointment.objects.create(
+            dog=cls.dog, trainer=cls.trainer, start_time=now - datetime.timedelta(days=feeds.DAYS_BEHIND + 5)
+        )
+        cls.too_far = Appointment.objects.create(
+            dog=cls.dog, trainer=cls.trainer, start_time=now + datetime.timedelta(days=feeds.DAYS_AHEAD + 5)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def trainer_url(self, trainer=None):
+        return reverse('trainer_calendar', args=[(trainer or self.trainer).calendar_token])
+
+    def version(self, obj):
+        return type(obj).objects.values_list('schedule_version', flat=True).get(pk=obj.pk)
+
+    def test_01_feed_renders_window(self):
+        """The feed is valid iCalendar and only contains appointments inside the window."""
+        response = self.client.get(self.trainer_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(f'UID:appointment-{self.upcoming.pk}@stark9', body)
+        self.assertNotIn(f'UID:appointment-{self.too_old.pk}@stark9', body)
+        self.assertNotIn(f'UID:appointment-{self.too_far.pk}@stark9', body)
+        self.assertIn('SUMMARY:Rex (Jane Doe)', body)
+        self.assertIn('LOCATION:Park\\; north gate\\, by the pond', body)
+        self.assertIn('DESCRIPTION:Bring treats\\nand a long line', body)
+
+    def test_02_unknown_token(self):
+        """Unknown tokens are not found, and other methods are not allowed."""
+        self.assertEqual(self.client.get(reverse('trainer_calendar', args=['nope'])).status_code, 404)
+        self.assertEqual(self.client.post(self.trainer_url()).status_code, 405)
+
+    def test_03_conditional_request(self):
+        """A poll with the current ETag gets a 304 after a single query."""
+        etag = self.client.get(self.trainer_url())['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.trainer_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_04_rendered_feed_is_cached(self):
+        """A poll without an ETag is served from the cache until the schedule changes."""
+        first = self.client.get(self.trainer_url())
+        with self.assertNumQueries(1):
+            second = self.client.get(self.trainer_url())
+        self.assertEqual(first.content, second.content)
+
+        self.upcoming.location = 'Back yard'
+        self.upcoming.save()
+        third = self.client.get(self.trainer_url(), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+        self.assertNotEqual(third['ETag'], first['ETag'])
+        self.assertIn(b'LOCATION:Back yard', third.content)
+
+    def test_05_versions_follow_changes(self):
+        """Moving, renaming and deleting bump exactly the feeds that show the change."""
+        trainer, other, dog = self.version(self.trainer), self.version(self.other_trainer), self.version(self.dog)
+        self.upcoming.trainer = self.other_trainer
+        self.upcoming.save()
+        self.assertEqual(self.version(self.trainer), trainer + 1)
+        self.assertEqual(self.version(self.other_trainer), other + 1)
+        self.assertEqual(self.version(self.dog), dog + 1)
+
+        self.dog.name = 'Rexy'
+        self.dog.save()
+        self.assertEqual(self.version(self.trainer), trainer + 2)  # Still has the old appointments
+        self.assertEqual(self.version(self.dog), dog + 2)
+
+        self.too_old.delete()
+        self.assertEqual(self.version(self.trainer), trainer + 3)
+        self.assertEqual(self.version(self.other_trainer), other + 2)  # Got the dog rename only
+
+    def test_06_dog_feed_and_window_rollover(self):
+        """Dog feeds work the same way, and the ETag changes when the window moves on."""
+        url = reverse('dog_calendar', args=[self.dog.calendar_token])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'X-WR-CALNAME:StarK9 - Rex', response.content)
+        tomorrow = timezone.now().date() + datetime.timedelta(days=1)
+        self.assertNotEqual(feeds.DogFeed(self.dog.calendar_token, today=tomorrow).etag, response['ETag'])
+
+    def test_07_long_lines_are_folded(self):
+        """Content lines longer than 75 octets are folded without splitting characters."""
+        line = 'DESCRIPTION:' + 'é' * 100
+        folded = feeds.fold(line)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in folded.split('\r\n')))
+        self.assertEqual(folded.replace('\r\n ', ''), line)
+
+    def test_08_owner_rename_and_token_rotation(self):
+        """Renaming the owner refreshes the feeds showing them; a new token revokes the old URL."""
+        trainer, other, dog = self.version(self.trainer), self.version(self.other_trainer), self.version(self.dog)
+        first = self.client.get(self.trainer_url())
+        owner = Client.objects.get(pk=self.dog.client_id)
+        owner.notes = 'Prefers mornings.'
+        with self.assertNumQueries(1):  # Just the UPDATE: nothing the feeds show changed
+            owner.save()
+        owner.last_name = 'Smith'
+        owner.save()
+        self.assertEqual((self.version(self.trainer), self.version(self.dog)), (trainer + 1, dog + 1))
+        self.assertEqual(self.version(self.other_trainer), other)  # Never trained the owner's dogs
+        second = self.client.get(self.trainer_url(), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(b'Smith', second.content)
+
+        old_url = self.trainer_url()
+        self.trainer.regenerate_calendar_token()
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertEqual(self.client.get(self.trainer_url()).status_code, 200)
+
+
+class AnalyticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = Client.objects.create(
+            first_name='Jane', last_name='Doe', email='jane.doe@example.com', phone_number='555-123-4567'
+        )
+        cls.sit = Skill.objects.create(name='Sit')
+        cls.stay = Skill.objects.create(name='Stay')
+        cls.basics = TrainingPlan.objects.create(name='Puppy Basics')
+        cls.tess = Trainer.objects.create(first_name='Tess', last_name='Trainer')
+        cls.otto = Trainer.objects.create(first_name='Otto', last_name='Other')
+        cls.rex = Dog.objects.create(client=owner, name='Rex', breed='Beagle', training_plan=cls.basics)
+        cls.max = Dog.objects.create(client=owner, name='Max', breed='beagle ')
+        cls.bella = Dog.objects.create(client=owner, name='Bella', breed='Poodle', training_plan=cls.basics)
+        cls.start = timezone.now() - datetime.timedelta(days=100)
+
+        # Rex masters Sit in his 3rd session (two notes in the 2nd session count once)
+        cls.notes(cls.rex, cls.sit, cls.tess, [(0, 1), (7, 2), (7, 3), (14, 5), (21, 5)])
+        # Max masters Sit in his 5th session, with Otto
+        cls.notes(cls.max, cls.sit, cls.otto, [(0, 1), (7, 2), (14, 3), (21, 4), (28, 5)])
+        # Bella never masters Stay
+        cls.notes(cls.bella, cls.stay, cls.tess, [(0, 1), (10, 2)])
+
+    @classmethod
+    def notes(cls, dog, skill, trainer, days_and_levels):
+        sessions = {}
+        for day, level in days_and_levels:
+            when = cls.start + datetime.timedelta(days=day)
+            if day not in sessions:
+                sessions[day] = Appointment.objects.create(dog=dog, trainer=trainer, start_time=when)
+            ProgressNote.objects.create(dog=dog, skill=skill, appointment=sessions[day], level=level, date_recorded=when)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_01_load_notes(self):
+        """Notes are loaded column-wise, with -1 for missing appointments."""
+        ProgressNote.objects.create(dog=self.rex, skill=self.stay, level=1)
+        ProgressNote.objects.create(dog=self.rex, note_text='General note, no skill')
+        notes = analytics.load_notes()
+        self.assertEqual(len(notes['dog']), 13)
+        self.assertEqual(set(notes), {'dog', 'skill', 'appointment', 'trainer', 'level', 'day'})
+        self.assertEqual((notes['appointment'] == analytics.MISSING).sum(), 1)
+        self.assertEqual(len(analytics.load_notes(self.stay.pk)['dog']), 3)
+
+    def test_02_mastery_by_breed(self):
+        """Sessions to mastery are counted per distinct session and grouped by normalized breed."""
+        results = analytics.mastery(analytics.load_notes(), 'breed')
+        self.assertEqual(results, [{
+            'breed': 'Beagle', 'skill_id': self.sit.pk, 'skill': 'Sit', 'dogs': 2,
+            'mean_sessions': 4.0, 'median_sessions': 4.0, 'mean_days': 21.0,
+        }])
+
+    def test_03_mastery_by_plan_and_trainer(self):
+        """Dogs without a plan are 'Unknown'; the trainer is the one of the mastering session."""
+        by_plan = {r['plan']: r['mean_sessions'] for r in analytics.mastery(analytics.load_notes(), 'plan')}
+        self.assertEqual(by_plan, {'Puppy Basics': 3.0, 'Unknown': 5.0})
+        by_trainer = {r['trainer']: r['dogs'] for r in analytics.mastery(analytics.load_notes(), 'trainer')}
+        self.assertEqual(by_trainer, {'Tess Trainer': 1, 'Otto Other': 1})
+
+    def test_04_progress_curves(self):
+        """Mean level per week since the first note on a skill."""
+        curves = analytics.progress_curves(analytics.load_notes(self.sit.pk), 'breed', weeks=3)
+        self.assertEqual(curves['Beagle'], [
+            {'week': 0, 'mean_level': 1.0, 'notes': 2},
+            {'week': 1, 'mean_level': 2.33, 'notes': 3},
+            {'week': 2, 'mean_level': 4.0, 'notes': 2},
+            {'week': 3, 'mean_level': 4.67, 'notes': 3},  # Weeks 3 and 4 share the last bucket
+        ])
+        self.assertEqual(analytics.progress_curves(analytics.load_notes(self.sit.pk), 'trainer').keys(),
+                         {'Tess Trainer', 'Otto Other'})
+
+    def test_05_matches_row_by_row_computation(self):
+        """The vectorized mastery aggregates match a plain per-note loop on random data."""
+        ProgressNote.objects.all().delete()
+        rng = random.Random(7)
+        dogs = [self.rex, self.max, self.bella]
+        appointments = [
+            Appointment.objects.create(dog=rng.choice(dogs), trainer=self.tess, start_time=self.start)
+            for _ in range(40)
+        ]
+        ProgressNote.objects.bulk_create([
+            ProgressNote(
+                dog=rng.choice(dogs), skill=rng.choice([self.sit, self.stay]),
+                appointment=rng.choice(appointments + [None]), level=rng.randint(1, 5),
+                date_recorded=self.start + datetime.timedelta(hours=rng.randint(0, 2000))
+            ) for _ in range(600)
+        ])
+
+        expected = defaultdict(list)
+        history = defaultdict(list)
+        for note in ProgressNote.objects.select_related('dog').order_by('date_recorded', 'pk'):
+            history[note.dog_id, note.skill_id].append(note)
+        for (dog_id, skill_id), notes in history.items():
+            sessions = set()
+            for note in notes:
+                if note.appointment_id is not None:
+                    sessions.add(note.appointment_id)
+                if note.level == ProgressNote.MASTERED:
+                    expected[note.dog.breed.strip().title(), skill_id].append(len(sessions))
+                    break
+
+        results = analytics.mastery(analytics.load_notes(), 'breed')
+        self.assertEqual(
+            {(r['breed'], r['skill_id']): (r['dogs'], r['mean_sessions']) for r in results},
+            {key: (len(values), round(sum(values) / len(values), 2)) for key, values in expected.items()}
+        )
+
+    def test_06_api_and_daily_cache(self):
+        """The reports are served over the API and cached for the day."""
+        user = get_user_model().objects.create_user('analyst', password='pw')
+        self.client.force_login(user)
+        response = self.client.get(reverse('mastery_report'), {'by': 'trainer', 'skill': self.sit.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(self.client.get(reverse('mastery_report'), {'by': 'colour'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('progress_report'), {'weeks': 'x'}).status_code, 400)
 
-# Create your tests here.
+        ProgressNote.objects.all().delete()
+        with self.assertNumQueries(0):
+            cached = analytics.mastery_report('trainer', self.sit.pk)
+        self.assertEqual(len(cached), 2)
+        response = self.client.get(reverse('progress_report'), {'by': 'plan'})
+        self.assertEqual(response.json(), {})
@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import Appointment_window, Mastery_report, Progress_report, dog_calendar, trainer_calendar
+
+urlpatterns = [
+    path('appointments/', Appointment_window.as_view(), name='appointment_window'),
+    path('calendars/trainers/<str:token>.ics', trainer_calendar, name='trainer_calendar'),
+    path('calendars/dogs/<str:token>.ics', dog_calendar, name='dog_calendar'),
+    path('analytics/mastery/', Mastery_report.as_view(), name='mastery_report'),
+    path('analytics/progress/', Progress_report.as_view(), name='progress_report')
+]
@@ -1,3 +1,133 @@
-from django.shortcuts import render
+import datetime
 
-# Create your views here.
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_safe
+
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from backend.object_cache import get_object_caches
+from . import analytics
+from .feeds import DogFeed, TrainerFeed
+from .models import Appointment
+from .serializers import AppointmentSerializer
+
+# Calendar apps poll on their own schedule; this only stops intermediaries from refetching sooner
+FEED_MAX_AGE = 300
+
+
+def _feed_response(request, feed):
+    """
+    Serve a calendar feed. The secret token in the URL is the only credential,
+    since calendar apps cannot log in.
+    """
+    if not feed.exists:
+        raise Http404("Unknown calendar feed.")
+    # Unchanged since the subscriber's last poll: one indexed lookup, nothing rendered
+    not_modified = get_conditional_response(request, etag=feed.etag)
+    if not_modified is None:
+        response = HttpResponse(feed.body(), content_type='text/calendar; charset=utf-8')
+    else:
+        response = not_modified
+    response['ETag'] = feed.etag
+    patch_cache_control(response, private=True, max_age=FEED_MAX_AGE)
+    return response
+
+
+@require_safe
+def trainer_calendar(request, token):
+    """
+    iCalendar feed of a trainer's appointments (subscribe from any calendar app).
+    """
+    return _feed_response(request, TrainerFeed(token))
+
+
+@require_safe
+def dog_calendar(request, token):
+    """
+    iCalendar feed of one dog's appointments, e.g. for the owner's calendar.
+    """
+    return _feed_response(request, DogFeed(token))
+
+
+class Appointment_window(APIView):
+    """
+    Appointments starting in a time window, soonest first (e.g. the dashboard's upcoming sessions).
+    Query parameters: ?start=<ISO 8601 datetime> (default now), ?days=<n> (default 7, max 31),
+    ?trainer=<id>, ?dog=<id>, ?include_cancelled=true
+    """
+    def get(self, request):
+        params = request.query_params
+        try:
+            start = parse_datetime(params['start']) if 'start' in params else timezone.now()
+        except ValueError:
+            start = None
+        if start is None:
+            return Response({'detail': "start must be an ISO 8601 datetime."}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        try:
+            days = min(max(int(params.get('days', 7)), 1), 31)
+            filters = {name: int(params[name]) for name in ('trainer', 'dog') if name in params}
+        except ValueError:
+            return Response({'detail': "days, trainer and dog must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        appointments = Appointment.objects.filter(
+            start_time__gte=start, start_time__lt=start + datetime.timedelta(days=days), **filters
+        )
+        if params.get('include_cancelled', '').lower() not in ('1', 'true', 'yes'):
+            appointments = appointments.filter(cancelled=False)
+        appointments = list(appointments.order_by('start_time', 'pk')[:500])
+
+        # Related rows come from the request's object caches, so windows in the same batch share them
+        caches = get_object_caches(request)
+        caches.attach(appointments, 'trainer')
+        caches.attach(caches.attach(appointments, 'dog'), 'client')
+        serializer = AppointmentSerializer(appointments, many = True)
+        return Response(serializer.data)
+
+
+def _report_params(request):
+    """
+    Parse ?by=breed|plan|trainer and ?skill=<id> shared by the analytics reports.
+    """
+    params = request.query_params
+    by = params.get('by', 'breed')
+    if by not in analytics.DIMENSIONS:
+        raise ValueError(f"by must be one of: {', '.join(analytics.DIMENSIONS)}.")
+    try:
+        skill_id = int(params['skill']) if 'skill' in params else None
+    except ValueError:
+        raise ValueError("skill must be an integer.")
+    return by, skill_id
+
+
+class Mastery_report(APIView):
+    """
+    Average and median sessions (and days) dogs needed to master each skill, per breed, plan or trainer.
+    Query parameters: ?by=breed|plan|trainer (default breed), ?skill=<id>
+    """
+    def get(self, request):
+        try:
+            by, skill_id = _report_params(request)
+        except ValueError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(analytics.mastery_report(by, skill_id))
+
+
+class Progress_report(APIView):
+    """
+    Mean skill level per week since dogs started a skill, per breed, plan or trainer.
+    Query parameters: ?by=breed|plan|trainer (default breed), ?skill=<id>, ?weeks=<n> (default 26, max 104)
+    """
+    def get(self, request):
+        try:
+            by, skill_id = _report_params(request)
+            weeks = min(max(int(request.query_params.get('weeks', 26)), 1), 104)
+        except ValueError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(analytics.progress_report(by, skill_id, weeks))